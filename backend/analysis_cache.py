@@ -0,0 +1,115 @@
+"""
+GPT 분석 응답 캐시 (SQLite)
+
+뷰티 분석 응답은 완성된 프롬프트만으로 정해지므로, 프롬프트의 지문(prompt_fingerprint)을 키로 저장한다.
+프롬프트는 점수를 정수로 잘라서 넣으므로 소수점 아래만 다른 점수로 다시 분석을 요청하면
+GPT를 호출하지 않고 바로 반환하고, 점수에서 계산한 값(변화량, 기준 초과 여부)이 다르면 따로 저장한다.
+TTL이 지난 항목은 무시/정리되고, 항목 수가 한도를 넘으면 가장 오래 사용하지 않은 것부터 지운다.
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+
+class AnalysisCache:
+    """프롬프트 지문 기반 영구 응답 캐시"""
+
+    def __init__(self, path: str, ttl_seconds: float, max_entries: int):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS analysis_cache ("
+            "  key TEXT PRIMARY KEY,"
+            "  value TEXT NOT NULL,"
+            "  created_at REAL NOT NULL,"
+            "  accessed_at REAL NOT NULL"
+            ")"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_analysis_cache_accessed ON analysis_cache (accessed_at)")
+        self._conn.commit()
+
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+
+    def prompt_fingerprint(self, kind: str, *prompts: str) -> str:
+        """분석 종류와 완성된 프롬프트들로 캐시 키 생성 (프롬프트가 같을 때만 적중)"""
+        payload = json.dumps([kind] + list(prompts), ensure_ascii=False, separators=(',', ':'))
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """캐시된 응답 조회 (없거나 만료되면 None)"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM analysis_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+
+            value, created_at = row
+            if now - created_at > self.ttl_seconds:
+                self._conn.execute("DELETE FROM analysis_cache WHERE key = ?", (key,))
+                self._conn.commit()
+                self.expired += 1
+                self.misses += 1
+                return None
+
+            self._conn.execute("UPDATE analysis_cache SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+        return json.loads(value)
+
+    def put(self, key: str, value: Dict[str, Any]):
+        """응답 저장 후 만료/초과 항목 정리"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO analysis_cache (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), now, now)
+            )
+            cursor = self._conn.execute(
+                "DELETE FROM analysis_cache WHERE created_at < ?", (now - self.ttl_seconds,)
+            )
+            self.expired += cursor.rowcount
+
+            count = self._conn.execute("SELECT COUNT(*) FROM analysis_cache").fetchone()[0]
+            if count > self.max_entries:
+                cursor = self._conn.execute(
+                    "DELETE FROM analysis_cache WHERE key IN ("
+                    "  SELECT key FROM analysis_cache ORDER BY accessed_at ASC LIMIT ?"
+                    ")", (count - self.max_entries,)
+                )
+                self.evictions += cursor.rowcount
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """캐시 상태 및 적중률"""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM analysis_cache").fetchone()[0]
+            lookups = self.hits + self.misses
+            return {
+                "entries": entries,
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "expired": self.expired,
+                "evictions": self.evictions,
+            }
+
+    def close(self):
+        """DB 연결 종료"""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,268 @@
+"""
+랜드마크 기반 뷰티 점수 계산 (서버 측)
+
+프론트엔드 BeautyAnalysisService.calculateBeautyAnalysis(Dart)와 같은 지표를 같은 키로 계산한다.
+여러 얼굴의 랜드마크를 (얼굴 수, 478, 2) 배열로 받아 모든 지표를 한 번에 벡터 연산하므로
+사진 보관함 일괄 채점에도 얼굴당 파이썬 반복이 거의 없다.
+
+Dart double 연산과 맞추기 위해 0으로 나누기는 inf/nan을 그대로 두고, clamp는 Dart num.clamp처럼
+nan을 상한으로 보낸다 (compareTo에서 nan이 가장 큰 값으로 취급됨).
+점수는 항상 유한하지만 비율/백분율 같은 세부 값은 폭이 0인 구간에서 inf/nan이 될 수 있으므로,
+결과 dict에서는 JSON으로 보낼 수 없는 이 값들을 None(null)으로 바꾼다.
+"""
+import math
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+# Dart 구현과 같은 랜드마크 인덱스
+VERTICAL_LANDMARKS = [234, 33, 133, 362, 359, 447]  # 가로 황금비율 (5개 구간)
+HORIZONTAL_LANDMARKS = [8, 2, 152]                  # 이마-코-턱 세로 비율
+LOWER_FACE_LANDMARKS = [2, 37, 152]                 # 코-입술-턱 하관 비율
+MIN_LANDMARKS = 468
+
+# 종합 점수 가중치 (verticalScore, horizontalScore, lowerFaceScore, symmetry, eye, nose, lip, jaw)
+OVERALL_WEIGHTS = (0.25, 0.20, 0.15, 0.15, 0.10, 0.08, 0.05, 0.02)
+
+# 턱선 지표를 계산할 수 없을 때 Dart 구현의 기본 점수
+DEFAULT_SCORE = 75.0
+
+
+def json_number(value: float) -> Optional[float]:
+    """JSON으로 보낼 수 있는 float (inf/nan이면 None)"""
+    value = float(value)
+    return value if math.isfinite(value) else None
+
+
+def dart_clamp(values: np.ndarray, lower: float, upper: float) -> np.ndarray:
+    """Dart num.clamp와 같은 범위 제한 (nan은 상한)"""
+    values = np.asarray(values, dtype=np.float64)
+    return np.where(np.isnan(values), upper, np.clip(values, lower, upper))
+
+
+def angle_between(v1: np.ndarray, v2: np.ndarray) -> np.ndarray:
+    """(..., 2) 벡터 쌍 사이 각도 (도, 길이가 0이면 nan)"""
+    len1 = np.sqrt(v1[..., 0] * v1[..., 0] + v1[..., 1] * v1[..., 1])
+    len2 = np.sqrt(v2[..., 0] * v2[..., 0] + v2[..., 1] * v2[..., 1])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cos_angle = (v1[..., 0] * v2[..., 0] + v1[..., 1] * v2[..., 1]) / (len1 * len2)
+    angle = np.arccos(dart_clamp(cos_angle, -1.0, 1.0)) * 180 / np.pi
+    return np.where((len1 == 0) | (len2 == 0), np.nan, angle)
+
+
+def jaw_angle(jaw_corner: np.ndarray, jaw_mid: np.ndarray) -> np.ndarray:
+    """턱 각도 = 90 + 세로축과 턱 벡터 사이 각도 (도, 턱 벡터 길이가 0이면 nan)"""
+    jaw_vector = jaw_mid - jaw_corner
+    jaw_length = np.sqrt(jaw_vector[..., 0] * jaw_vector[..., 0] + jaw_vector[..., 1] * jaw_vector[..., 1])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cos_angle = dart_clamp(jaw_vector[..., 1] / jaw_length, -1.0, 1.0)
+    angle = 90 + np.arccos(np.abs(cos_angle)) * 180 / np.pi
+    return np.where(jaw_length == 0, np.nan, angle)
+
+
+def lifting_score(gonial_angle: np.ndarray, cervico_mental_angle: np.ndarray) -> np.ndarray:
+    """하악각/턱목각 구간별 리프팅 점수"""
+    g = gonial_angle
+    gonial_score = np.select(
+        [g <= 90, g <= 120, g <= 140],
+        [100.0, 100 - (g - 90) * 20 / 30, 80 - (g - 120) * 60 / 20],
+        dart_clamp(20 - (g - 140) * 20 / 10, 0.0, 20.0)
+    )
+
+    c = cervico_mental_angle
+    deviation = np.abs(c - 110)
+    cervico_score = np.select(
+        [(105 <= c) & (c <= 115), (100 <= c) & (c <= 120), (90 <= c) & (c <= 130)],
+        [100.0, 90 - deviation * 2, 70 - deviation * 1.5],
+        dart_clamp(70 - deviation * 2, 40.0, 70.0)
+    )
+
+    return dart_clamp(gonial_score * 0.7 + cervico_score * 0.3, 0.0, 100.0)
+
+
+def two_section_ratio(y: np.ndarray, ideal_upper: float, ideal_lower: float, weight: float) -> Dict[str, np.ndarray]:
+    """세 점의 y 좌표로 나눈 두 구간 비율과 이상 비율 대비 점수"""
+    radius1 = np.abs(y[:, 1] - y[:, 0]) / 2
+    radius2 = np.abs(y[:, 2] - y[:, 1]) / 2
+    total_diameter = (radius1 + radius2) * 2
+    with np.errstate(divide="ignore", invalid="ignore"):
+        percentage1 = radius1 * 2 / total_diameter * 100
+        percentage2 = radius2 * 2 / total_diameter * 100
+    deviation = np.abs(percentage1 - ideal_upper) + np.abs(percentage2 - ideal_lower)
+    return {
+        "score": dart_clamp(100 - deviation * weight, 50.0, 100.0),
+        "upperPercentage": percentage1,
+        "lowerPercentage": percentage2,
+        "deviation": deviation,
+    }
+
+
+def compute_beauty_metrics(landmarks: np.ndarray) -> Dict[str, Any]:
+    """(얼굴 수, N, 2) 픽셀 좌표에서 모든 지표를 배열로 계산
+
+    반환값의 각 항목은 얼굴 수 길이의 배열이다 (vertical.percentages는 (얼굴 수, 5)).
+    """
+    points = np.asarray(landmarks, dtype=np.float64)
+    x = points[:, :, 0]
+    y = points[:, :, 1]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # 가로 황금비율: 6개 x 좌표로 나눈 5개 구간이 각각 20%에 가까울수록 높음
+        radii = np.abs(np.diff(x[:, VERTICAL_LANDMARKS], axis=1)) / 2
+        total_diameter = radii.sum(axis=1, keepdims=True) * 2
+        percentages = radii * 2 / total_diameter * 100
+        vertical_deviation = np.abs(percentages - 20.0).sum(axis=1)
+        vertical = {
+            "score": dart_clamp(100 - vertical_deviation * 2, 50.0, 100.0),
+            "percentages": percentages,
+            "totalDeviation": vertical_deviation,
+        }
+
+        horizontal = two_section_ratio(y[:, HORIZONTAL_LANDMARKS], 50.0, 50.0, 1.5)
+        lower_face = two_section_ratio(y[:, LOWER_FACE_LANDMARKS], 33.0, 67.0, 1.2)
+
+        # 좌우 대칭: 두 눈 중심선 기준 눈/입꼬리 좌우 거리 차이
+        center_x = (x[:, 33] + x[:, 362]) / 2
+        face_width = np.abs(x[:, 362] - x[:, 33])
+        eye_symmetry = 1.0 - np.abs(np.abs(x[:, 33] - center_x) - np.abs(center_x - x[:, 362])) / face_width
+        mouth_symmetry = 1.0 - np.abs(np.abs(x[:, 61] - center_x) - np.abs(center_x - x[:, 291])) / face_width
+        symmetry = dart_clamp((eye_symmetry + mouth_symmetry) / 2 * 100, 50.0, 100.0)
+
+        # 눈: 눈 사이 거리 / 평균 눈 너비가 1에 가까울수록 높음
+        left_eye_width = np.abs(x[:, 33] - x[:, 133])
+        right_eye_width = np.abs(x[:, 362] - x[:, 263])
+        eye_distance = np.abs(x[:, 362] - x[:, 33])
+        avg_eye_width = (left_eye_width + right_eye_width) / 2
+        eye = {
+            "score": dart_clamp(100 - np.abs(eye_distance / avg_eye_width - 1.0) * 30, 50.0, 100.0),
+            "leftWidth": left_eye_width,
+            "rightWidth": right_eye_width,
+            "distance": eye_distance,
+            "symmetry": 1.0 - np.abs(left_eye_width - right_eye_width) / avg_eye_width,
+        }
+
+        # 코: 높이 / 너비가 1.2에 가까울수록 높음
+        nose_width = np.abs(x[:, 35] - x[:, 31])
+        nose_height = np.abs(y[:, 2] - y[:, 9])
+        nose_ratio = nose_height / nose_width
+        nose = {
+            "score": dart_clamp(100 - np.abs(nose_ratio - 1.2) * 40, 50.0, 100.0),
+            "width": nose_width,
+            "height": nose_height,
+            "ratio": nose_ratio,
+        }
+
+        # 입술: 너비 / 높이가 3에 가까울수록 높음
+        lip_width = np.abs(x[:, 291] - x[:, 61])
+        lip_height = np.abs(y[:, 18] - y[:, 13])
+        lip_ratio = lip_width / lip_height
+        lip = {
+            "score": dart_clamp(100 - np.abs(lip_ratio - 3.0) * 20, 50.0, 100.0),
+            "width": lip_width,
+            "height": lip_height,
+            "ratio": lip_ratio,
+        }
+
+    # 턱선: 좌우 하악각 평균과 턱목각으로 리프팅 점수
+    gonial_angle = (jaw_angle(points[:, 172], points[:, 150]) + jaw_angle(points[:, 397], points[:, 379])) / 2
+    chin = points[:, 152]
+    neck_front = points[:, 18]
+    neck_bottom = np.stack([chin[:, 0], chin[:, 1] + np.abs(chin[:, 1] - neck_front[:, 1]) * 1.5], axis=1)
+    cervico_mental_angle = angle_between(neck_bottom - chin, neck_front - chin)
+    jaw_valid = ~(np.isnan(gonial_angle) | np.isnan(cervico_mental_angle))
+    lifting = lifting_score(gonial_angle, cervico_mental_angle)
+    jaw = {
+        "score": np.where(jaw_valid, dart_clamp(lifting, 50.0, 100.0), DEFAULT_SCORE),
+        "gonialAngle": gonial_angle,
+        "cervicoMentalAngle": cervico_mental_angle,
+        "liftingScore": lifting,
+        "valid": jaw_valid,
+    }
+
+    # Dart와 같은 순서로 더해서 부동소수점 결과까지 맞춤
+    component_scores = [
+        vertical["score"], horizontal["score"], lower_face["score"], symmetry,
+        eye["score"], nose["score"], lip["score"], jaw["score"]
+    ]
+    overall = sum(score * weight for score, weight in zip(component_scores, OVERALL_WEIGHTS))
+    overall = dart_clamp(overall, 50.0, 100.0)
+
+    return {
+        "overallScore": overall,
+        "verticalScore": vertical,
+        "horizontalScore": horizontal,
+        "lowerFaceScore": lower_face,
+        "symmetry": symmetry,
+        "eyeScore": eye,
+        "noseScore": nose,
+        "lipScore": lip,
+        "jawScore": jaw,
+    }
+
+
+def score_landmarks(landmarks: np.ndarray) -> List[Dict[str, Any]]:
+    """(얼굴 수, N, 2) 랜드마크 배열을 얼굴별 분석 결과 dict로 변환
+
+    dict 구조는 Dart calculateBeautyAnalysis 결과와 같아서 GPT 분석 엔드포인트에 그대로 보낼 수 있다.
+    """
+    points = np.asarray(landmarks, dtype=np.float64)
+    if points.ndim == 2:
+        points = points[np.newaxis]
+    if len(points) == 0:
+        return []
+    if points.shape[1] < MIN_LANDMARKS:
+        raise ValueError(f"랜드마크가 {MIN_LANDMARKS}개 이상 필요합니다 (현재 {points.shape[1]}개)")
+
+    metrics = compute_beauty_metrics(points)
+    timestamp = datetime.now().isoformat()
+
+    vertical = metrics["verticalScore"]
+    horizontal = metrics["horizontalScore"]
+    lower_face = metrics["lowerFaceScore"]
+    eye = metrics["eyeScore"]
+    nose = metrics["noseScore"]
+    lip = metrics["lipScore"]
+    jaw = metrics["jawScore"]
+
+    results = []
+    for i in range(len(points)):
+        if jaw["valid"][i]:
+            jaw_result = {
+                "score": json_number(jaw["score"][i]),
+                "gonialAngle": json_number(jaw["gonialAngle"][i]),
+                "cervicoMentalAngle": json_number(jaw["cervicoMentalAngle"][i]),
+                "liftingScore": json_number(jaw["liftingScore"][i]),
+            }
+        else:
+            jaw_result = {"score": DEFAULT_SCORE}
+
+        results.append({
+            "overallScore": json_number(metrics["overallScore"][i]),
+            "verticalScore": {
+                "score": json_number(vertical["score"][i]),
+                "percentages": [json_number(value) for value in vertical["percentages"][i]],
+                "totalDeviation": json_number(vertical["totalDeviation"][i]),
+                "sections": vertical["percentages"].shape[1],
+            },
+            "horizontalScore": section_result(horizontal, i),
+            "lowerFaceScore": section_result(lower_face, i),
+            "symmetry": json_number(metrics["symmetry"][i]),
+            "eyeScore": {key: json_number(values[i]) for key, values in eye.items()},
+            "noseScore": {key: json_number(values[i]) for key, values in nose.items()},
+            "lipScore": {key: json_number(values[i]) for key, values in lip.items()},
+            "jawScore": jaw_result,
+            "analysisTimestamp": timestamp,
+        })
+    return results
+
+
+def section_result(section: Dict[str, np.ndarray], i: int) -> Dict[str, Optional[float]]:
+    """두 구간 비율 지표의 i번째 얼굴 결과"""
+    return {
+        "score": json_number(section["score"][i]),
+        "upperPercentage": json_number(section["upperPercentage"][i]),
+        "lowerPercentage": json_number(section["lowerPercentage"][i]),
+        "deviation": json_number(section["deviation"][i]),
+    }
+
@@ -0,0 +1,543 @@
+#!/usr/bin/env python3
+"""
+워핑 연산 / API 벤치마크
+
+시드를 고정한 합성 이미지와 합성 얼굴 랜드마크로 매번 같은 입력을 만들어 측정한다.
+
+- warp: apply_warp(모든 모드 × 브러시 반경)와 apply_preset_transformation(모든 PRESET_CONFIGS × 합성 방식)을
+  이미지 크기별(기본 0.3MP ~ 48MP)로 실행해서 지연 시간 백분위수, 최대 메모리, 코어당 처리량을 보고
+- http: 서버(uvicorn)를 같은 프로세스에서 띄우고 가상 사용자들이 업로드 → 랜드마크 → 프리셋 → 워핑
+  → 뷰티 점수 → GPT 분석 흐름을 반복 (GPT 호출은 고정 응답을 돌려주는 스텁으로 대체)
+
+--save로 결과를 JSON으로 저장하고, --compare로 저장된 기준 결과와 비교해서
+p50 지연 시간이나 최대 메모리가 --tolerance 이상 늘어난 항목이 있으면 종료 코드 1로 끝난다.
+
+사용 예:
+    python benchmark.py warp --sizes 0.3,2,12 --save baseline.json
+    python benchmark.py warp --sizes 0.3,2,12 --compare baseline.json
+    python benchmark.py http --users 8 --sessions 5 --gpt-latency-ms 300
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import math
+import os
+import platform
+import socket
+import sys
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# main을 import하기 전에 설정: 디스크/SQLite 파일을 남기지 않고, 실제 OpenAI 키 없이 실행
+os.environ.setdefault("IMAGE_STORE_BACKEND", "memory")
+os.environ.setdefault("LINEAGE_DB_PATH", ":memory:")
+os.environ.setdefault("GPT_CACHE_PATH", ":memory:")
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+WARP_MODES = ("pull", "push", "expand", "shrink")
+DEFAULT_SIZES = "0.3,2,12,48"
+DEFAULT_RADII = "40,80,160,320"
+LANDMARK_COUNT = 468
+SEED = 1234
+
+# 합성 얼굴의 주요 랜드마크 (양쪽 광대 234/447 중점 기준, 얼굴 너비로 정규화한 x, y)
+# 프리셋과 뷰티 점수가 사용하는 점만 고정하고 나머지는 얼굴 타원 안에 시드 고정 난수로 배치
+FACE_TEMPLATE = {
+    0: (0.02, 0.27), 1: (0.02, 0.15), 2: (0.02, 0.18), 4: (0.01, 0.11), 6: (0.01, -0.07),
+    9: (-0.00, -0.21), 10: (-0.00, -0.38), 13: (0.02, 0.31), 18: (0.02, 0.39), 31: (-0.36, -0.04),
+    33: (-0.33, -0.09), 34: (-0.49, -0.06), 35: (-0.41, -0.07), 56: (-0.16, -0.14), 61: (-0.18, 0.31),
+    133: (-0.12, -0.10), 150: (-0.28, 0.47), 152: (0.03, 0.56), 162: (-0.50, -0.14), 168: (0.00, -0.12),
+    172: (-0.39, 0.36), 190: (-0.11, -0.12), 215: (-0.43, 0.25), 234: (-0.49, 0.02), 243: (-0.10, -0.09),
+    263: (0.32, -0.12), 264: (0.49, -0.09), 286: (0.16, -0.15), 291: (0.21, 0.30), 359: (0.34, -0.12),
+    362: (0.13, -0.10), 368: (0.47, -0.16), 379: (0.33, 0.44), 397: (0.43, 0.33), 414: (0.12, -0.12),
+    435: (0.46, 0.22), 447: (0.49, -0.02), 463: (0.11, -0.10)
+}
+
+# GPT 스텁 응답 (분석 + --- 이후 실천 방법, parse_initial_beauty_analysis 형식)
+STUB_ANALYSIS = (
+    "전체적으로 균형 잡힌 얼굴입니다.\n\n"
+    "가로 비율 (82점)이 강점이고 하관 조화 (68점)는 개선 여지가 있습니다.\n"
+    "---\n"
+    "🎯 **개선 목표**: 하관 조화 68점 → 75점\n"
+    "💪 **운동/습관**: 매일 10분 턱선 스트레칭\n"
+    "🏥 **전문 관리**: 레이저 리프팅 (50만원, 레이저 300-500샷)\n"
+)
+
+
+# ---------------------------------------------------------------------------
+# 합성 입력
+# ---------------------------------------------------------------------------
+
+def image_size(megapixels: float) -> Tuple[int, int]:
+    """메가픽셀 수에 맞는 4:3 이미지 크기 (16의 배수)"""
+    width = int(round(math.sqrt(megapixels * 1e6 * 4 / 3) / 16)) * 16
+    height = int(round(width * 3 / 4 / 16)) * 16
+    return width, height
+
+
+def synthetic_image(width: int, height: int, seed: int = SEED) -> np.ndarray:
+    """시드 고정 합성 RGB 이미지 (저해상도 노이즈를 확대한 부드러운 질감 + 세밀한 노이즈)"""
+    rng = np.random.default_rng(seed)
+    coarse = rng.integers(0, 256, size=(48, 64, 3), dtype=np.uint8)
+    image = cv2.resize(coarse, (width, height), interpolation=cv2.INTER_CUBIC)
+    fine = rng.integers(-8, 9, size=(height, width, 1), dtype=np.int16)
+    return np.clip(image.astype(np.int16) + fine, 0, 255).astype(np.uint8)
+
+
+def synthetic_landmarks(width: int, height: int, seed: int = SEED) -> np.ndarray:
+    """이미지 중앙에 놓인 합성 얼굴 랜드마크 (468, 2) 픽셀 좌표"""
+    rng = np.random.default_rng(seed)
+    face_width = 0.45 * min(width, height)
+    center = np.array([width / 2, height / 2])
+
+    # 템플릿에 없는 점은 얼굴 타원(가로 반지름 0.45, 세로 반지름 0.55) 안에 배치
+    angle = rng.uniform(0, 2 * np.pi, LANDMARK_COUNT)
+    distance = np.sqrt(rng.uniform(0, 1, LANDMARK_COUNT))
+    normalized = np.stack([0.45 * distance * np.cos(angle), 0.55 * distance * np.sin(angle)], axis=1)
+    for index, point in FACE_TEMPLATE.items():
+        normalized[index] = point
+    return center + normalized * face_width
+
+
+# ---------------------------------------------------------------------------
+# 측정
+# ---------------------------------------------------------------------------
+
+@contextlib.contextmanager
+def quiet():
+    """측정 중 디버그 print 출력 숨김"""
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+def percentiles(latencies: List[float]) -> Dict[str, float]:
+    """지연 시간(초) 목록의 백분위수 (ms)"""
+    values = np.array(latencies) * 1000
+    return {
+        "count": len(values),
+        "p50_ms": round(float(np.percentile(values, 50)), 3),
+        "p90_ms": round(float(np.percentile(values, 90)), 3),
+        "p99_ms": round(float(np.percentile(values, 99)), 3),
+        "mean_ms": round(float(values.mean()), 3),
+    }
+
+
+def peak_memory_mb(fn: Callable[[], Any]) -> float:
+    """fn 한 번 실행하는 동안 새로 할당된 메모리의 최대치 (MB, numpy/OpenCV 배열 포함)"""
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+        fn()
+        return round((tracemalloc.get_traced_memory()[1] - baseline) / (1024 * 1024), 2)
+    finally:
+        tracemalloc.stop()
+
+
+def measure(fn: Callable[[], Any], repeat: int, warmup: int, threads: int) -> Dict[str, Any]:
+    """지연 시간 백분위수, 최대 메모리, 스레드 threads개로 동시에 돌렸을 때의 코어당 처리량"""
+    with quiet():
+        for _ in range(warmup):
+            fn()
+
+        latencies = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            fn()
+            latencies.append(time.perf_counter() - started)
+
+        peak_mb = peak_memory_mb(fn)
+
+        def worker():
+            for _ in range(repeat):
+                fn()
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            for future in [executor.submit(worker) for _ in range(threads)]:
+                future.result()
+        elapsed = time.perf_counter() - started
+
+    result = percentiles(latencies)
+    ops_per_sec = threads * repeat / elapsed
+    result.update({
+        "peak_mb": peak_mb,
+        "threads": threads,
+        "ops_per_sec": round(ops_per_sec, 2),
+        "ops_per_sec_per_core": round(ops_per_sec / min(threads, os.cpu_count() or 1), 2),
+    })
+    return result
+
+
+def max_rss_mb() -> Optional[float]:
+    """프로세스 최대 RSS (MB, resource 모듈이 없으면 None)"""
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux는 KB, macOS는 바이트 단위
+    return round(rss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def environment_info() -> Dict[str, Any]:
+    """비교할 때 같은 환경인지 확인하기 위한 실행 환경 정보"""
+    return {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "opencv": cv2.__version__,
+    }
+
+
+# ---------------------------------------------------------------------------
+# 워핑 연산 벤치마크
+# ---------------------------------------------------------------------------
+
+def warp_cases(sizes: List[float], radii: List[float]) -> List[Tuple[str, Callable[[], Any]]]:
+    """(이름, 실행 함수) 목록: 크기 × (워핑 모드 × 반경 + 프리셋 × 합성 방식)"""
+    from main import PRESET_CONFIGS, apply_preset_transformation
+    from warp_engine import COMPOSE_MODES, apply_warp
+
+    cases = []
+    for megapixels in sizes:
+        width, height = image_size(megapixels)
+        image = synthetic_image(width, height)
+        landmarks = synthetic_landmarks(width, height)
+        label = f"{megapixels:g}MP"
+        center_x, center_y = width / 2, height / 2
+
+        for mode in WARP_MODES:
+            for radius in radii:
+                def run(image=image, x=center_x, y=center_y, mode=mode, radius=radius):
+                    return apply_warp(image, x, y, x + radius * 0.5, y, radius, 1.0, mode)
+                cases.append((f"warp/{mode}/r{radius:g}/{label}", run))
+
+        for preset_type in PRESET_CONFIGS:
+            for compose_mode in COMPOSE_MODES:
+                def run(image=image, landmarks=landmarks, preset_type=preset_type, compose_mode=compose_mode):
+                    return apply_preset_transformation(image, landmarks, preset_type, compose_mode)
+                cases.append((f"preset/{preset_type}/{compose_mode}/{label}", run))
+    return cases
+
+
+def run_warp_benchmark(args) -> Dict[str, Any]:
+    sizes = [float(size) for size in args.sizes.split(",")]
+    radii = [float(radius) for radius in args.radii.split(",")]
+    cases = warp_cases(sizes, radii)
+    if args.filter:
+        cases = [(name, fn) for name, fn in cases if args.filter in name]
+
+    print(f"워핑 벤치마크: {len(cases)}개 항목, repeat={args.repeat}, threads={args.threads}")
+    print(f"{'항목':<40} {'p50':>9} {'p90':>9} {'p99':>9} {'peak MB':>9} {'ops/s/core':>11}")
+    results = {}
+    for name, fn in cases:
+        result = measure(fn, args.repeat, args.warmup, args.threads)
+        results[name] = result
+        print(f"{name:<40} {result['p50_ms']:>9.2f} {result['p90_ms']:>9.2f} {result['p99_ms']:>9.2f}"
+              f" {result['peak_mb']:>9.1f} {result['ops_per_sec_per_core']:>11.2f}")
+    return results
+
+
+# ---------------------------------------------------------------------------
+# HTTP 부하 시나리오
+# ---------------------------------------------------------------------------
+
+def install_gpt_stub(main_module, latency: float) -> Dict[str, int]:
+    """gpt_client의 complete/stream을 latency초 뒤 고정 응답을 돌려주는 스텁으로 교체"""
+    calls = {"complete": 0, "stream": 0}
+
+    async def complete(messages, max_tokens, temperature=0.7, model="gpt-4o-mini"):
+        calls["complete"] += 1
+        await asyncio.sleep(latency)
+        return STUB_ANALYSIS
+
+    async def stream(messages, max_tokens, temperature=0.7, model="gpt-4o-mini"):
+        calls["stream"] += 1
+        chunks = STUB_ANALYSIS.split("\n")
+        for chunk in chunks:
+            await asyncio.sleep(latency / len(chunks))
+            yield chunk + "\n"
+
+    main_module.gpt_client.complete = complete
+    main_module.gpt_client.stream = stream
+    return calls
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class ServerThread:
+    """백그라운드 스레드에서 실행하는 uvicorn 서버"""
+
+    def __init__(self, app, port: int):
+        import uvicorn
+        self.server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        while not self.server.started:
+            if not self.thread.is_alive():
+                raise RuntimeError("벤치마크 서버를 시작하지 못했습니다")
+            time.sleep(0.05)
+        return self
+
+    def __exit__(self, *exc):
+        self.server.should_exit = True
+        self.thread.join()
+
+
+class LoadRecorder:
+    """엔드포인트별 응답 시간과 상태 코드 기록"""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = {}
+        self.statuses: Dict[str, Dict[int, int]] = {}
+
+    async def request(self, client, endpoint: str, method: str, url: str, **kwargs):
+        started = time.perf_counter()
+        response = await client.request(method, url, **kwargs)
+        self.latencies.setdefault(endpoint, []).append(time.perf_counter() - started)
+        codes = self.statuses.setdefault(endpoint, {})
+        codes[response.status_code] = codes.get(response.status_code, 0) + 1
+        return response
+
+
+async def virtual_user(client, recorder: LoadRecorder, main_module, user: int, args,
+                       presets: List[str], compose_mode: str):
+    """한 사용자의 편집 흐름을 sessions번 반복"""
+    from image_cache import encode_jpeg
+    from landmark_store import LandmarkEntry, face_array, landmark_array
+
+    if args.face_image:
+        with open(args.face_image, "rb") as f:
+            jpeg_bytes = f.read()
+    else:
+        width, height = image_size(args.image_mp)
+        jpeg_bytes = encode_jpeg(synthetic_image(width, height, seed=SEED + user))
+
+    response = await recorder.request(
+        client, "POST /upload-image", "POST", "/upload-image",
+        files={"file": (f"user{user}.jpg", jpeg_bytes, "image/jpeg")}
+    )
+    response.raise_for_status()
+    uploaded = response.json()
+    image_id, width, height = uploaded["image_id"], uploaded["width"], uploaded["height"]
+
+    if not args.face_image:
+        # 합성 이미지에는 얼굴이 없으므로 합성 랜드마크를 미리 등록 (MediaPipe 검출 시간은 제외)
+        landmarks = landmark_array(synthetic_landmarks(width, height, seed=SEED + user))
+        main_module.landmark_store.put(image_id, LandmarkEntry(
+            landmarks=landmarks, image_width=width, image_height=height,
+            faces=face_array(landmarks, LANDMARK_COUNT)
+        ))
+
+    center_x, center_y = width / 2, height / 2
+    for session in range(args.sessions):
+        await recorder.request(client, "GET /landmarks", "GET", f"/landmarks/{image_id}")
+
+        response = await recorder.request(client, "POST /apply-preset", "POST", "/apply-preset", json={
+            "image_id": image_id,
+            "preset_type": presets[(user + session) % len(presets)],
+            "compose_mode": compose_mode
+        })
+        if response.status_code != 200:
+            continue
+        current_id = response.json()["image_id"]
+
+        for stroke, mode in enumerate(WARP_MODES):
+            response = await recorder.request(client, "POST /warp-image", "POST", "/warp-image", json={
+                "image_id": current_id,
+                "start_x": center_x + stroke * 10, "start_y": center_y,
+                "end_x": center_x + stroke * 10 + 20, "end_y": center_y + 10,
+                "influence_radius": 80.0, "strength": 1.0, "mode": mode
+            })
+            if response.status_code == 200:
+                current_id = response.json()["image_id"]
+
+        response = await recorder.request(client, "POST /beauty-score/batch", "POST", "/beauty-score/batch",
+                                          json={"image_ids": [current_id]})
+        if response.status_code != 200:
+            continue
+        result = response.json()["results"][0]
+        if "analysis" in result:
+            await recorder.request(client, "POST /analyze-initial-beauty-score", "POST",
+                                   "/analyze-initial-beauty-score",
+                                   json={"beauty_analysis": result["analysis"]})
+
+
+async def run_load(args, main_module, port: int) -> Tuple[LoadRecorder, float]:
+    import httpx
+
+    recorder = LoadRecorder()
+    presets = list(main_module.PRESET_CONFIGS)
+    limits = httpx.Limits(max_connections=args.users, max_keepalive_connections=args.users)
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=120.0, limits=limits) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(
+            virtual_user(client, recorder, main_module, user, args, presets, args.compose_mode)
+            for user in range(args.users)
+        ))
+        elapsed = time.perf_counter() - started
+    return recorder, elapsed
+
+
+def run_http_benchmark(args) -> Dict[str, Any]:
+    import main as main_module
+
+    gpt_calls = install_gpt_stub(main_module, args.gpt_latency_ms / 1000)
+    port = free_port()
+    source = args.face_image or f"합성 {args.image_mp:g}MP"
+    print(f"HTTP 부하 시나리오: 사용자 {args.users}명 × {args.sessions}회, 이미지 {source}, "
+          f"GPT 스텁 지연 {args.gpt_latency_ms:g}ms, 워커 {main_module.WORKER_POOL_SIZE}개")
+
+    with quiet(), ServerThread(main_module.app, port):
+        recorder, elapsed = asyncio.run(run_load(args, main_module, port))
+
+    cores = os.cpu_count() or 1
+    print(f"{'엔드포인트':<36} {'요청':>6} {'오류':>6} {'p50':>9} {'p90':>9} {'p99':>9} {'req/s':>8}")
+    results = {}
+    for endpoint, latencies in recorder.latencies.items():
+        errors = sum(count for code, count in recorder.statuses[endpoint].items() if code >= 400)
+        result = percentiles(latencies)
+        result.update({
+            "errors": errors,
+            "statuses": {str(code): count for code, count in sorted(recorder.statuses[endpoint].items())},
+            "ops_per_sec": round(len(latencies) / elapsed, 2),
+            "ops_per_sec_per_core": round(len(latencies) / elapsed / cores, 2),
+        })
+        results[f"http/{endpoint}"] = result
+        print(f"{endpoint:<36} {result['count']:>6} {errors:>6} {result['p50_ms']:>9.2f}"
+              f" {result['p90_ms']:>9.2f} {result['p99_ms']:>9.2f} {result['ops_per_sec']:>8.2f}")
+
+    total = sum(len(latencies) for latencies in recorder.latencies.values())
+    print(f"전체 {total}개 요청, {elapsed:.2f}초, {total / elapsed:.2f} req/s ({total / elapsed / cores:.2f} req/s/core), "
+          f"GPT 스텁 호출 {gpt_calls['complete'] + gpt_calls['stream']}회")
+    print(f"워커 풀: {main_module.worker_pool.stats()}")
+    return results
+
+
+# ---------------------------------------------------------------------------
+# 기준 결과 저장 / 비교
+# ---------------------------------------------------------------------------
+
+def save_results(path: str, kind: str, results: Dict[str, Any], args):
+    report = {
+        "kind": kind,
+        "environment": environment_info(),
+        "arguments": {key: value for key, value in vars(args).items() if key not in ("save", "compare", "func")},
+        "max_rss_mb": max_rss_mb(),
+        "results": results,
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"결과 저장: {path}")
+
+
+def compare_results(path: str, results: Dict[str, Any], tolerance: float) -> List[str]:
+    """기준 결과 대비 p50 지연 시간 / 최대 메모리가 tolerance 비율 이상 늘어난 항목 목록"""
+    with open(path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+
+    environment = environment_info()
+    for key in ("machine", "cpu_count", "numpy", "opencv"):
+        if baseline["environment"].get(key) != environment[key]:
+            print(f"⚠️ 기준 결과와 실행 환경이 다릅니다 ({key}: {baseline['environment'].get(key)} → {environment[key]})")
+
+    print(f"\n기준 결과 비교: {path} (허용 {tolerance:.0%})")
+    print(f"{'항목':<40} {'p50 기준':>10} {'p50 현재':>10} {'변화':>8} {'peak 변화':>10}")
+    regressions = []
+    for name, current in results.items():
+        previous = baseline["results"].get(name)
+        if previous is None:
+            continue
+
+        # 0.1ms 미만 차이는 타이머 잡음으로 보고 무시
+        latency_change = 0.0
+        if current["p50_ms"] - previous["p50_ms"] > 0.1:
+            latency_change = current["p50_ms"] / max(previous["p50_ms"], 1e-9) - 1
+        memory_change = None
+        if "peak_mb" in current and "peak_mb" in previous:
+            # 1MB 미만 차이는 잡음으로 보고 무시
+            if current["peak_mb"] - previous["peak_mb"] > 1.0:
+                memory_change = current["peak_mb"] / max(previous["peak_mb"], 1e-9) - 1
+            else:
+                memory_change = 0.0
+
+        regressed = latency_change > tolerance or (memory_change is not None and memory_change > tolerance)
+        if regressed:
+            regressions.append(name)
+        memory_text = "-" if memory_change is None else f"{memory_change:+.0%}"
+        print(f"{name:<40} {previous['p50_ms']:>10.2f} {current['p50_ms']:>10.2f} {latency_change:>+8.0%}"
+              f" {memory_text:>10}{'  ❌ 회귀' if regressed else ''}")
+
+    missing = [name for name in baseline["results"] if name not in results]
+    if missing:
+        print(f"기준 결과에만 있는 항목 {len(missing)}개 (이번 실행에서 제외됨)")
+    return regressions
+
+
+def main_cli(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="워핑 연산 / API 벤치마크")
+    subparsers = parser.add_subparsers(dest="kind", required=True)
+
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--save", help="결과를 JSON 파일로 저장")
+    common.add_argument("--compare", help="저장된 기준 결과 JSON과 비교 (회귀가 있으면 종료 코드 1)")
+    common.add_argument("--tolerance", type=float, default=0.2, help="회귀로 판단할 증가 비율 (기본 0.2 = 20%%)")
+
+    warp = subparsers.add_parser("warp", parents=[common], help="apply_warp / apply_preset_transformation 측정")
+    warp.add_argument("--sizes", default=DEFAULT_SIZES, help=f"이미지 크기 (MP, 쉼표 구분, 기본 {DEFAULT_SIZES})")
+    warp.add_argument("--radii", default=DEFAULT_RADII, help=f"브러시 반경 (px, 쉼표 구분, 기본 {DEFAULT_RADII})")
+    warp.add_argument("--repeat", type=int, default=20, help="항목별 측정 횟수")
+    warp.add_argument("--warmup", type=int, default=2, help="측정 전 예열 횟수")
+    warp.add_argument("--threads", type=int, default=os.cpu_count() or 1, help="처리량 측정 스레드 수")
+    warp.add_argument("--filter", help="이름에 이 문자열이 포함된 항목만 실행 (예: preset/, /12MP)")
+    warp.set_defaults(func=run_warp_benchmark)
+
+    http = subparsers.add_parser("http", parents=[common], help="FastAPI 앱 부하 시나리오 (GPT 스텁)")
+    http.add_argument("--users", type=int, default=8, help="동시 가상 사용자 수")
+    http.add_argument("--sessions", type=int, default=5, help="사용자별 편집 흐름 반복 횟수")
+    http.add_argument("--image-mp", type=float, default=2.0, help="업로드 이미지 크기 (MP)")
+    http.add_argument("--compose-mode", default="exact", help="프리셋 합성 방식")
+    http.add_argument("--gpt-latency-ms", type=float, default=300.0, help="GPT 스텁 응답 지연 (ms)")
+    http.add_argument("--face-image",
+                      help="합성 이미지 대신 업로드할 얼굴 사진 (랜드마크를 서버에서 MediaPipe로 검출)")
+    http.set_defaults(func=run_http_benchmark)
+
+    args = parser.parse_args(argv)
+    results = args.func(args)
+
+    if args.save:
+        save_results(args.save, args.kind, results, args)
+    print(f"프로세스 최대 RSS: {max_rss_mb()} MB")
+
+    if args.compare:
+        regressions = compare_results(args.compare, results, args.tolerance)
+        if regressions:
+            print(f"\n❌ 성능 회귀 {len(regressions)}개 항목")
+            return 1
+        print("\n✅ 성능 회귀 없음")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
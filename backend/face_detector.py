@@ -0,0 +1,328 @@
+"""
+단계별(tiered) 얼굴 랜드마크 검출
+
+1. fast: 긴 변을 fast_max_side로 줄인 이미지 전체에 가벼운 FaceMesh(refine 없음, 얼굴 최대 2개).
+   얼굴이 하나이고 검출 점수가 fast_min_score 이상이면 그대로 사용한다 (셀카는 거의 항상 여기서 끝남).
+   두 번째 얼굴 슬롯은 단체 사진인지 확인하는 용도다. 메시 모델은 찾은 얼굴마다 돌기 때문에
+   얼굴이 하나인 사진은 단일 얼굴 설정과 비용이 같다.
+2. crop: 얼굴이 없거나, 점수가 낮거나, 얼굴이 여러 개면 두 번에 나눠 검출한다.
+   축소 이미지에서 얼굴 위치만 찾고(full-range 모델), 얼굴마다 경계 박스를 crop_scale배로 넓힌 영역을
+   원본 해상도에서 잘라 FaceMesh를 돌린 뒤 랜드마크를 전체 이미지 좌표로 되돌린다.
+3. full: crop 단계에서 얼굴을 하나도 확인하지 못했거나, fast 단계에서 본 얼굴 수보다 적게 확인하면 원본 이미지 전체에 FaceMesh(얼굴 최대 10개).
+   긴 변이 crop_max_side 이하인 작은 이미지는 잘라도 해상도 이득이 없으므로 crop 단계 없이 바로 full로 간다.
+
+FaceMesh 안의 얼굴 검출기(short-range)는 전체 이미지를 128x128로 줄여서 보므로 큰 사진에서 얼굴이
+이미지의 15% 정도만 돼도 찾지 못한다. crop 단계에서는 잘라낸 영역에서 얼굴이 크게 보이므로 메시가 안정적으로 돌고,
+전체 이미지를 MediaPipe에 넘기지 않아서 큰 사진의 색 변환/복사 비용도 얼굴 영역 크기로 줄어든다.
+메시 모델 입력은 192x192이므로 긴 변이 crop_max_side를 넘는 영역(이미 얼굴이 충분히 큰 경우)만 그 크기로 줄인다.
+잘라낸 영역에서 메시가 다시 확인하지 못한 검출은 버린다.
+
+홍채 랜드마크(468~477)가 필요한 요청(iris)만 refine_landmarks로 검출한다 (478점, 아니면 468점).
+tiered=False면 항상 원본 해상도 + 얼굴 10개 + refine으로 검출한다 (기존 동작).
+"""
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+import cv2
+import numpy as np
+from mediapipe.python.solution_base import SolutionBase
+from mediapipe.python.solutions import face_detection as mp_face_detection
+from mediapipe.python.solutions import face_mesh as mp_face_mesh
+
+logger = logging.getLogger(__name__)
+
+TIER_FAST = "fast"
+TIER_CROP = "crop"
+TIER_FULL = "full"
+TIERS = (TIER_FAST, TIER_CROP, TIER_FULL)
+
+# refine_landmarks를 켜면 기본 468점에 홍채 10점이 추가됨
+IRIS_LANDMARK_COUNT = 478
+
+# fast 단계에서 찾는 얼굴 수 (2개 이상이면 crop 단계로)
+FAST_MAX_FACES = 2
+
+# 잘라낸 영역에서 찾는 얼굴 수 (이웃 얼굴이 걸쳐도 대상 얼굴을 고를 수 있도록 2개)
+CROP_MAX_FACES = 2
+
+# 얼굴 위치 검출 모델 (1: full-range, 5m 이내의 작은 얼굴까지)
+DETECTION_MODEL = 1
+
+# mediapipe FaceMesh와 같은 그래프 파라미터 이름
+# ScoredFaceMesh는 공개 API가 아닌 FaceMesh 그래프 경로/계산기 이름에 의존하므로
+# requirements.txt에서 mediapipe 버전을 고정한다 (올릴 때는 이 이름들이 그대로인지 확인)
+_DETECTION_SCORE_PARAM = (
+    "facedetectionshortrangecpu__facedetectionshortrange__facedetection__"
+    "TensorsToDetectionsCalculator.min_score_thresh"
+)
+_PRESENCE_SCORE_PARAM = "facelandmarkcpu__ThresholdingCalculator.threshold"
+
+
+class ScoredFaceMesh(SolutionBase):
+    """mp.solutions.face_mesh.FaceMesh와 같은 그래프에서 얼굴 검출 점수(face_detections)도 함께 받는 버전"""
+
+    def __init__(self, max_num_faces: int, refine_landmarks: bool, min_detection_confidence: float):
+        super().__init__(
+            binary_graph_path=mp_face_mesh._BINARYPB_FILE_PATH,
+            side_inputs={
+                "num_faces": max_num_faces,
+                "with_attention": refine_landmarks,
+                "use_prev_landmarks": False,  # static_image_mode=True
+            },
+            calculator_params={
+                _DETECTION_SCORE_PARAM: min_detection_confidence,
+                _PRESENCE_SCORE_PARAM: 0.5,  # FaceMesh 기본 min_tracking_confidence
+            },
+            outputs=["multi_face_landmarks", "face_detections"]
+        )
+
+    def process(self, image: np.ndarray):
+        return super().process(input_data={"image": image})
+
+
+@dataclass(frozen=True)
+class FaceDetection:
+    faces: np.ndarray  # (얼굴 수, 468 또는 478, 3) 정규화 좌표
+    tier: str          # 결과를 낸 단계 (fast | crop | full)
+    seconds: float     # 모든 단계를 합친 검출 시간
+
+
+class TieredFaceDetector:
+    """단계별 FaceMesh 검출기 (MediaPipe 그래프는 동시 호출에 안전하지 않으므로 스레드마다 인스턴스 생성)"""
+
+    def __init__(self, tiered: bool, fast_max_side: int, fast_min_score: float, crop_scale: float,
+                 crop_max_side: int, max_faces: int = 10, min_detection_confidence: float = 0.5):
+        self.tiered = tiered
+        self.fast_max_side = fast_max_side
+        self.fast_min_score = fast_min_score
+        self.crop_scale = crop_scale
+        self.crop_max_side = crop_max_side
+        self.max_faces = max_faces
+        self.min_detection_confidence = min_detection_confidence
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+        self.tier_calls = {tier: 0 for tier in TIERS}
+        self.tier_seconds = {tier: 0.0 for tier in TIERS}
+        self.crop_stage_seconds = {"detect": 0.0, "mesh": 0.0}
+        # fast → 다음 단계: no_face, low_score, multiple_faces
+        # crop → full: crop_no_face, crop_unconfirmed, crop_fewer_faces (fast 단계보다 적게 확인)
+        self.escalations = {
+            "no_face": 0, "low_score": 0, "multiple_faces": 0,
+            "crop_no_face": 0, "crop_unconfirmed": 0, "crop_fewer_faces": 0
+        }
+        self.unconfirmed = 0
+
+    def _mesh(self, max_faces: int, refine: bool) -> ScoredFaceMesh:
+        """현재 스레드 전용 FaceMesh (설정별로 하나씩)"""
+        meshes = getattr(self._local, "meshes", None)
+        if meshes is None:
+            meshes = self._local.meshes = {}
+        key = (max_faces, refine)
+        mesh = meshes.get(key)
+        if mesh is None:
+            mesh = meshes[key] = ScoredFaceMesh(max_faces, refine, self.min_detection_confidence)
+        return mesh
+
+    def _face_detection(self):
+        """현재 스레드 전용 얼굴 위치 검출기"""
+        detector = getattr(self._local, "face_detection", None)
+        if detector is None:
+            detector = self._local.face_detection = mp_face_detection.FaceDetection(
+                min_detection_confidence=self.min_detection_confidence,
+                model_selection=DETECTION_MODEL
+            )
+        return detector
+
+    def _record_tier(self, tier: str, seconds: float):
+        with self._lock:
+            self.tier_calls[tier] += 1
+            self.tier_seconds[tier] += seconds
+
+    def _escalate(self, reason: str):
+        with self._lock:
+            self.escalations[reason] += 1
+
+    def _detect_boxes(self, image_rgb: np.ndarray) -> np.ndarray:
+        """축소 이미지에서 얼굴 검출 → 점수 높은 순 정규화 경계 박스 (얼굴 수, 4)"""
+        small = reduce_for_detection(image_rgb, self.fast_max_side)
+        detections = self._face_detection().process(small).detections or []
+        detections = sorted(detections, key=lambda detection: -detection.score[0])[:self.max_faces]
+
+        boxes = np.array([
+            (box.xmin, box.ymin, box.xmin + box.width, box.ymin + box.height)
+            for box in (detection.location_data.relative_bounding_box for detection in detections)
+        ], dtype=np.float64).reshape(-1, 4)
+        return boxes
+
+    def _crop_mesh(self, image_rgb: np.ndarray, box: np.ndarray, refine: bool) -> Optional[np.ndarray]:
+        """경계 박스를 넓힌 원본 해상도 영역에서 FaceMesh 실행 → 전체 이미지 기준 정규화 좌표 (못 찾으면 None)"""
+        img_height, img_width = image_rgb.shape[:2]
+        x0, y0, x1, y1 = crop_region(box, img_width, img_height, self.crop_scale)
+        if x1 - x0 < 2 or y1 - y0 < 2:
+            return None
+
+        crop = image_rgb[y0:y1, x0:x1]
+        if self.crop_max_side > 0 and max(x1 - x0, y1 - y0) > self.crop_max_side:
+            # 정규화 좌표로 받으므로 축소해도 되돌리는 식은 같음
+            crop = reduce_for_detection(crop, self.crop_max_side)
+        crop = np.ascontiguousarray(crop)
+        faces = face_landmark_array(self._mesh(CROP_MAX_FACES, refine).process(crop).multi_face_landmarks)
+        if len(faces) == 0:
+            return None
+
+        # 잘라낸 영역 좌표 → 전체 이미지 정규화 좌표 (z는 x와 같은 배율)
+        crop_width, crop_height = x1 - x0, y1 - y0
+        faces = faces * (crop_width / img_width, crop_height / img_height, crop_width / img_width)
+        faces[:, :, 0] += x0 / img_width
+        faces[:, :, 1] += y0 / img_height
+
+        # 이웃 얼굴이 함께 잡혔으면 검출 박스 중심에 가장 가까운 얼굴
+        centers = faces[:, :, :2].mean(axis=1)
+        distances = np.hypot(centers[:, 0] - (box[0] + box[2]) / 2, centers[:, 1] - (box[1] + box[3]) / 2)
+        nearest = int(np.argmin(distances))
+
+        # 메시 중심이 검출 박스 밖이면 다른 얼굴을 잡은 것 (잘못된 검출 옆의 진짜 얼굴이 중복되지 않도록)
+        center_x, center_y = centers[nearest]
+        if not (box[0] <= center_x <= box[2] and box[1] <= center_y <= box[3]):
+            return None
+        return faces[nearest]
+
+    def detect(self, image_rgb: np.ndarray, iris: bool = False) -> FaceDetection:
+        """얼굴 랜드마크 검출 (필요할 때만 다음 단계로)"""
+        if not self.tiered:
+            faces, elapsed = self._detect_full(image_rgb, True)
+            return FaceDetection(faces, TIER_FULL, elapsed)
+
+        fast_faces, accepted, total = self._detect_fast(image_rgb, iris)
+        if accepted:
+            return FaceDetection(fast_faces, TIER_FAST, total)
+
+        # 이미지 전체가 잘라낼 영역보다 작으면 crop 단계는 전체 이미지 검출과 해상도가 같으므로 건너뜀
+        if max(image_rgb.shape[:2]) > self.crop_max_side > 0:
+            # fast 단계에서 본 얼굴보다 적게 확인되면 얼굴을 놓친 것이므로 full 단계로
+            faces, elapsed = self._detect_crops(image_rgb, iris, min_faces=len(fast_faces))
+            total += elapsed
+            if faces is not None:
+                return FaceDetection(faces, TIER_CROP, total)
+
+        faces, elapsed = self._detect_full(image_rgb, iris)
+        total += elapsed
+        logger.debug("얼굴 검출 [full] %.1fms, 전체 %.1fms (얼굴 %d개)", elapsed * 1000, total * 1000, len(faces))
+        return FaceDetection(faces, TIER_FULL, total)
+
+    def _detect_fast(self, image_rgb: np.ndarray, refine: bool) -> Tuple[np.ndarray, bool, float]:
+        """축소 이미지 전체에 FaceMesh → (찾은 얼굴 정규화 좌표, 얼굴이 하나이고 점수가 충분해서 그대로 쓸지, 걸린 시간)"""
+        started = time.perf_counter()
+        small = reduce_for_detection(image_rgb, self.fast_max_side)
+        results = self._mesh(FAST_MAX_FACES, refine).process(small)
+        faces = face_landmark_array(results.multi_face_landmarks)
+        scores = [detection.score[0] for detection in results.face_detections or [] if detection.score]
+        elapsed = time.perf_counter() - started
+        self._record_tier(TIER_FAST, elapsed)
+
+        if len(faces) == 0:
+            self._escalate("no_face")
+        elif max(scores, default=0.0) < self.fast_min_score:
+            self._escalate("low_score")
+        elif len(faces) > 1:
+            self._escalate("multiple_faces")
+        else:
+            logger.debug("얼굴 검출 [fast] %.1fms (점수 %.3f)", elapsed * 1000, max(scores))
+            return faces, True, elapsed
+        return faces, False, elapsed
+
+    def _detect_crops(self, image_rgb: np.ndarray, refine: bool,
+                      min_faces: int = 1) -> Tuple[Optional[np.ndarray], float]:
+        """축소 이미지에서 얼굴 위치 검출 후 얼굴 영역마다 원본 해상도 FaceMesh
+        → (확인된 얼굴, min_faces개보다 적으면 None), 걸린 시간"""
+        started = time.perf_counter()
+        boxes = self._detect_boxes(image_rgb)
+        detected = time.perf_counter()
+
+        meshes = [self._crop_mesh(image_rgb, box, refine) for box in boxes]
+        faces = [face for face in meshes if face is not None]
+        finished = time.perf_counter()
+        elapsed = finished - started
+        self._record_tier(TIER_CROP, elapsed)
+        with self._lock:
+            self.crop_stage_seconds["detect"] += detected - started
+            self.crop_stage_seconds["mesh"] += finished - detected
+            self.unconfirmed += len(meshes) - len(faces)
+
+        if not faces:
+            self._escalate("crop_no_face" if len(boxes) == 0 else "crop_unconfirmed")
+            return None, elapsed
+        if len(faces) < min_faces:
+            self._escalate("crop_fewer_faces")
+            return None, elapsed
+
+        logger.debug("얼굴 검출 [crop] %.1fms (검출 %.1fms, 메시 %.1fms, 얼굴 %d/%d개)",
+                     elapsed * 1000, (detected - started) * 1000, (finished - detected) * 1000,
+                     len(faces), len(meshes))
+        return np.stack(faces), elapsed
+
+    def _detect_full(self, image_rgb: np.ndarray, refine: bool) -> Tuple[np.ndarray, float]:
+        """원본 이미지 전체에 FaceMesh → (정규화 좌표, 걸린 시간)"""
+        started = time.perf_counter()
+        results = self._mesh(self.max_faces, refine).process(image_rgb)
+        faces = face_landmark_array(results.multi_face_landmarks)
+        elapsed = time.perf_counter() - started
+        self._record_tier(TIER_FULL, elapsed)
+        return faces, elapsed
+
+    def stats(self) -> Dict[str, Any]:
+        """단계별 호출 수, 평균 시간 및 다음 단계로 넘어간 이유별 횟수"""
+        with self._lock:
+            return {
+                "tiered": self.tiered,
+                "fast_max_side": self.fast_max_side,
+                "fast_min_score": self.fast_min_score,
+                "crop_scale": self.crop_scale,
+                "crop_max_side": self.crop_max_side,
+                "tiers": {
+                    tier: {
+                        "calls": calls,
+                        "seconds": round(self.tier_seconds[tier], 3),
+                        "avg_ms": round(self.tier_seconds[tier] / calls * 1000, 2) if calls else 0.0,
+                    }
+                    for tier, calls in self.tier_calls.items()
+                },
+                "crop_stage_seconds": {stage: round(seconds, 3) for stage, seconds in self.crop_stage_seconds.items()},
+                "escalations": dict(self.escalations),
+                "unconfirmed_detections": self.unconfirmed,
+            }
+
+
+def reduce_for_detection(image_rgb: np.ndarray, max_side: int) -> np.ndarray:
+    """긴 변이 max_side보다 크면 축소 (검출 입력 전용이라 INTER_AREA 대신 빠른 선형 보간)"""
+    img_height, img_width = image_rgb.shape[:2]
+    long_side = max(img_width, img_height)
+    if max_side <= 0 or long_side <= max_side:
+        return image_rgb
+    scale = max_side / long_side
+    size = (max(1, round(img_width * scale)), max(1, round(img_height * scale)))
+    return cv2.resize(image_rgb, size, interpolation=cv2.INTER_LINEAR)
+
+
+def crop_region(box: np.ndarray, img_width: int, img_height: int, scale: float) -> Tuple[int, int, int, int]:
+    """정규화 경계 박스를 긴 변 기준 정사각형으로 scale배 넓힌 픽셀 영역 (이미지 안으로 자름)"""
+    center_x = (box[0] + box[2]) / 2 * img_width
+    center_y = (box[1] + box[3]) / 2 * img_height
+    half = max((box[2] - box[0]) * img_width, (box[3] - box[1]) * img_height) * scale / 2
+    return (max(0, int(center_x - half)), max(0, int(center_y - half)),
+            min(img_width, int(np.ceil(center_x + half))), min(img_height, int(np.ceil(center_y + half))))
+
+
+def face_landmark_array(multi_face_landmarks) -> np.ndarray:
+    """MediaPipe 검출 결과를 (얼굴 수, 점 개수, 3) 정규화 좌표 배열로 한 번에 변환"""
+    if not multi_face_landmarks:
+        return np.empty((0, 0, 3), dtype=np.float64)
+
+    points = [(landmark.x, landmark.y, landmark.z)
+              for face_landmarks in multi_face_landmarks
+              for landmark in face_landmarks.landmark]
+    return np.array(points, dtype=np.float64).reshape(len(multi_face_landmarks), -1, 3)
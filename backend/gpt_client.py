@@ -0,0 +1,131 @@
+"""
+비동기 GPT 호출 클라이언트
+
+AsyncOpenAI + 커넥션 풀로 이벤트 루프를 막지 않고 호출하며,
+동시 호출 수 제한, 타임아웃, 동일 프롬프트의 동시 요청 병합(in-flight dedup),
+스트리밍 응답을 제공한다.
+OPENAI_BASE_URL을 로컬 스텁 서버로 지정하거나 transport(httpx.MockTransport 등)를 넘기면
+실제 API 없이 테스트할 수 있다.
+"""
+import asyncio
+import hashlib
+import json
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import httpx
+import openai
+
+
+class GPTClient:
+    """동시 호출 제한과 요청 병합을 지원하는 비동기 GPT 클라이언트"""
+
+    def __init__(self, api_key: Optional[str], base_url: Optional[str] = None,
+                 max_concurrency: int = 8, timeout: float = 30.0,
+                 max_connections: int = 20, max_retries: int = 1,
+                 transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.max_retries = max_retries
+        self.transport = transport  # 테스트용 스텁 (None이면 실제 네트워크)
+
+        self._client: Optional[openai.AsyncOpenAI] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._inflight: Dict[str, "asyncio.Future[str]"] = {}
+
+        self.calls = 0
+        self.deduplicated = 0
+        self.failures = 0
+
+    def _get_client(self) -> openai.AsyncOpenAI:
+        # 실행 중인 이벤트 루프에서 처음 사용할 때 생성
+        if self._client is None:
+            self._client = openai.AsyncOpenAI(
+                api_key=self.api_key,
+                base_url=self.base_url,
+                timeout=self.timeout,
+                max_retries=self.max_retries,
+                http_client=openai.DefaultAsyncHttpxClient(
+                    transport=self.transport,
+                    limits=httpx.Limits(
+                        max_connections=self.max_connections,
+                        max_keepalive_connections=self.max_connections
+                    )
+                )
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._client
+
+    async def complete(self, messages: List[Dict[str, str]], max_tokens: int,
+                       temperature: float = 0.7, model: str = "gpt-4o-mini") -> str:
+        """채팅 완성 텍스트 반환 (같은 요청이 진행 중이면 그 결과를 공유)"""
+        key = hashlib.sha256(json.dumps(
+            [model, messages, max_tokens, temperature], ensure_ascii=False, sort_keys=True
+        ).encode("utf-8")).hexdigest()
+
+        future = self._inflight.get(key)
+        if future is not None:
+            self.deduplicated += 1
+        else:
+            future = asyncio.ensure_future(self._create(messages, max_tokens, temperature, model))
+            self._inflight[key] = future
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+
+        # 한 요청이 취소되어도 같은 호출을 기다리는 다른 요청에는 영향이 없도록 보호
+        return await asyncio.shield(future)
+
+    async def _create(self, messages: List[Dict[str, str]], max_tokens: int,
+                      temperature: float, model: str) -> str:
+        client = self._get_client()
+        async with self._semaphore:
+            self.calls += 1
+            try:
+                response = await client.chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    max_tokens=max_tokens,
+                    temperature=temperature
+                )
+            except Exception:
+                self.failures += 1
+                raise
+        return response.choices[0].message.content or ""
+
+    async def stream(self, messages: List[Dict[str, str]], max_tokens: int,
+                     temperature: float = 0.7, model: str = "gpt-4o-mini") -> AsyncIterator[str]:
+        """채팅 완성 텍스트를 생성되는 대로 조각 단위로 반환 (병합 없음)"""
+        client = self._get_client()
+        async with self._semaphore:
+            self.calls += 1
+            try:
+                stream = await client.chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    max_tokens=max_tokens,
+                    temperature=temperature,
+                    stream=True
+                )
+                async for chunk in stream:
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        yield chunk.choices[0].delta.content
+            except Exception:
+                self.failures += 1
+                raise
+
+    def stats(self) -> Dict[str, Any]:
+        """호출 상태 및 카운터"""
+        return {
+            "max_concurrency": self.max_concurrency,
+            "inflight": len(self._inflight),
+            "calls": self.calls,
+            "deduplicated": self.deduplicated,
+            "failures": self.failures,
+        }
+
+    async def aclose(self):
+        """커넥션 풀 정리"""
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
@@ -0,0 +1,339 @@
+"""
+디코딩된 이미지 세션 캐시
+
+image_id별 RGB 배열을 바이트 한도가 있는 LRU로 보관한다.
+워핑 결과는 캐시에만 올려두고(dirty), 디스크 JPEG는 축출되거나 파일이 필요할 때
+(다운로드 등) 한 번만 기록해서 편집 중 반복되는 JPEG 디코딩/인코딩과 화질 손실을 없앤다.
+디스크/오브젝트 스토리지 입출력은 image_store.ImageStore가 담당한다.
+기록(JPEG 인코딩 + 저장소 쓰기)은 잠금 밖에서 하므로 느린 저장소가 다른 스레드의 조회를 막지 않고,
+축출된 항목은 기록이 끝날 때까지 계속 조회할 수 있다.
+기록에 실패한 항목은 버리지 않고 조회 가능한 상태로 남겨 두었다가 다음 조회/등록 때 다시 기록한다.
+lineage로 복원할 수 있는 파생 이미지는 volatile로 올려서 축출될 때 기록하지 않고 버린다.
+"""
+import io
+import logging
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from image_store import ImageStore
+
+logger = logging.getLogger(__name__)
+
+# 결과 이미지 JPEG 품질 (응답과 디스크 사본이 같은 바이트를 사용)
+JPEG_QUALITY = 95
+
+
+def encode_jpeg(image_rgb: np.ndarray, quality: int = JPEG_QUALITY) -> bytes:
+    """RGB 이미지를 JPEG 바이트로 인코딩"""
+    ok, buffer = cv2.imencode(".jpg", cv2.cvtColor(image_rgb, cv2.COLOR_RGB2BGR),
+                              [cv2.IMWRITE_JPEG_QUALITY, quality])
+    if not ok:
+        raise ValueError("JPEG 인코딩 실패")
+    return buffer.tobytes()
+
+
+# 긴 변 축소 비율별 OpenCV 축소 디코딩 플래그 (JPEG는 DCT 단계에서 바로 축소)
+REDUCED_DECODE_FLAGS = ((8, cv2.IMREAD_REDUCED_COLOR_8), (4, cv2.IMREAD_REDUCED_COLOR_4),
+                        (2, cv2.IMREAD_REDUCED_COLOR_2))
+EXIF_ORIENTATION = 0x0112
+
+
+def decode_upload(data: bytes, max_side: int) -> Optional[Tuple[np.ndarray, bool]]:
+    """업로드 이미지를 작업 해상도(긴 변 max_side, 0이면 제한 없음)로 디코딩
+
+    헤더만 먼저 읽어서 크기를 확인하고, 작업 해상도보다 크면 IMREAD_REDUCED_*로 줄여서 디코딩한 뒤
+    남은 차이만 INTER_AREA로 맞춘다. EXIF 회전은 imdecode가 한 번 적용하고, 저장 사본에는 EXIF가 없다.
+    반환값의 두 번째 항목은 원본 파일 바이트를 그대로 저장해도 되는지 여부
+    (JPEG이고 회전/축소가 없어서 다시 디코딩하면 같은 배열이 나오는 경우).
+    해석할 수 없는 이미지면 None.
+    """
+    try:
+        with Image.open(io.BytesIO(data)) as header:
+            width, height = header.size
+            image_format = header.format
+            orientation = header.getexif().get(EXIF_ORIENTATION, 1)
+    except Exception:
+        return None
+
+    long_side = max(width, height)
+    flag = cv2.IMREAD_COLOR
+    if max_side > 0 and long_side > max_side:
+        for factor, reduced_flag in REDUCED_DECODE_FLAGS:
+            if long_side // factor >= max_side:
+                flag = reduced_flag
+                break
+
+    image = cv2.imdecode(np.frombuffer(data, np.uint8), flag)
+    if image is None:
+        return None
+
+    # 축소 디코딩 후에도 크면 작업 해상도로 맞춤
+    if max_side > 0 and max(image.shape[:2]) > max_side:
+        scale = max_side / max(image.shape[:2])
+        size = (max(1, round(image.shape[1] * scale)), max(1, round(image.shape[0] * scale)))
+        image = cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+
+    keep_original = image_format == "JPEG" and orientation == 1 and flag == cv2.IMREAD_COLOR \
+        and image.shape[:2] == (height, width)
+    return cv2.cvtColor(image, cv2.COLOR_BGR2RGB), keep_original
+
+
+class ImageCache:
+    """바이트 한도 기반 LRU 이미지 캐시"""
+
+    def __init__(self, store: ImageStore, max_bytes: int,
+                 loader: Optional[Callable[[str], Optional[np.ndarray]]] = None):
+        self.store = store
+        self.max_bytes = max_bytes
+        self.loader = loader  # 저장소에도 없을 때 이미지를 다시 만드는 함수 (lineage 복원)
+        self._entries: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._encoded: Dict[str, bytes] = {}  # 이미 인코딩된 JPEG (디스크 기록 시 재사용)
+        self._dirty = set()
+        self._volatile = set()  # 축출 시 기록하지 않고 버리는 항목 (loader로 복원 가능)
+        self._writing: Dict[str, Tuple[np.ndarray, Optional[bytes]]] = {}  # 기록 대기/진행 중 (축출 후에도 조회 가능)
+        self._write_queue: List[str] = []
+        self._retry_writes: List[str] = []  # 기록에 실패해서 다음 _drain_writes에서 다시 시도할 항목
+        self._bytes = 0
+        self._lock = threading.RLock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.disk_reads = 0
+        self.disk_writes = 0
+        self.reconstructions = 0
+        self.write_failures = 0
+
+    def exists(self, image_id: str) -> bool:
+        """캐시 또는 디스크에 이미지가 있는지 확인"""
+        with self._lock:
+            if image_id in self._entries or image_id in self._writing:
+                return True
+        return self.store.exists(image_id)
+
+    def get(self, image_id: str) -> Optional[np.ndarray]:
+        """RGB 이미지 조회 (캐시 미스 시 디스크에서 로드, 디스크에도 없으면 loader로 복원, 없으면 None)
+
+        반환 배열은 캐시와 공유되므로 읽기 전용이다.
+        """
+        with self._lock:
+            image = self._entries.get(image_id)
+            if image is not None:
+                self._entries.move_to_end(image_id)
+                self.hits += 1
+            elif image_id in self._writing:
+                # 축출되어 기록 중인 항목은 기록이 끝날 때까지 그대로 사용
+                image = self._writing[image_id][0]
+                self.hits += 1
+            else:
+                self.misses += 1
+        if image is not None:
+            self.store.touch(image_id)
+            return image
+
+        data = self.store.read(image_id)
+        if data is None:
+            return self._reconstruct(image_id)
+
+        image = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+        if image is None:
+            return None
+        image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+
+        with self._lock:
+            self.disk_reads += 1
+            # 동시에 다른 요청이 먼저 올린 경우 그 배열을 사용
+            cached = self._entries.get(image_id)
+            if cached is not None:
+                return cached
+            image_rgb = self._insert(image_id, image_rgb, dirty=False)
+        self._drain_writes()
+        return image_rgb
+
+    def put(self, image_id: str, image_rgb: np.ndarray, persisted: bool = False,
+            encoded: Optional[bytes] = None, volatile: bool = False) -> np.ndarray:
+        """RGB 이미지 등록 (persisted=False면 디스크 기록을 미룸)
+
+        encoded가 있으면 디스크에 기록할 때 다시 인코딩하지 않고 그 바이트를 쓴다.
+        volatile=True면 축출될 때 기록하지 않고 버린다 (flush로 명시적으로 요청할 때만 기록).
+        반환값은 캐시에 보관된 읽기 전용 뷰 (전달한 배열 자체는 변경하지 않음)
+        """
+        with self._lock:
+            stale = self._encoded.pop(image_id, None)
+            if stale is not None:
+                self._bytes -= len(stale)
+            if encoded is not None and not persisted:
+                self._encoded[image_id] = encoded
+            image_rgb = self._insert(image_id, image_rgb, dirty=not persisted, volatile=volatile and not persisted)
+        self._drain_writes()
+        return image_rgb
+
+    def flush(self, image_id: str) -> bool:
+        """미기록 이미지를 디스크에 기록 (이미지가 없으면 False)
+
+        캐시와 디스크 어디에도 없으면 loader로 복원한 뒤 기록한다.
+        """
+        with self._lock:
+            image = self._entries.get(image_id)
+            if image is not None and image_id in self._dirty:
+                self._dirty.discard(image_id)
+                self._volatile.discard(image_id)
+                self._queue_write(image_id, image)
+            pending = self._writing.get(image_id)
+        if pending is not None:
+            # 대기 중이거나 다른 스레드가 기록 중이어도 직접 기록해서, 반환 시점에는 저장소에 있도록 함
+            if not self._store_write(image_id, pending):
+                raise RuntimeError(f"이미지 저장 실패: {image_id}")
+            return True
+        if image is not None:
+            return True
+        if self.store.exists(image_id):
+            return True
+        if self._reconstruct(image_id) is None:
+            return False
+        return self.flush(image_id)
+
+    def flush_all(self):
+        """모든 미기록 이미지를 디스크에 기록 (volatile 항목은 lineage로 복원할 수 있으므로 제외)"""
+        with self._lock:
+            for image_id in list(self._dirty - self._volatile):
+                self._queue_write(image_id, self._entries[image_id])
+                self._dirty.discard(image_id)
+        self._drain_writes()
+
+    def discard(self, image_id: str) -> bool:
+        """캐시에서 제거 (디스크에 기록하지 않음, 디스크 파일은 그대로)"""
+        with self._lock:
+            # 아직 기록되지 않은 축출 항목도 버림 (이미 진행 중인 기록은 끝까지 수행됨)
+            pending = self._writing.pop(image_id, None)
+            image = self._entries.pop(image_id, None)
+            if image is None:
+                return pending is not None
+            self._bytes -= image.nbytes + len(self._encoded.pop(image_id, b""))
+            self._dirty.discard(image_id)
+            self._volatile.discard(image_id)
+            return True
+
+    def stats(self) -> Dict[str, int]:
+        """캐시 상태 및 카운터"""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "dirty_entries": len(self._dirty),
+                "volatile_entries": len(self._volatile),
+                "writing_entries": len(self._writing),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "disk_reads": self.disk_reads,
+                "disk_writes": self.disk_writes,
+                "reconstructions": self.reconstructions,
+                "write_failures": self.write_failures,
+                "retry_writes": len(self._retry_writes),
+            }
+
+    def _reconstruct(self, image_id: str) -> Optional[np.ndarray]:
+        # 저장소에 없는 파생 이미지는 loader(부모 + 연산 재적용)로 다시 만든다
+        if self.loader is None:
+            return None
+        image_rgb = self.loader(image_id)
+        if image_rgb is None:
+            return None
+
+        with self._lock:
+            self.reconstructions += 1
+            cached = self._entries.get(image_id)
+            if cached is not None:
+                return cached
+            image_rgb = self._insert(image_id, image_rgb, dirty=True, volatile=True)
+        self._drain_writes()
+        return image_rgb
+
+    def _insert(self, image_id: str, image_rgb: np.ndarray, dirty: bool, volatile: bool = False) -> np.ndarray:
+        # 캐시에 공유되는 배열이 실수로 변경되지 않도록 읽기 전용 뷰로 보관 (호출자의 배열은 그대로 쓰기 가능)
+        image_rgb = image_rgb.view()
+        image_rgb.setflags(write=False)
+
+        previous = self._entries.pop(image_id, None)
+        if previous is not None:
+            self._bytes -= previous.nbytes
+
+        self._entries[image_id] = image_rgb
+        self._bytes += image_rgb.nbytes
+        if image_id in self._encoded:
+            self._bytes += len(self._encoded[image_id])
+        if dirty:
+            self._dirty.add(image_id)
+        else:
+            self._dirty.discard(image_id)
+        if volatile:
+            self._volatile.add(image_id)
+        else:
+            self._volatile.discard(image_id)
+
+        # 한도를 넘으면 오래된 항목부터 축출 (방금 넣은 항목은 유지)
+        # 미기록 항목은 기록 대기열로 옮기고, 실제 기록은 잠금을 푼 뒤 _drain_writes에서 한다
+        while self._bytes > self.max_bytes and len(self._entries) > 1:
+            old_id, old_image = self._entries.popitem(last=False)
+            self._bytes -= old_image.nbytes
+            if old_id in self._volatile:
+                self._volatile.discard(old_id)
+                self._dirty.discard(old_id)
+            elif old_id in self._dirty:
+                self._queue_write(old_id, old_image)
+                self._dirty.discard(old_id)
+            self._bytes -= len(self._encoded.pop(old_id, b""))
+            self.evictions += 1
+        return image_rgb
+
+    def _queue_write(self, image_id: str, image_rgb: np.ndarray):
+        # 잠금 안에서 호출: 응답으로 보낸 JPEG 바이트가 있으면 함께 넘김 (재인코딩 없음)
+        data = self._encoded.pop(image_id, None)
+        if data is not None:
+            self._bytes -= len(data)
+        self._writing[image_id] = (image_rgb, data)
+        self._write_queue.append(image_id)
+
+    def _drain_writes(self):
+        # 잠금 밖에서 호출: 대기열의 항목을 하나씩 꺼내 기록 (이전에 실패한 항목은 한 번씩 다시 시도)
+        with self._lock:
+            if self._retry_writes:
+                self._write_queue.extend(self._retry_writes)
+                self._retry_writes.clear()
+        while True:
+            with self._lock:
+                if not self._write_queue:
+                    return
+                image_id = self._write_queue.pop(0)
+                pending = self._writing.get(image_id)
+            if pending is not None:
+                self._store_write(image_id, pending)
+
+    def _store_write(self, image_id: str, pending: Tuple[np.ndarray, Optional[bytes]]) -> bool:
+        # 실패해도 예외를 축출을 일으킨 무관한 get/put으로 넘기지 않고, 항목을 남겨 다시 시도한다
+        image_rgb, data = pending
+        try:
+            if data is None:
+                data = encode_jpeg(image_rgb)
+            self.store.write(image_id, data)
+        except Exception:
+            logger.exception("이미지 저장 실패 (다음 기회에 다시 시도): %s", image_id)
+            with self._lock:
+                self.write_failures += 1
+                if self._writing.get(image_id) is pending and image_id not in self._retry_writes:
+                    self._retry_writes.append(image_id)
+            return False
+
+        # 기록이 끝난 뒤에야 조회 대상에서 뺌 (그 사이 다시 대기열에 오른 기록은 유지)
+        with self._lock:
+            self.disk_writes += 1
+            if self._writing.get(image_id) is pending:
+                del self._writing[image_id]
+        return True
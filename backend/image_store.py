@@ -0,0 +1,608 @@
+"""
+이미지 저장소
+
+image_id별 JPEG 바이트를 저장하는 공통 인터페이스(ImageStore)와 구현체:
+- LocalImageStore: 로컬 디스크 (해시 기반 하위 디렉토리 ab/cd/<image_id>.jpg)
+- MemoryImageStore: 프로세스 메모리 (테스트/단일 프로세스용)
+- S3ImageStore: S3 호환 오브젝트 스토리지 (MinIO 등, boto3 필요)
+
+각 이미지는 마지막 접근 후 TTL이 지나면 만료되고, 전체 용량이 한도를 넘으면
+가장 오래 접근하지 않은 것부터 지운다. 주기적인 정리는 백그라운드 스위퍼가 담당한다.
+is_pinned가 True를 돌려주는 이미지(lineage 자식의 복원 기준)는 만료/축출하지 않는다.
+인덱스에 없는 image_id는 백엔드에서 직접 확인하므로, 공유 저장소(S3)를 쓰면
+다른 노드가 저장한 이미지도 그대로 사용할 수 있다.
+업로드는 내용 해시(digest) 키 오브젝트(blob)에 한 번만 저장하고, image_id 오브젝트에는
+digest만 담은 링크를 둔다 (write_upload). 어떤 image_id가 blob을 참조하는지는 백엔드에
+참조 기록으로 남기므로, 재시작한 뒤나 같은 저장소를 쓰는 다른 노드의 업로드도 같은 blob을
+공유하고 마지막 참조가 지워질 때 blob도 지운다.
+"""
+import asyncio
+from abc import ABC, abstractmethod
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 샤딩 디렉토리 깊이 (해시 앞 2글자씩)
+SHARD_DEPTH = 2
+
+# 업로드 blob의 오브젝트 ID 접두사 (image_id로는 조회/삭제할 수 없음)
+BLOB_PREFIX = "blob-"
+# 링크 오브젝트 = LINK_MAGIC + sha256 hex digest (고정 크기라 크기만으로 후보를 가린다)
+LINK_MAGIC = b"image-link:"
+LINK_SIZE = len(LINK_MAGIC) + 64
+
+
+def content_digest(data: bytes) -> str:
+    """중복 업로드 확인용 내용 해시 (image_id로 쓰지 않음)"""
+    return hashlib.sha256(data).hexdigest()
+
+
+def blob_id(digest: str) -> str:
+    """digest로 저장된 업로드 바이트의 오브젝트 ID"""
+    return BLOB_PREFIX + digest
+
+
+def parse_link(data: bytes) -> Optional[str]:
+    """링크 오브젝트면 digest (JPEG 바이트면 None)"""
+    if len(data) != LINK_SIZE or not data.startswith(LINK_MAGIC):
+        return None
+    return data[len(LINK_MAGIC):].decode("ascii")
+
+
+def shard_key(image_id: str) -> str:
+    """해시 기반 상대 경로 (ab/cd/<image_id>.jpg)"""
+    digest = hashlib.sha1(image_id.encode("utf-8")).hexdigest()
+    shards = [digest[i * 2:i * 2 + 2] for i in range(SHARD_DEPTH)]
+    return "/".join(shards + [f"{image_id}.jpg"])
+
+
+@dataclass
+class StoredFile:
+    size: int
+    ttl_seconds: float
+    accessed_at: float
+
+    def expired(self, now: float) -> bool:
+        return now - self.accessed_at > self.ttl_seconds
+
+
+class ImageStore(ABC):
+    """TTL/용량 한도/LRU 축출을 지원하는 이미지 저장소 (백엔드별 입출력은 하위 클래스)"""
+
+    def __init__(self, ttl_seconds: float, max_bytes: int,
+                 on_evict: Optional[Callable[[str], None]] = None):
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.on_evict = on_evict  # 만료/축출된 image_id 통지 (메모리 캐시 정리용)
+        self.is_pinned: Optional[Callable[[str], bool]] = None  # True면 만료/축출 제외 (명시적 삭제는 가능)
+
+        self._files: "OrderedDict[str, StoredFile]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        # 링크 image_id -> digest, digest -> [blob 크기, 인덱스에 있는 링크 수]
+        # (blob 크기는 그 blob을 가리키는 링크가 인덱스에 하나라도 있을 때 한 번만 용량에 센다)
+        self._links: Dict[str, str] = {}
+        self._blobs: Dict[str, List[int]] = {}
+
+        self.reads = 0
+        self.writes = 0
+        self.expirations = 0
+        self.evictions = 0
+        self.sweeps = 0
+        self.deduplicated = 0
+
+    # 백엔드 입출력 (하위 클래스 구현)
+
+    @abstractmethod
+    def _write_object(self, image_id: str, data: bytes):
+        """바이트 기록 (같은 image_id는 덮어씀)"""
+
+    @abstractmethod
+    def _read_object(self, image_id: str) -> Optional[bytes]:
+        """저장된 바이트 (없으면 None)"""
+
+    @abstractmethod
+    def _delete_object(self, image_id: str) -> bool:
+        """삭제 (있었으면 True)"""
+
+    @abstractmethod
+    def _stat_object(self, image_id: str) -> Optional[int]:
+        """저장된 크기 (없으면 None)"""
+
+    def _list_objects(self) -> Iterable[Tuple[str, int, float]]:
+        """기존 항목 (image_id, 크기, 수정 시각)"""
+        return []
+
+    @abstractmethod
+    def _add_ref(self, digest: str, image_id: str):
+        """image_id가 digest의 blob을 참조한다고 기록"""
+
+    @abstractmethod
+    def _remove_ref(self, digest: str, image_id: str) -> bool:
+        """참조 기록 삭제 (다른 참조가 남아 있으면 True)"""
+
+    def local_path(self, image_id: str) -> Optional[str]:
+        """로컬 파일 경로 (로컬 디스크 저장소가 아니면 None)"""
+        return None
+
+    # 공통 동작
+
+    def exists(self, image_id: str) -> bool:
+        """만료되지 않은 이미지가 있는지 확인"""
+        if image_id.startswith(BLOB_PREFIX):
+            return False
+        with self._lock:
+            stored = self._files.get(image_id)
+            if stored is not None:
+                return not self._expired(image_id, stored, time.time())
+        size = self._stat_object(image_id)
+        if size is None:
+            return False
+        self._adopt(image_id, size)
+        return True
+
+    def touch(self, image_id: str):
+        """접근 시각 갱신 (메모리 캐시 적중도 TTL/LRU에 반영)"""
+        with self._lock:
+            stored = self._files.get(image_id)
+            if stored is not None:
+                stored.accessed_at = time.time()
+                self._files.move_to_end(image_id)
+
+    def read(self, image_id: str) -> Optional[bytes]:
+        """이미지 바이트 (없거나 만료되면 None, 링크는 blob 바이트)"""
+        if not self._check(image_id):
+            return None
+        data = self._read_object(image_id)
+        digest = None if data is None else parse_link(data)
+        if digest is not None:
+            data = self._read_object(blob_id(digest))
+        if data is None:
+            self._forget(image_id)
+            return None
+        with self._lock:
+            self.reads += 1
+        return data
+
+    def write(self, image_id: str, data: bytes, ttl_seconds: Optional[float] = None):
+        """이미지 바이트 기록 (용량을 넘으면 오래된 항목 축출)"""
+        self._write_object(image_id, data)
+        self._record(image_id, len(data), ttl_seconds)
+
+    def write_upload(self, image_id: str, digest: str, encode: Callable[[], bytes]) -> bool:
+        """업로드를 digest의 blob으로 저장하고 image_id에 링크 (blob이 이미 있었으면 True)
+
+        blob이 없을 때만 encode()로 바이트를 만든다. blob 확인은 백엔드 조회(S3는 HEAD)라
+        다른 노드나 이전 실행이 저장한 같은 내용도 공유한다. 각 image_id는 따로 삭제되고,
+        blob은 마지막 참조가 지워질 때 지운다.
+        """
+        # 참조를 먼저 기록해야 동시에 마지막 참조를 지우는 쪽이 blob을 남긴다
+        self._add_ref(digest, image_id)
+        size = self._stat_object(blob_id(digest))
+        shared = size is not None
+        if not shared:
+            data = encode()
+            self._write_object(blob_id(digest), data)
+            size = len(data)
+        link = LINK_MAGIC + digest.encode("ascii")
+        self._write_object(image_id, link)
+
+        with self._lock:
+            if shared:
+                self.deduplicated += 1
+        self._record(image_id, len(link), digest=digest, blob_size=size)
+        return shared
+
+    def delete(self, image_id: str) -> bool:
+        """이미지 삭제 (있었으면 True, 마지막 참조였던 blob도 삭제)"""
+        if image_id.startswith(BLOB_PREFIX):
+            return False
+        with self._lock:
+            indexed = image_id in self._files
+        if not indexed:
+            # 다른 노드가 저장한 링크도 인덱스에 올려서 digest를 확인
+            self.exists(image_id)
+        with self._lock:
+            stored = self._pop_file(image_id)
+            digest = self._links.pop(image_id, None)
+        existed = self._delete_object(image_id) or stored is not None
+        if digest is not None:
+            self._release_blob(digest, image_id)
+        return existed
+
+    def sweep(self) -> int:
+        """만료 항목과 용량 초과분 정리 (정리한 항목 수)"""
+        now = time.time()
+        with self._lock:
+            expired = [image_id for image_id, stored in self._files.items() if self._expired(image_id, stored, now)]
+            for image_id in expired:
+                self._pop_file(image_id)
+            self.expirations += len(expired)
+            evicted = self._evict_over_quota()
+            self.sweeps += 1
+        self._remove_objects(expired + evicted)
+        return len(expired) + len(evicted)
+
+    async def run_sweeper(self, interval_seconds: float):
+        """interval_seconds마다 sweep을 워커 스레드에서 실행 (취소될 때까지)"""
+        while True:
+            await asyncio.sleep(interval_seconds)
+            try:
+                removed = await asyncio.to_thread(self.sweep)
+                if removed:
+                    logger.info("이미지 저장소 정리: %d개 파일 삭제", removed)
+            except Exception:
+                logger.exception("이미지 저장소 정리 실패")
+
+    def stats(self) -> Dict[str, Any]:
+        """저장소 상태 및 카운터"""
+        with self._lock:
+            return {
+                "backend": type(self).__name__,
+                "files": len(self._files),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds,
+                "reads": self.reads,
+                "writes": self.writes,
+                "expirations": self.expirations,
+                "evictions": self.evictions,
+                "sweeps": self.sweeps,
+                "deduplicated": self.deduplicated,
+                "links": len(self._links),
+            }
+
+    def _record(self, image_id: str, size: int, ttl_seconds: Optional[float] = None,
+                digest: Optional[str] = None, blob_size: int = 0):
+        # 기록한 항목을 인덱스에 등록하고 용량 초과분 축출
+        with self._lock:
+            self._pop_file(image_id)
+            self._links.pop(image_id, None)
+            self._push_file(image_id, StoredFile(
+                size, self.ttl_seconds if ttl_seconds is None else ttl_seconds, time.time()
+            ), digest, blob_size)
+            self.writes += 1
+            evicted = self._evict_over_quota(keep=image_id)
+        self._remove_objects(evicted)
+
+    def _check(self, image_id: str) -> bool:
+        # 만료된 항목은 읽기 시점에도 정리, 인덱스에 없으면 백엔드에서 확인
+        now = time.time()
+        with self._lock:
+            stored = self._files.get(image_id)
+            if stored is not None and not self._expired(image_id, stored, now):
+                stored.accessed_at = now
+                self._files.move_to_end(image_id)
+                return True
+            if stored is not None:
+                self._pop_file(image_id)
+                self.expirations += 1
+        if stored is not None:
+            self._remove_objects([image_id])
+            return False
+        return self.exists(image_id)
+
+    def _adopt(self, image_id: str, size: int, accessed_at: Optional[float] = None):
+        # 다른 노드/이전 실행에서 저장된 항목을 인덱스에 등록
+        digest, blob_size = self._resolve_link(image_id, size)
+        with self._lock:
+            if image_id in self._files:
+                return
+            self._push_file(image_id, StoredFile(size, self.ttl_seconds,
+                                                 time.time() if accessed_at is None else accessed_at),
+                            digest, blob_size)
+            evicted = self._evict_over_quota(keep=image_id)
+        self._remove_objects(evicted)
+
+    def _resolve_link(self, image_id: str, size: int) -> Tuple[Optional[str], int]:
+        # 링크 크기인 항목만 읽어서 확인하고, 링크면 digest와 blob 크기
+        if size != LINK_SIZE:
+            return None, 0
+        digest = parse_link(self._read_object(image_id) or b"")
+        if digest is None:
+            return None, 0
+        return digest, self._stat_object(blob_id(digest)) or 0
+
+    def _push_file(self, image_id: str, stored: StoredFile, digest: Optional[str] = None, blob_size: int = 0):
+        # 잠금 안에서 호출: 인덱스에 등록 (blob은 그 digest의 첫 링크가 등록될 때 센다)
+        self._files[image_id] = stored
+        self._bytes += stored.size
+        if digest is None:
+            return
+        self._links[image_id] = digest
+        blob = self._blobs.setdefault(digest, [blob_size, 0])
+        if blob[1] == 0:
+            self._bytes += blob[0]
+        blob[1] += 1
+
+    def _pop_file(self, image_id: str) -> Optional[StoredFile]:
+        # 잠금 안에서 호출: 인덱스에서 제거 (마지막 링크면 blob 크기도 뺀다, _links는 호출 측이 정리)
+        stored = self._files.pop(image_id, None)
+        if stored is None:
+            return None
+        self._bytes -= stored.size
+        digest = self._links.get(image_id)
+        if digest is not None:
+            blob = self._blobs[digest]
+            blob[1] -= 1
+            if blob[1] == 0:
+                self._bytes -= blob[0]
+                del self._blobs[digest]
+        return stored
+
+    def _release_blob(self, digest: str, image_id: str):
+        # 참조 기록은 백엔드에 있으므로 다른 노드의 업로드가 남아 있으면 blob도 남는다
+        if not self._remove_ref(digest, image_id):
+            self._delete_object(blob_id(digest))
+
+    def _pinned(self, image_id: str) -> bool:
+        return self.is_pinned is not None and self.is_pinned(image_id)
+
+    def _expired(self, image_id: str, stored: StoredFile, now: float) -> bool:
+        # 고정된 항목은 TTL이 지나도 유지 (접근 시각을 갱신해서 고정이 풀린 뒤 TTL만큼 더 남김)
+        if not stored.expired(now):
+            return False
+        if self._pinned(image_id):
+            stored.accessed_at = now
+            return False
+        return True
+
+    def _forget(self, image_id: str):
+        with self._lock:
+            self._pop_file(image_id)
+            self._links.pop(image_id, None)
+
+    def _evict_over_quota(self, keep: Optional[str] = None) -> List[str]:
+        # 잠금 안에서 호출: 오래 접근하지 않은 순서로 인덱스에서 제거
+        evicted = []
+        for image_id in list(self._files):
+            if self._bytes <= self.max_bytes:
+                break
+            if image_id == keep or self._pinned(image_id):
+                continue
+            self._pop_file(image_id)
+            evicted.append(image_id)
+        self.evictions += len(evicted)
+        return evicted
+
+    def _remove_objects(self, image_ids: List[str]):
+        # 삭제와 통지는 잠금 밖에서 (통지받는 쪽이 다시 저장소를 호출할 수 있음)
+        with self._lock:
+            digests = [self._links.pop(image_id, None) for image_id in image_ids]
+        for image_id, digest in zip(image_ids, digests):
+            self._delete_object(image_id)
+            if digest is not None:
+                self._release_blob(digest, image_id)
+            if self.on_evict is not None:
+                self.on_evict(image_id)
+
+    def _load_index(self):
+        # 기존 항목으로 인덱스 복원 (오래된 것부터 LRU 순서, blob은 링크 쪽에서 센다)
+        for image_id, size, mtime in sorted(self._list_objects(), key=lambda item: item[2]):
+            if image_id.startswith(BLOB_PREFIX):
+                continue
+            digest, blob_size = self._resolve_link(image_id, size)
+            self._push_file(image_id, StoredFile(size, self.ttl_seconds, mtime), digest, blob_size)
+
+
+class LocalImageStore(ImageStore):
+    """샤딩된 로컬 디스크 저장소"""
+
+    def __init__(self, root: str, ttl_seconds: float, max_bytes: int,
+                 on_evict: Optional[Callable[[str], None]] = None):
+        super().__init__(ttl_seconds, max_bytes, on_evict)
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self._load_index()
+
+    def path_for(self, image_id: str) -> str:
+        """샤딩된 파일 경로"""
+        return os.path.join(self.root, *shard_key(image_id).split("/"))
+
+    def ref_dir(self, digest: str) -> str:
+        """digest의 참조 기록 디렉토리 (참조하는 image_id마다 빈 파일)"""
+        return os.path.join(self.root, "refs", digest[:2], digest)
+
+    def local_path(self, image_id: str) -> Optional[str]:
+        # 링크는 blob 파일을 보낸다 (download는 flush/exists 뒤에 호출하므로 링크가 인덱스에 있음)
+        with self._lock:
+            digest = self._links.get(image_id)
+        return self.path_for(image_id if digest is None else blob_id(digest))
+
+    def _write_object(self, image_id: str, data: bytes):
+        # 임시 파일에 쓴 뒤 교체하므로 읽는 쪽은 항상 완전한 파일을 본다
+        path = self.path_for(image_id)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(data)
+        os.replace(temp_path, path)
+
+    def _read_object(self, image_id: str) -> Optional[bytes]:
+        try:
+            with open(self.path_for(image_id), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def _delete_object(self, image_id: str) -> bool:
+        try:
+            os.remove(self.path_for(image_id))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def _stat_object(self, image_id: str) -> Optional[int]:
+        try:
+            return os.stat(self.path_for(image_id)).st_size
+        except FileNotFoundError:
+            return None
+
+    def _add_ref(self, digest: str, image_id: str):
+        directory = self.ref_dir(digest)
+        os.makedirs(directory, exist_ok=True)
+        open(os.path.join(directory, image_id), "wb").close()
+
+    def _remove_ref(self, digest: str, image_id: str) -> bool:
+        directory = self.ref_dir(digest)
+        try:
+            os.remove(os.path.join(directory, image_id))
+            if any(True for _ in os.scandir(directory)):
+                return True
+            os.rmdir(directory)
+        except OSError:
+            # 없어진 기록이거나, 비운 사이 다른 업로드가 참조를 추가해서 rmdir이 실패
+            return os.path.isdir(directory) and any(True for _ in os.scandir(directory))
+        return False
+
+    def _list_objects(self) -> Iterable[Tuple[str, int, float]]:
+        # 예전 평면 구조 파일은 샤딩 경로로 이동
+        found = []
+        refs = os.path.join(self.root, "refs")
+        for directory, _, names in os.walk(self.root):
+            if directory == refs or directory.startswith(refs + os.sep):
+                continue
+            for name in names:
+                if not name.endswith(".jpg"):
+                    if name.endswith(".tmp"):
+                        os.remove(os.path.join(directory, name))
+                    continue
+                image_id = name[:-len(".jpg")]
+                path = os.path.join(directory, name)
+                target = self.path_for(image_id)
+                if path != target:
+                    os.makedirs(os.path.dirname(target), exist_ok=True)
+                    os.replace(path, target)
+                stat = os.stat(target)
+                found.append((image_id, stat.st_size, stat.st_mtime))
+        return found
+
+
+class MemoryImageStore(ImageStore):
+    """프로세스 메모리 저장소 (재시작하면 사라짐)"""
+
+    def __init__(self, ttl_seconds: float, max_bytes: int,
+                 on_evict: Optional[Callable[[str], None]] = None):
+        super().__init__(ttl_seconds, max_bytes, on_evict)
+        self._objects: Dict[str, bytes] = {}
+        self._refs: Dict[str, set] = {}
+        self._objects_lock = threading.Lock()
+
+    def _write_object(self, image_id: str, data: bytes):
+        with self._objects_lock:
+            self._objects[image_id] = bytes(data)
+
+    def _read_object(self, image_id: str) -> Optional[bytes]:
+        with self._objects_lock:
+            return self._objects.get(image_id)
+
+    def _delete_object(self, image_id: str) -> bool:
+        with self._objects_lock:
+            return self._objects.pop(image_id, None) is not None
+
+    def _stat_object(self, image_id: str) -> Optional[int]:
+        with self._objects_lock:
+            data = self._objects.get(image_id)
+        return None if data is None else len(data)
+
+    def _add_ref(self, digest: str, image_id: str):
+        with self._objects_lock:
+            self._refs.setdefault(digest, set()).add(image_id)
+
+    def _remove_ref(self, digest: str, image_id: str) -> bool:
+        with self._objects_lock:
+            refs = self._refs.get(digest, set())
+            refs.discard(image_id)
+            if not refs:
+                self._refs.pop(digest, None)
+            return bool(refs)
+
+
+class S3ImageStore(ImageStore):
+    """S3 호환 오브젝트 스토리지 저장소
+
+    endpoint_url을 지정하면 MinIO 같은 호환 서버를 사용한다.
+    자격 증명은 boto3 기본 방식(AWS_ACCESS_KEY_ID 등 환경 변수)을 따른다.
+    """
+
+    def __init__(self, bucket: str, ttl_seconds: float, max_bytes: int, prefix: str = "",
+                 endpoint_url: Optional[str] = None, region_name: Optional[str] = None,
+                 on_evict: Optional[Callable[[str], None]] = None):
+        super().__init__(ttl_seconds, max_bytes, on_evict)
+        try:
+            import boto3
+            from botocore.exceptions import ClientError
+        except ImportError as e:
+            raise RuntimeError("S3 이미지 저장소를 사용하려면 boto3를 설치해야 합니다") from e
+
+        self.bucket = bucket
+        self.prefix = prefix.strip("/") + "/" if prefix.strip("/") else ""
+        self._client = boto3.client("s3", endpoint_url=endpoint_url, region_name=region_name)
+        self._client_error = ClientError
+        self._load_index()
+
+    def key_for(self, image_id: str) -> str:
+        """오브젝트 키"""
+        return self.prefix + shard_key(image_id)
+
+    def ref_prefix(self, digest: str) -> str:
+        """digest의 참조 기록 키 접두사 (참조하는 image_id마다 빈 오브젝트)"""
+        return f"{self.prefix}refs/{digest}/"
+
+    def _write_object(self, image_id: str, data: bytes):
+        self._client.put_object(Bucket=self.bucket, Key=self.key_for(image_id), Body=data,
+                                ContentType="image/jpeg")
+
+    def _read_object(self, image_id: str) -> Optional[bytes]:
+        try:
+            response = self._client.get_object(Bucket=self.bucket, Key=self.key_for(image_id))
+        except self._client_error as e:
+            if self._not_found(e):
+                return None
+            raise
+        return response["Body"].read()
+
+    def _delete_object(self, image_id: str) -> bool:
+        # S3 삭제는 없는 키에도 성공하므로 먼저 확인 (다른 노드가 저장한 이미지도 있었는지 알 수 있음)
+        existed = self._stat_object(image_id) is not None
+        if existed:
+            self._client.delete_object(Bucket=self.bucket, Key=self.key_for(image_id))
+        return existed
+
+    def _stat_object(self, image_id: str) -> Optional[int]:
+        try:
+            response = self._client.head_object(Bucket=self.bucket, Key=self.key_for(image_id))
+        except self._client_error as e:
+            if self._not_found(e):
+                return None
+            raise
+        return response["ContentLength"]
+
+    def _add_ref(self, digest: str, image_id: str):
+        self._client.put_object(Bucket=self.bucket, Key=self.ref_prefix(digest) + image_id, Body=b"")
+
+    def _remove_ref(self, digest: str, image_id: str) -> bool:
+        prefix = self.ref_prefix(digest)
+        self._client.delete_object(Bucket=self.bucket, Key=prefix + image_id)
+        response = self._client.list_objects_v2(Bucket=self.bucket, Prefix=prefix, MaxKeys=1)
+        return response.get("KeyCount", 0) > 0
+
+    def _list_objects(self) -> Iterable[Tuple[str, int, float]]:
+        found = []
+        paginator = self._client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self.prefix):
+            for item in page.get("Contents", []):
+                name = item["Key"].rsplit("/", 1)[-1]
+                if name.endswith(".jpg"):
+                    found.append((name[:-len(".jpg")], item["Size"], item["LastModified"].timestamp()))
+        return found
+
+    def _not_found(self, error) -> bool:
+        return error.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound")
@@ -0,0 +1,121 @@
+"""
+랜드마크 응답 압축 인코딩
+
+/landmarks 응답은 기본적으로 JSON이지만, Accept 헤더로 아래 바이너리 형식을 요청할 수 있다.
+
+- application/x-landmarks-f32: x, y 쌍을 little-endian float32로 이어 붙인 바이트 (점당 8바이트)
+- application/x-landmarks-i16: 이미지 크기로 정규화한 좌표를 little-endian int16 고정소수점으로 저장 (점당 4바이트)
+  픽셀 좌표 = 값 * image_width(또는 image_height) / 32767
+- application/msgpack: 메타데이터 + float32 좌표 바이트 (msgpack 패키지가 설치된 경우에만)
+
+바이너리 형식의 메타데이터(이미지 크기, 점 개수, 추정 여부, 경고)는 X-Landmark-* 응답 헤더로 보낸다.
+all_faces면 JSON은 faces 필드를 추가하고, 바이너리는 모든 얼굴(면적 큰 순)의 좌표를 이어 붙인다
+(X-Face-Count개 얼굴 × X-Landmark-Count개 점, 첫 얼굴이 landmarks와 같음).
+"""
+import json
+from typing import Dict, Tuple
+from urllib.parse import quote
+
+import numpy as np
+
+from landmark_store import LandmarkEntry
+
+try:
+    import msgpack
+except ImportError:  # 선택 의존성
+    msgpack = None
+
+JSON_MEDIA_TYPE = "application/json"
+FLOAT32_MEDIA_TYPE = "application/x-landmarks-f32"
+INT16_MEDIA_TYPE = "application/x-landmarks-i16"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+
+# int16 고정소수점 정규화 배율
+INT16_SCALE = 32767
+
+# CORS에서 클라이언트가 읽을 수 있어야 하는 메타데이터 헤더
+LANDMARK_HEADERS = [
+    "X-Landmark-Count", "X-Landmark-Scale", "X-Image-Width", "X-Image-Height",
+    "X-Landmarks-Estimated", "X-Warning-Message", "X-Face-Count"
+]
+
+
+def binary_media_types():
+    """지원하는 바이너리 형식 (msgpack은 설치된 경우에만)"""
+    if msgpack is None:
+        return (FLOAT32_MEDIA_TYPE, INT16_MEDIA_TYPE)
+    return (FLOAT32_MEDIA_TYPE, INT16_MEDIA_TYPE, MSGPACK_MEDIA_TYPE)
+
+
+def negotiate_landmark_format(accept: str) -> str:
+    """Accept 헤더에서 먼저 나오는 지원 형식 선택 (없으면 JSON)"""
+    supported = binary_media_types()
+    for item in accept.split(","):
+        media_type = item.split(";")[0].strip().lower()
+        if media_type in supported:
+            return media_type
+        if media_type == JSON_MEDIA_TYPE:
+            break
+    return JSON_MEDIA_TYPE
+
+
+def encode_landmarks(entry: LandmarkEntry, media_type: str,
+                     all_faces: bool = False) -> Tuple[bytes, Dict[str, str]]:
+    """랜드마크 항목을 media_type 형식의 바이트와 응답 헤더로 인코딩
+
+    JSON도 Pydantic 모델을 거치지 않고 바로 직렬화한다.
+    """
+    if all_faces and entry.faces is not None:
+        faces = entry.faces
+    else:
+        faces = entry.landmarks[np.newaxis]
+
+    if media_type == JSON_MEDIA_TYPE:
+        content = {
+            "landmarks": entry.landmarks.tolist(),
+            "image_width": entry.image_width,
+            "image_height": entry.image_height,
+            "warning_message": entry.warning_message,
+            "estimated": entry.estimated
+        }
+        if all_faces:
+            content["faces"] = faces.tolist()
+        body = json.dumps(content, ensure_ascii=False)
+        return body.encode("utf-8"), {}
+
+    points = faces.reshape(-1, 2)
+    float32_bytes = points.astype("<f4").tobytes()
+
+    if media_type == MSGPACK_MEDIA_TYPE:
+        content = {
+            "landmarks": float32_bytes,
+            "count": len(entry.landmarks),
+            "image_width": entry.image_width,
+            "image_height": entry.image_height,
+            "warning_message": entry.warning_message,
+            "estimated": entry.estimated
+        }
+        if all_faces:
+            content["face_count"] = len(faces)
+        return msgpack.packb(content), {}
+
+    headers = {
+        "X-Landmark-Count": str(len(entry.landmarks)),
+        "X-Face-Count": str(len(faces)),
+        "X-Image-Width": str(entry.image_width),
+        "X-Image-Height": str(entry.image_height),
+        "X-Landmarks-Estimated": "true" if entry.estimated else "false"
+    }
+    if entry.warning_message:
+        # HTTP 헤더는 latin-1이므로 경고 문구는 퍼센트 인코딩
+        headers["X-Warning-Message"] = quote(entry.warning_message)
+
+    if media_type == INT16_MEDIA_TYPE:
+        size = np.array([entry.image_width, entry.image_height], dtype=np.float64)
+        fixed = np.rint(points / size * INT16_SCALE)
+        np.clip(fixed, -INT16_SCALE, INT16_SCALE, out=fixed)
+        headers["X-Landmark-Scale"] = str(INT16_SCALE)
+        return fixed.astype("<i2").tobytes(), headers
+
+    return float32_bytes, headers
+
@@ -0,0 +1,118 @@
+"""
+image_id별 얼굴 랜드마크 캐시
+
+검출 결과(가장 큰 얼굴 + 검출된 모든 얼굴)를 image_id로 보관한다.
+워핑/프리셋으로 파생된 이미지는 부모 랜드마크를 같은 변위장으로 이동시켜 등록하므로
+MediaPipe를 다시 돌리지 않는다. 이렇게 만든 항목은 estimated=True로 표시된다.
+랜드마크는 (점 개수, 2) float64 픽셀 좌표 배열 하나로 보관한다 (튜플 리스트보다 작고, 변위장 이동에 바로 사용).
+"""
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+from typing import Callable, Dict, Optional
+
+import numpy as np
+
+
+def landmark_array(points) -> np.ndarray:
+    """(N, 2) 읽기 전용 float64 랜드마크 배열로 변환 (캐시 항목끼리 공유되므로 잠금)"""
+    landmarks = np.ascontiguousarray(points, dtype=np.float64).reshape(-1, 2)
+    landmarks.setflags(write=False)
+    return landmarks
+
+
+def face_array(points, landmark_count: int) -> np.ndarray:
+    """(얼굴 수, landmark_count, 2) 읽기 전용 float64 배열로 변환"""
+    faces = np.ascontiguousarray(points, dtype=np.float64).reshape(-1, landmark_count, 2)
+    faces.setflags(write=False)
+    return faces
+
+
+@dataclass(frozen=True, eq=False)
+class LandmarkEntry:
+    landmarks: np.ndarray  # (N, 2) float64 픽셀 좌표, landmark_array로 생성
+    image_width: int
+    image_height: int
+    warning_message: Optional[str] = None
+    estimated: bool = False  # True면 부모 이미지에서 변위장으로 추정한 값
+    parent_id: Optional[str] = None
+    faces: Optional[np.ndarray] = None  # (얼굴 수, N, 2) 검출된 모든 얼굴 (면적 큰 순, faces[0] == landmarks)
+    tier: str = "full"  # 검출 단계 (fast: 축소 이미지, crop: 얼굴 영역 원본 해상도, full: 원본 전체, face_detector 참고)
+
+
+class LandmarkStore:
+    """개수 한도 기반 LRU 랜드마크 캐시"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, LandmarkEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.derived = 0
+
+    def get(self, image_id: str) -> Optional[LandmarkEntry]:
+        """캐시된 랜드마크 조회"""
+        with self._lock:
+            entry = self._entries.get(image_id)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(image_id)
+            self.hits += 1
+            return entry
+
+    def put(self, image_id: str, entry: LandmarkEntry) -> LandmarkEntry:
+        """랜드마크 등록"""
+        with self._lock:
+            self._entries[image_id] = entry
+            self._entries.move_to_end(image_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def derive(self, parent_id: str, image_id: str,
+               transform: Callable[[np.ndarray], np.ndarray]) -> Optional[LandmarkEntry]:
+        """부모 랜드마크를 transform으로 이동시켜 파생 이미지의 추정 랜드마크 등록
+
+        부모 항목이 없으면 아무것도 하지 않고 None을 반환한다.
+        """
+        with self._lock:
+            parent = self._entries.get(parent_id)
+        if parent is None:
+            return None
+
+        if parent.faces is None:
+            faces = None
+            landmarks = landmark_array(transform(parent.landmarks))
+        else:
+            # 모든 얼굴을 한 번에 이동 (faces[0]이 대표 랜드마크)
+            faces = face_array(transform(parent.faces.reshape(-1, 2)), parent.faces.shape[1])
+            landmarks = landmark_array(faces[0])
+        entry = replace(
+            parent,
+            landmarks=landmarks,
+            faces=faces,
+            estimated=True,
+            parent_id=parent_id
+        )
+        with self._lock:
+            self.derived += 1
+        return self.put(image_id, entry)
+
+    def discard(self, image_id: str):
+        """랜드마크 제거"""
+        with self._lock:
+            self._entries.pop(image_id, None)
+
+    def stats(self) -> Dict[str, int]:
+        """캐시 상태 및 카운터"""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "derived": self.derived,
+            }
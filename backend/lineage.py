@@ -0,0 +1,147 @@
+"""
+이미지 파생 이력 (lineage)
+
+워핑/프리셋 결과 이미지를 매번 JPEG로 저장하는 대신, 부모 image_id와 적용한 연산 파라미터만 기록한다.
+마지막으로 저장된 조상에서 checkpoint_interval 단계마다 한 번씩만 이미지를 저장(체크포인트)하고,
+저장되지 않은 버전은 필요할 때 가장 가까운 저장된 조상에서 연산을 다시 적용해서 복원한다.
+기록은 SQLite에 보관하므로 서버를 재시작해도 복원할 수 있다.
+"""
+import json
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+
+@dataclass(frozen=True)
+class LineageNode:
+    image_id: str
+    parent_id: str
+    operation: Dict[str, Any]  # {"kind": "warp" | "pull", ...} 연산 파라미터
+    depth: int                 # 마지막 체크포인트(또는 저장된 조상) 이후 단계 수, 체크포인트면 0
+    checkpoint: bool           # True면 이미지 자체도 저장소에 기록
+
+
+class LineageStore:
+    """SQLite 기반 이미지 파생 이력"""
+
+    def __init__(self, path: str, checkpoint_interval: int, ttl_seconds: float):
+        self.path = path
+        self.checkpoint_interval = max(1, checkpoint_interval)
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS lineage ("
+            "  image_id TEXT PRIMARY KEY,"
+            "  parent_id TEXT NOT NULL,"
+            "  operation TEXT NOT NULL,"
+            "  depth INTEGER NOT NULL,"
+            "  checkpoint INTEGER NOT NULL,"
+            "  accessed_at REAL NOT NULL"
+            ")"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_lineage_parent ON lineage (parent_id)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_lineage_accessed ON lineage (accessed_at)")
+        self._conn.commit()
+
+        self.recorded = 0
+        self.checkpoints = 0
+        self.expired = 0
+
+    def get(self, image_id: str) -> Optional[LineageNode]:
+        """파생 기록 조회 (업로드 원본 등 기록이 없으면 None)"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT image_id, parent_id, operation, depth, checkpoint FROM lineage WHERE image_id = ?",
+                (image_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return LineageNode(row[0], row[1], json.loads(row[2]), row[3], bool(row[4]))
+
+    def record(self, image_id: str, parent_id: str, operation: Dict[str, Any]) -> LineageNode:
+        """파생 이미지 기록 (체크포인트 여부를 결정해서 반환)"""
+        parent = self.get(parent_id)
+        depth = 1 if parent is None else parent.depth + 1
+        checkpoint = depth >= self.checkpoint_interval
+        node = LineageNode(image_id, parent_id, operation, 0 if checkpoint else depth, checkpoint)
+
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO lineage (image_id, parent_id, operation, depth, checkpoint, accessed_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (image_id, parent_id, json.dumps(operation), node.depth, int(checkpoint), now)
+            )
+            cursor = self._conn.execute(
+                "DELETE FROM lineage WHERE accessed_at < ?", (now - self.ttl_seconds,)
+            )
+            self.expired += cursor.rowcount
+            self._conn.commit()
+            self.recorded += 1
+            if checkpoint:
+                self.checkpoints += 1
+        return node
+
+    def touch(self, image_id: str):
+        """복원 등으로 사용된 기록의 만료 시각 연장"""
+        with self._lock:
+            self._conn.execute("UPDATE lineage SET accessed_at = ? WHERE image_id = ?", (time.time(), image_id))
+            self._conn.commit()
+
+    def children(self, image_id: str) -> List[str]:
+        """image_id에서 바로 파생된 이미지 ID 목록"""
+        with self._lock:
+            rows = self._conn.execute("SELECT image_id FROM lineage WHERE parent_id = ?", (image_id,)).fetchall()
+        return [row[0] for row in rows]
+
+    def has_children(self, image_id: str) -> bool:
+        """만료되지 않은 파생 이미지가 있는지 (있으면 복원 기준이므로 저장소에서 지우면 안 됨)"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM lineage WHERE parent_id = ? AND accessed_at >= ? LIMIT 1",
+                (image_id, time.time() - self.ttl_seconds)
+            ).fetchone()
+        return row is not None
+
+    def chain(self, image_id: str) -> List[LineageNode]:
+        """image_id부터 업로드 원본 직전까지의 조상 기록 (가까운 순)"""
+        nodes = []
+        seen = set()
+        node = self.get(image_id)
+        while node is not None and node.image_id not in seen:
+            seen.add(node.image_id)
+            nodes.append(node)
+            node = self.get(node.parent_id)
+        return nodes
+
+    def discard(self, image_id: str):
+        """기록 제거"""
+        with self._lock:
+            self._conn.execute("DELETE FROM lineage WHERE image_id = ?", (image_id,))
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """기록 상태 및 카운터"""
+        with self._lock:
+            nodes, checkpoints = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(checkpoint), 0) FROM lineage"
+            ).fetchone()
+            return {
+                "nodes": nodes,
+                "checkpoint_nodes": checkpoints,
+                "checkpoint_interval": self.checkpoint_interval,
+                "recorded": self.recorded,
+                "checkpoints": self.checkpoints,
+                "expired": self.expired,
+            }
+
+    def close(self):
+        """DB 연결 종료"""
+        with self._lock:
+            self._conn.close()
@@ -1,33 +1,80 @@
-from fastapi import FastAPI, File, UploadFile, HTTPException
+from fastapi import FastAPI, File, UploadFile, HTTPException, Request, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
+from fastapi.responses import StreamingResponse, Response, JSONResponse, FileResponse
+from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel
-from typing import List, Optional, Tuple, Dict, Any
-import io
-import cv2
+from typing import List, Optional, Tuple, Dict, Any, Callable, Awaitable, AsyncIterator
+import json
+import asyncio
+from contextlib import asynccontextmanager
 import numpy as np
-from PIL import Image
-import mediapipe as mp
 import base64
 import uuid
 import os
 import math
-from datetime import datetime
-import openai
 from dotenv import load_dotenv
+from warp_engine import (
+    apply_warp, warp_points, pull_points,
+    PullOperation, apply_pull_operations, apply_pull_operation_groups,
+    pull_operation_clusters, sum_composition_error_bound,
+    COMPOSE_EXACT, COMPOSE_SUM, COMPOSE_MODES
+)
+from image_cache import ImageCache, encode_jpeg, decode_upload
+from image_store import ImageStore, LocalImageStore, MemoryImageStore, S3ImageStore, content_digest
+from landmark_store import LandmarkEntry, LandmarkStore, face_array, landmark_array
+from face_detector import IRIS_LANDMARK_COUNT, TieredFaceDetector
+from beauty_score import MIN_LANDMARKS, score_landmarks
+from landmark_codec import LANDMARK_HEADERS, encode_landmarks, negotiate_landmark_format
+from preview_store import PreviewSession, PreviewStore, preview_scale, downscale
+from lineage import LineageStore
+from worker_pool import WorkerPool, WorkerPoolFull
+from gpt_client import GPTClient
+from analysis_cache import AnalysisCache
 
 # 환경 변수 로드
 load_dotenv()
 
-# OpenAI 클라이언트 초기화
-openai.api_key = os.getenv("OPENAI_API_KEY")
-client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+# OpenAI 클라이언트 초기화 (비동기, 커넥션 풀 + 동시 호출 제한 + 동일 요청 병합)
+gpt_client = GPTClient(
+    api_key=os.getenv("OPENAI_API_KEY"),
+    base_url=os.getenv("OPENAI_BASE_URL"),  # 로컬 스텁 서버로 테스트할 때 지정
+    max_concurrency=int(os.getenv("GPT_MAX_CONCURRENCY", "8")),
+    timeout=float(os.getenv("GPT_TIMEOUT_SECONDS", "30")),
+    max_connections=int(os.getenv("GPT_MAX_CONNECTIONS", "20"))
+)
+
+# GPT 분석 응답 캐시 (완성된 프롬프트 지문 기반, SQLite)
+analysis_cache = AnalysisCache(
+    path=os.getenv("GPT_CACHE_PATH", "analysis_cache.sqlite3"),
+    ttl_seconds=float(os.getenv("GPT_CACHE_TTL_SECONDS", str(7 * 24 * 3600))),
+    max_entries=int(os.getenv("GPT_CACHE_MAX_ENTRIES", "10000"))
+)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """시작 시 이미지 저장소 스위퍼 실행, 종료 시 워커 풀/GPT 커넥션/SQLite 정리 및 미기록 이미지 기록
+    
+    저장소와 캐시는 아래에서 모듈 전역으로 만들어지고, 이 함수는 앱이 시작될 때 호출된다.
+    """
+    # 만료/용량 초과 이미지 파일을 주기적으로 정리하는 백그라운드 작업
+    sweeper_task = asyncio.create_task(image_store.run_sweeper(IMAGE_SWEEP_INTERVAL_SECONDS))
+    try:
+        yield
+    finally:
+        sweeper_task.cancel()
+        # 실행 중인 작업을 기다리는 동안 이벤트 루프(다른 종료 처리)를 막지 않음
+        await asyncio.to_thread(worker_pool.shutdown)
+        image_cache.flush_all()
+        lineage_store.close()
+        await gpt_client.aclose()
+        analysis_cache.close()
 
 # 앱 초기화
 app = FastAPI(
     title="Face Simulator API",
     description="얼굴 성형 시뮬레이터 백엔드 API",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS 설정
@@ -37,52 +84,246 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Image-Id", "X-Displacement-Error-Bound", "ETag", "Content-Range", *LANDMARK_HEADERS],  # 결과 메타데이터 헤더
 )
 
-# MediaPipe 초기화
-mp_face_mesh = mp.solutions.face_mesh
-mp_drawing = mp.solutions.drawing_utils
-mp_drawing_styles = mp.solutions.drawing_styles
-
-# 전역 변수
-face_mesh = mp_face_mesh.FaceMesh(
-    static_image_mode=True,
-    max_num_faces=10,  # 여러 얼굴 감지를 위해 증가
-    refine_landmarks=True,
-    min_detection_confidence=0.5
+# MediaPipe 얼굴 검출 (축소 이미지 단일 얼굴 → 얼굴 영역별 원본 해상도 메시 → 전체 이미지, face_detector 참고)
+face_detector = TieredFaceDetector(
+    tiered=os.getenv("FACE_DETECT_TIERED", "true").lower() == "true",
+    fast_max_side=int(os.getenv("FACE_FAST_MAX_SIDE", "960")),
+    fast_min_score=float(os.getenv("FACE_FAST_MIN_SCORE", "0.8")),
+    crop_scale=float(os.getenv("FACE_CROP_SCALE", "2.0")),
+    crop_max_side=int(os.getenv("FACE_CROP_MAX_SIDE", "1024"))
 )
 
-# 임시 파일 저장 디렉토리
+# CPU 작업용 워커 풀 (대기열이 가득 차면 503 + Retry-After)
+WORKER_POOL_SIZE = int(os.getenv("WORKER_POOL_SIZE", str(os.cpu_count() or 4)))
+WORKER_QUEUE_LIMIT = int(os.getenv("WORKER_QUEUE_LIMIT", str(WORKER_POOL_SIZE * 4)))
+WORKER_RETRY_AFTER = int(os.getenv("WORKER_RETRY_AFTER", "1"))
+worker_pool = WorkerPool(WORKER_POOL_SIZE, WORKER_QUEUE_LIMIT, WORKER_RETRY_AFTER)
+
+# 뷰티 점수 일괄 계산 한 요청에 허용하는 최대 이미지 수
+BEAUTY_BATCH_MAX_IMAGES = int(os.getenv("BEAUTY_BATCH_MAX_IMAGES", "256"))
+
+# 업로드 파일 크기 한도와 작업 해상도 (긴 변이 더 크면 축소 디코딩, 0이면 원본 해상도 유지)
+UPLOAD_MAX_MB = float(os.getenv("UPLOAD_MAX_MB", "25"))
+UPLOAD_MAX_SIDE = int(os.getenv("UPLOAD_MAX_SIDE", "4000"))
+UPLOAD_CHUNK_BYTES = 1024 * 1024
+
+# 배치 워핑 한 요청에 허용하는 최대 연산 수
+WARP_BATCH_MAX_OPERATIONS = int(os.getenv("WARP_BATCH_MAX_OPERATIONS", "500"))
+
+# 프리뷰 워핑 프록시 해상도 (긴 변 픽셀)와 보관할 프리뷰 세션 수
+PREVIEW_MAX_SIDE = int(os.getenv("PREVIEW_MAX_SIDE", "1024"))
+PREVIEW_MAX_SESSIONS = int(os.getenv("PREVIEW_MAX_SESSIONS", "4096"))
+preview_store = PreviewStore(PREVIEW_MAX_SESSIONS)
+
+def preview_proxy_id(image_id: str) -> str:
+    """원본별 축소 프록시 이미지의 캐시 키"""
+    return f"{image_id}-preview{PREVIEW_MAX_SIDE}"
+
+# 이미지 저장소 (local: 임시 파일 디렉토리, memory, s3: S3 호환 스토리지)
+# 마지막 접근 후 TTL 만료, 용량 한도 초과 시 LRU 축출
 TEMP_DIR = "temp_images"
-os.makedirs(TEMP_DIR, exist_ok=True)
-
-def select_largest_face(multi_face_landmarks):
-    """여러 얼굴 중 가장 큰 얼굴을 선택"""
-    if not multi_face_landmarks:
-        return None, False
-    
-    if len(multi_face_landmarks) == 1:
-        return multi_face_landmarks[0], False
-    
-    # 여러 얼굴이 있는 경우 가장 큰 얼굴 찾기
-    largest_face = None
-    largest_area = 0
-    
-    for face_landmarks in multi_face_landmarks:
-        # 얼굴 경계 박스 계산
-        min_x = min([landmark.x for landmark in face_landmarks.landmark])
-        max_x = max([landmark.x for landmark in face_landmarks.landmark])
-        min_y = min([landmark.y for landmark in face_landmarks.landmark])
-        max_y = max([landmark.y for landmark in face_landmarks.landmark])
-        
-        # 면적 계산
-        area = (max_x - min_x) * (max_y - min_y)
-        
-        if area > largest_area:
-            largest_area = area
-            largest_face = face_landmarks
+IMAGE_STORE_BACKEND = os.getenv("IMAGE_STORE_BACKEND", "local")
+IMAGE_TTL_SECONDS = float(os.getenv("IMAGE_TTL_SECONDS", str(24 * 3600)))
+IMAGE_STORE_MAX_MB = int(os.getenv("IMAGE_STORE_MAX_MB", "2048"))
+IMAGE_SWEEP_INTERVAL_SECONDS = float(os.getenv("IMAGE_SWEEP_INTERVAL_SECONDS", "60"))
+
+if IMAGE_STORE_BACKEND == "s3":
+    image_store: ImageStore = S3ImageStore(
+        bucket=os.getenv("S3_BUCKET", "face-simulator-images"),
+        ttl_seconds=IMAGE_TTL_SECONDS,
+        max_bytes=IMAGE_STORE_MAX_MB * 1024 * 1024,
+        prefix=os.getenv("S3_PREFIX", "temp_images"),
+        endpoint_url=os.getenv("S3_ENDPOINT_URL"),  # MinIO 등 S3 호환 서버
+        region_name=os.getenv("S3_REGION")
+    )
+elif IMAGE_STORE_BACKEND == "memory":
+    image_store = MemoryImageStore(IMAGE_TTL_SECONDS, IMAGE_STORE_MAX_MB * 1024 * 1024)
+else:
+    image_store = LocalImageStore(TEMP_DIR, IMAGE_TTL_SECONDS, IMAGE_STORE_MAX_MB * 1024 * 1024)
+
+# 디코딩된 이미지 캐시 (워핑 결과는 축출/다운로드 시점에만 디스크 기록)
+IMAGE_CACHE_MAX_MB = int(os.getenv("IMAGE_CACHE_MAX_MB", "512"))
+image_cache = ImageCache(image_store, IMAGE_CACHE_MAX_MB * 1024 * 1024)
+
+# 파생 이미지 이력 (부모 + 연산만 기록, N단계마다 체크포인트 이미지 저장, 나머지는 요청 시 복원)
+lineage_store = LineageStore(
+    path=os.getenv("LINEAGE_DB_PATH", "lineage.sqlite3"),
+    checkpoint_interval=int(os.getenv("LINEAGE_CHECKPOINT_INTERVAL", "10")),
+    ttl_seconds=float(os.getenv("LINEAGE_TTL_SECONDS", str(7 * 24 * 3600)))
+)
+
+# 랜드마크 캐시 (파생 이미지는 부모 랜드마크를 변위장으로 이동시켜 추정)
+LANDMARK_CACHE_MAX_ENTRIES = int(os.getenv("LANDMARK_CACHE_MAX_ENTRIES", "4096"))
+landmark_store = LandmarkStore(LANDMARK_CACHE_MAX_ENTRIES)
+
+def forget_image(image_id: str):
+    """만료/축출된 이미지의 메모리 캐시, 랜드마크, 프리뷰 세션 정리"""
+    image_cache.discard(image_id)
+    image_cache.discard(preview_proxy_id(image_id))
+    landmark_store.discard(image_id)
+    preview_store.discard(image_id)
+
+image_store.on_evict = forget_image
+# 파생 이미지가 남아 있는 원본/체크포인트는 TTL/용량 정리에서 제외 (자식 복원 기준)
+image_store.is_pinned = lineage_store.has_children
+
+# 워핑 연산 파라미터 (lineage 기록과 apply_warp 인자 이름이 같음)
+WARP_OPERATION_FIELDS = (
+    "start_x", "start_y", "end_x", "end_y",
+    "influence_radius", "strength", "mode", "ellipse_ratio", "ellipse_angle"
+)
+
+def warp_operation_dict(operation) -> Dict[str, Any]:
+    """WarpRequest/WarpOperation에서 워핑 파라미터만 추출"""
+    return {field: getattr(operation, field) for field in WARP_OPERATION_FIELDS}
+
+def pull_operation_list(operation: PullOperation) -> List[Optional[float]]:
+    """당기기 연산을 JSON으로 기록할 수 있는 float 목록으로 변환"""
+    return [None if value is None else float(value) for value in operation]
+
+def apply_lineage_operation(image_rgb: np.ndarray, operation: Dict[str, Any]) -> np.ndarray:
+    """lineage 연산 적용 (요청 처리와 복원이 같은 코드 경로를 사용)
     
-    return largest_face, True  # True는 여러 얼굴이 있었음을 의미
+    kind=warp: 워핑 연산 목록을 순서대로 적용
+    kind=pull: 프리셋 당기기 연산 목록을 compose_mode로 합성해서 적용
+               (groups가 있으면 얼굴별 연산 묶음을 얼굴 ROI별로 합성)
+    """
+    if operation["kind"] == "pull" and "groups" in operation:
+        return apply_pull_operation_groups(
+            image_rgb,
+            [[tuple(values) for values in operations] for operations in operation["groups"]],
+            operation["compose_mode"]
+        )
+    
+    if operation["kind"] == "pull":
+        return apply_pull_operations(
+            image_rgb,
+            [tuple(values) for values in operation["operations"]],
+            operation["compose_mode"]
+        )
+    
+    warped_image = image_rgb
+    for params in operation["operations"]:
+        warped_image = apply_warp(warped_image, **params)
+    if warped_image is image_rgb:
+        # 모든 연산이 알 수 없는 모드였던 경우 캐시 배열을 공유하지 않도록 복사
+        warped_image = image_rgb.copy()
+    return warped_image
+
+def store_derived_image(parent_id: str, new_image_id: str, image_rgb: np.ndarray,
+                        jpeg_bytes: bytes, operation: Dict[str, Any]):
+    """파생 이미지를 lineage에 기록하고 캐시에 등록
+    
+    체크포인트는 자식들의 복원 기준이므로 바로 저장소에 기록한다 (재시작해도 남음).
+    체크포인트가 아니면 volatile로 올려서 축출될 때 저장하지 않고, 다시 필요하면 부모에서 복원한다.
+    """
+    node = lineage_store.record(new_image_id, parent_id, operation)
+    if node.checkpoint:
+        image_store.write(new_image_id, jpeg_bytes)
+    image_cache.put(new_image_id, image_rgb, persisted=node.checkpoint, encoded=jpeg_bytes,
+                    volatile=not node.checkpoint)
+
+def reconstruct_image(image_id: str) -> Optional[np.ndarray]:
+    """저장소에 없는 파생 이미지를 가장 가까운 저장된 조상에서 연산을 다시 적용해서 복원
+    
+    lineage에 없으면 프리뷰 결과로 보고 세션 연산을 프록시에 다시 적용한다.
+    """
+    node = lineage_store.get(image_id)
+    if node is None:
+        return reconstruct_preview(image_id)
+    
+    # 부모도 저장소에 없으면 image_cache가 다시 이 함수로 재귀 복원
+    parent_rgb = image_cache.get(node.parent_id)
+    if parent_rgb is None:
+        return None
+    
+    print(f"Lineage 복원: {image_id} <- {node.parent_id} ({node.operation['kind']})")
+    lineage_store.touch(image_id)
+    return apply_lineage_operation(parent_rgb, node.operation)
+
+def reconstruct_preview(preview_id: str) -> Optional[np.ndarray]:
+    """캐시에서 밀려난 프리뷰 결과를 원본 프록시에 세션의 연산을 순서대로 다시 적용해서 복원"""
+    session = preview_store.get(preview_id)
+    if session is None:
+        return None
+    
+    proxy = preview_proxy(session.base_image_id)
+    if proxy is None:
+        return None
+    
+    print(f"프리뷰 복원: {preview_id} <- {session.base_image_id} ({len(session.operations)}개 연산)")
+    image_rgb = proxy[0]
+    for operation in session.operations:
+        image_rgb = warp_preview(image_rgb, operation, session.scale)
+    return image_rgb
+
+image_cache.loader = reconstruct_image
+
+def face_bounding_boxes(faces: np.ndarray) -> np.ndarray:
+    """얼굴별 경계 박스 (얼굴 수, 4) = min_x, min_y, max_x, max_y"""
+    return np.concatenate([faces[:, :, :2].min(axis=1), faces[:, :, :2].max(axis=1)], axis=1)
+
+def order_faces_by_size(faces: np.ndarray) -> np.ndarray:
+    """경계 박스 면적이 큰 얼굴부터의 인덱스 (면적이 같으면 검출 순서 유지)"""
+    if len(faces) <= 1:
+        return np.arange(len(faces))
+    
+    boxes = face_bounding_boxes(faces)
+    areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    
+    return np.argsort(-areas, kind="stable")
+
+def detect_landmarks(image_rgb: np.ndarray, iris: bool = False) -> Optional[LandmarkEntry]:
+    """MediaPipe로 얼굴 랜드마크 검출 (얼굴이 없으면 None)
+    
+    landmarks는 가장 큰 얼굴, faces는 검출된 모든 얼굴 (면적 큰 순)
+    iris면 홍채 랜드마크까지 478점으로 검출
+    """
+    height, width = image_rgb.shape[:2]
+    
+    # MediaPipe로 얼굴 랜드마크 검출
+    detection = face_detector.detect(image_rgb, iris=iris)
+    faces = detection.faces
+    
+    if len(faces) == 0:
+        return None
+    
+    # 여러 얼굴이 있었다면 경고 메시지 포함
+    warning_message = None
+    if len(faces) > 1:
+        warning_message = f"여러 명의 얼굴이 감지되었습니다. 가장 큰 얼굴을 자동으로 선택했습니다."
+    
+    # 면적 큰 순으로 정렬 후 정규화 좌표를 픽셀 좌표로 변환
+    pixel_faces = face_array(faces[order_faces_by_size(faces), :, :2] * (width, height), faces.shape[1])
+    
+    return LandmarkEntry(
+        landmarks=landmark_array(pixel_faces[0]),
+        image_width=width,
+        image_height=height,
+        warning_message=warning_message,
+        faces=pixel_faces,
+        tier=detection.tier
+    )
+
+def landmarks_cover(entry: LandmarkEntry, iris: bool = False) -> bool:
+    """캐시된 랜드마크가 요청에 충분한지 (468점이면 홍채가 없음)"""
+    return not iris or len(entry.landmarks) >= IRIS_LANDMARK_COUNT
+
+def get_or_detect_landmarks(image_id: str, image_rgb: np.ndarray, redetect: bool = False,
+                            iris: bool = False) -> Optional[LandmarkEntry]:
+    """캐시된 랜드마크 조회, 없거나 요청에 부족하거나 redetect면 검출 후 캐시"""
+    if not redetect:
+        entry = landmark_store.get(image_id)
+        if entry is not None and landmarks_cover(entry, iris):
+            return entry
+    
+    entry = detect_landmarks(image_rgb, iris=iris)
+    if entry is not None:
+        landmark_store.put(image_id, entry)
+    return entry
 
 # Pydantic 모델들
 class WarpRequest(BaseModel):
@@ -94,16 +335,34 @@ class WarpRequest(BaseModel):
     influence_radius: float = 80.0
     strength: float = 1.0
     mode: str = "pull"  # pull, push, expand, shrink
+    ellipse_ratio: Optional[float] = None  # 장축/단축 비율 (없으면 원형 브러시)
+    ellipse_angle: float = 0.0  # 장축 각도 (도, x축 기준)
+    preview: bool = False  # True면 축소 프록시 이미지에 적용 (좌표는 원본 기준)
+
+class WarpOperation(BaseModel):
+    start_x: float
+    start_y: float
+    end_x: float
+    end_y: float
+    influence_radius: float = 80.0
+    strength: float = 1.0
+    mode: str = "pull"  # pull, push, expand, shrink
+    ellipse_ratio: Optional[float] = None
+    ellipse_angle: float = 0.0
+
+class BatchWarpRequest(BaseModel):
+    image_id: str
+    operations: List[WarpOperation]  # 순서대로 적용
+
+class PreviewCommitRequest(BaseModel):
+    image_id: str  # 프리뷰 워핑 결과 image_id
 
 class PresetRequest(BaseModel):
     image_id: str
     preset_type: str  # lower_jaw, middle_jaw, cheek, front_protusion, back_slit
-
-class LandmarkResponse(BaseModel):
-    landmarks: List[Tuple[float, float]]
-    image_width: int
-    image_height: int
-    warning_message: Optional[str] = None
+    redetect: bool = False  # True면 캐시된 랜드마크 대신 다시 검출
+    compose_mode: str = COMPOSE_EXACT  # exact(맵 합성, remap 1회), sum(변위 합산 근사), sequential(연산마다 remap)
+    all_faces: bool = False  # True면 가장 큰 얼굴만이 아니라 검출된 모든 얼굴에 적용
 
 class ImageResponse(BaseModel):
     image_id: str
@@ -119,6 +378,10 @@ class BeautyComparisonResponse(BaseModel):
     recommendations: List[str]  # GPT 추천사항
     analysis_text: str  # 상세 분석 텍스트
 
+class BeautyScoreBatchRequest(BaseModel):
+    image_ids: List[str]
+    redetect: bool = False  # True면 캐시된 랜드마크 대신 다시 검출
+
 class InitialBeautyAnalysisRequest(BaseModel):
     beauty_analysis: Dict[str, Any]  # 뷰티 분석 결과
 
@@ -131,6 +394,21 @@ class InitialBeautyAnalysisResponse(BaseModel):
 async def root():
     return {"message": "Face Simulator API", "status": "running"}
 
+@app.get("/cache/stats")
+async def get_cache_stats():
+    """이미지/랜드마크 캐시 및 워커 풀 상태 조회"""
+    return {
+        "images": image_cache.stats(),
+        "storage": image_store.stats(),
+        "landmarks": landmark_store.stats(),
+        "face_detection": face_detector.stats(),
+        "previews": preview_store.stats(),
+        "lineage": lineage_store.stats(),
+        "workers": worker_pool.stats(),
+        "gpt": gpt_client.stats(),
+        "analysis": analysis_cache.stats()
+    }
+
 @app.post("/upload-image")
 async def upload_image(file: UploadFile = File(...)):
     """이미지 업로드 및 ID 반환"""
@@ -139,235 +417,632 @@ async def upload_image(file: UploadFile = File(...)):
         if not file.content_type.startswith("image/"):
             raise HTTPException(status_code=400, detail="이미지 파일만 업로드 가능합니다")
         
-        # 이미지 ID 생성
-        image_id = str(uuid.uuid4())
-        
-        # 파일 읽기 및 저장
-        contents = await file.read()
-        
-        # OpenCV로 이미지 읽기
-        nparr = np.frombuffer(contents, np.uint8)
-        image = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-        
-        if image is None:
-            raise HTTPException(status_code=400, detail="유효하지 않은 이미지 파일입니다")
-        
-        # RGB로 변환
-        image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-        
-        # 임시 파일로 저장
-        temp_path = os.path.join(TEMP_DIR, f"{image_id}.jpg")
-        cv2.imwrite(temp_path, cv2.cvtColor(image_rgb, cv2.COLOR_RGB2BGR))
+        # 파일 읽기 (한도를 넘으면 끝까지 읽지 않고 413)
+        contents = await read_upload_limited(file, int(UPLOAD_MAX_MB * 1024 * 1024))
         
-        # 이미지 크기 정보
-        height, width = image_rgb.shape[:2]
-        
-        return {
-            "image_id": image_id,
-            "width": width,
-            "height": height,
-            "message": "이미지 업로드 성공"
-        }
+        return await worker_pool.run(process_upload_image, contents)
         
+    except WorkerPoolFull:
+        raise
     except Exception as e:
+        if "업로드 가능합니다" in str(e) or "유효하지 않은 이미지" in str(e):
+            raise e
         raise HTTPException(status_code=500, detail=f"이미지 업로드 실패: {str(e)}")
 
+async def read_upload_limited(file: UploadFile, max_bytes: int) -> bytes:
+    """업로드 파일을 청크 단위로 읽으면서 크기 한도 확인"""
+    too_large = HTTPException(status_code=413, detail=f"이미지 파일은 최대 {UPLOAD_MAX_MB:g}MB까지 업로드 가능합니다")
+    if file.size is not None and file.size > max_bytes:
+        raise too_large
+    
+    buffer = bytearray()
+    while True:
+        chunk = await file.read(UPLOAD_CHUNK_BYTES)
+        if not chunk:
+            break
+        buffer += chunk
+        if len(buffer) > max_bytes:
+            raise too_large
+    return bytes(buffer)
+
+def process_upload_image(contents: bytes) -> Dict[str, Any]:
+    """업로드 이미지 디코딩 및 저장 (워커 스레드)
+    
+    image_id는 업로드마다 새로 발급하고, 같은 내용이 이미 저장되어 있으면(다른 노드가 올린 것 포함)
+    그 blob을 공유해서 저장을 건너뛴다 (한쪽을 삭제해도 다른 쪽은 남음).
+    """
+    # 고유 ID 생성
+    image_id = str(uuid.uuid4())
+    
+    # 작업 해상도로 디코딩 (큰 이미지는 축소 디코딩, EXIF 회전 적용)
+    decoded = decode_upload(contents, UPLOAD_MAX_SIDE)
+    
+    if decoded is None:
+        raise HTTPException(status_code=400, detail="유효하지 않은 이미지 파일입니다")
+    
+    image_rgb, keep_original = decoded
+    
+    # 저장 (그대로 다시 디코딩되는 JPEG는 재인코딩 없이 원본 바이트 저장, 같은 내용이 있으면 인코딩도 생략)
+    # 디코딩된 배열은 캐시에 남겨서 첫 랜드마크 검출이 저장소를 읽지 않게 함
+    image_store.write_upload(image_id, content_digest(contents),
+                             lambda: contents if keep_original else encode_jpeg(image_rgb))
+    image_cache.put(image_id, image_rgb, persisted=True)
+    
+    # 이미지 크기 정보
+    height, width = image_rgb.shape[:2]
+    
+    return {
+        "image_id": image_id,
+        "width": width,
+        "height": height,
+        "message": "이미지 업로드 성공"
+    }
+
 @app.get("/landmarks/{image_id}")
-async def get_face_landmarks(image_id: str):
-    """얼굴 랜드마크 검출"""
+async def get_face_landmarks(image_id: str, http_request: Request, redetect: bool = False,
+                             all_faces: bool = False, iris: bool = False):
+    """얼굴 랜드마크 검출 (캐시 우선, redetect=true면 다시 검출)
+    
+    기본은 JSON이고, Accept 헤더로 float32/int16/msgpack 압축 형식을 요청할 수 있다 (landmark_codec 참고).
+    all_faces=true면 가장 큰 얼굴과 함께 검출된 모든 얼굴(faces, 면적 큰 순)도 보낸다.
+    iris=true면 홍채를 포함한 478점을 보낸다 (기본은 468점).
+    """
     try:
-        temp_path = os.path.join(TEMP_DIR, f"{image_id}.jpg")
-        
-        if not os.path.exists(temp_path):
-            raise HTTPException(status_code=404, detail="이미지를 찾을 수 없습니다")
-        
-        # 이미지 로드
-        image = cv2.imread(temp_path)
-        image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-        height, width = image_rgb.shape[:2]
-        
-        # MediaPipe로 얼굴 랜드마크 검출
-        results = face_mesh.process(image_rgb)
+        entry = None if redetect else landmark_store.get(image_id)
         
-        if not results.multi_face_landmarks:
-            raise HTTPException(status_code=404, detail="얼굴을 찾을 수 없습니다")
-        
-        # 가장 큰 얼굴 선택
-        face_landmarks, has_multiple_faces = select_largest_face(results.multi_face_landmarks)
+        if entry is None or not landmarks_cover(entry, iris):
+            entry = await worker_pool.run(process_landmarks, image_id, iris)
         
-        if face_landmarks is None:
+        if entry is None:
             raise HTTPException(status_code=404, detail="얼굴을 찾을 수 없습니다")
         
-        # 여러 얼굴이 있었다면 경고 메시지 포함
-        warning_message = None
-        if has_multiple_faces:
-            warning_message = f"여러 명의 얼굴이 감지되었습니다. 가장 큰 얼굴을 자동으로 선택했습니다."
-        
-        # 랜드마크 좌표 추출
-        landmarks = []
-        
-        for landmark in face_landmarks.landmark:
-            x = landmark.x * width
-            y = landmark.y * height
-            landmarks.append((x, y))
-        
-        return LandmarkResponse(
-            landmarks=landmarks,
-            image_width=width,
-            image_height=height,
-            warning_message=warning_message
-        )
+        # 응답 모델 검증/직렬화를 거치지 않고 바로 인코딩 (JSON 구조는 landmark_codec 참고)
+        media_type = negotiate_landmark_format(http_request.headers.get("accept", ""))
+        body, headers = encode_landmarks(entry, media_type, all_faces=all_faces)
+        return Response(content=body, media_type=media_type, headers=headers)
         
+    except WorkerPoolFull:
+        raise
     except Exception as e:
         if "이미지를 찾을 수 없습니다" in str(e) or "얼굴을 찾을 수 없습니다" in str(e):
             raise e
         raise HTTPException(status_code=500, detail=f"랜드마크 검출 실패: {str(e)}")
 
+def process_landmarks(image_id: str, iris: bool = False) -> Optional[LandmarkEntry]:
+    """이미지 로드 후 랜드마크 검출 (워커 스레드)"""
+    # 이미지 로드
+    image_rgb = image_cache.get(image_id)
+    
+    if image_rgb is None:
+        raise HTTPException(status_code=404, detail="이미지를 찾을 수 없습니다")
+    
+    return get_or_detect_landmarks(image_id, image_rgb, redetect=True, iris=iris)
+
+def wants_binary_image(http_request: Request, response_format: str) -> bool:
+    """결과 이미지를 JSON(base64) 대신 JPEG 바이트로 보낼지 여부"""
+    if response_format == "binary":
+        return True
+    return "image/jpeg" in http_request.headers.get("accept", "")
+
+def image_result_response(new_image_id: str, jpeg_bytes: bytes, binary: bool,
+                          headers: Optional[Dict[str, str]] = None):
+    """결과 이미지 응답 (binary면 JPEG 바이트 + X-Image-Id 헤더, 아니면 base64 JSON)"""
+    if binary:
+        return Response(
+            content=jpeg_bytes,
+            media_type="image/jpeg",
+            headers={"X-Image-Id": new_image_id, **(headers or {})}
+        )
+    
+    # Base64로 인코딩하여 반환
+    image_response = ImageResponse(
+        image_id=new_image_id,
+        image_data=base64.b64encode(jpeg_bytes).decode()
+    )
+    if headers:
+        return JSONResponse(content=jsonable_encoder(image_response), headers=headers)
+    return image_response
+
 @app.post("/warp-image")
-async def warp_image(request: WarpRequest):
-    """이미지 워핑(자유변형) 적용"""
+async def warp_image(request: WarpRequest, http_request: Request,
+                     response_format: str = Query("json", alias="format")):
+    """이미지 워핑(자유변형) 적용 (format=binary 또는 Accept: image/jpeg면 JPEG 바이트 응답)
+    
+    preview=true면 축소 프록시에 적용한 프리뷰 이미지를 반환하고, /warp-image/commit으로 원본 해상도에 반영한다.
+    """
     try:
-        temp_path = os.path.join(TEMP_DIR, f"{request.image_id}.jpg")
-        
-        if not os.path.exists(temp_path):
-            raise HTTPException(status_code=404, detail="이미지를 찾을 수 없습니다")
-        
-        # 이미지 로드
-        image = cv2.imread(temp_path)
-        image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+        process = process_warp_preview if request.preview else process_warp_image
+        new_image_id, jpeg_bytes = await worker_pool.run(process, request)
+        return image_result_response(new_image_id, jpeg_bytes, wants_binary_image(http_request, response_format))
         
-        # 워핑 적용
-        warped_image = apply_warp(
-            image_rgb,
-            start_x=request.start_x,
-            start_y=request.start_y,
-            end_x=request.end_x,
-            end_y=request.end_y,
-            influence_radius=request.influence_radius,
-            strength=request.strength,
-            mode=request.mode
+    except WorkerPoolFull:
+        raise
+    except Exception as e:
+        if "이미지를 찾을 수 없습니다" in str(e):
+            raise e
+        raise HTTPException(status_code=500, detail=f"이미지 워핑 실패: {str(e)}")
+
+def process_warp_image(request: WarpRequest) -> Tuple[str, bytes]:
+    """이미지 워핑 및 결과 JPEG 인코딩 (워커 스레드)"""
+    # 이미지 로드
+    image_rgb = image_cache.get(request.image_id)
+    
+    if image_rgb is None:
+        raise HTTPException(status_code=404, detail="이미지를 찾을 수 없습니다")
+    
+    # 워핑 적용
+    operation = {"kind": "warp", "operations": [warp_operation_dict(request)]}
+    warped_image = apply_lineage_operation(image_rgb, operation)
+    
+    # 새로운 UUID로 결과 이미지 캐시 등록 (원본 보존, 디스크 기록은 지연)
+    # 한 번 인코딩한 JPEG를 응답과 디스크 사본에 함께 사용
+    new_image_id = str(uuid.uuid4())
+    jpeg_bytes = encode_jpeg(warped_image)
+    store_derived_image(request.image_id, new_image_id, warped_image, jpeg_bytes, operation)
+    
+    # 부모 랜드마크가 있으면 같은 변위장으로 이동시켜 상속
+    height, width = image_rgb.shape[:2]
+    landmark_store.derive(
+        request.image_id, new_image_id,
+        lambda points: warp_points(
+            points, width, height,
+            request.start_x, request.start_y,
+            request.end_x, request.end_y,
+            request.influence_radius, request.strength,
+            request.mode, request.ellipse_ratio, request.ellipse_angle
         )
+    )
+    
+    return new_image_id, jpeg_bytes
+
+def preview_proxy(base_image_id: str) -> Optional[Tuple[np.ndarray, float]]:
+    """원본별 축소 프록시와 축소 비율 (원본이 없으면 None)
+    
+    프록시는 한 번만 만들어 캐시한다 (원본에서 다시 만들 수 있으므로 저장소에 기록하지 않음).
+    """
+    image_rgb = image_cache.get(base_image_id)
+    if image_rgb is None:
+        return None
+    
+    height, width = image_rgb.shape[:2]
+    scale = preview_scale(width, height, PREVIEW_MAX_SIDE)
+    proxy_id = preview_proxy_id(base_image_id)
+    proxy = image_cache.get(proxy_id)
+    if proxy is None:
+        proxy = image_cache.put(proxy_id, downscale(image_rgb, scale), volatile=True)
+    return proxy, scale
+
+def warp_preview(source: np.ndarray, operation: WarpOperation, scale: float) -> np.ndarray:
+    """원본 좌표계 연산을 프록시 좌표로 변환해서 적용 (픽셀 중심 기준)"""
+    return apply_warp(
+        source,
+        start_x=(operation.start_x + 0.5) * scale - 0.5,
+        start_y=(operation.start_y + 0.5) * scale - 0.5,
+        end_x=(operation.end_x + 0.5) * scale - 0.5,
+        end_y=(operation.end_y + 0.5) * scale - 0.5,
+        influence_radius=operation.influence_radius * scale,
+        strength=operation.strength,
+        mode=operation.mode,
+        ellipse_ratio=operation.ellipse_ratio,
+        ellipse_angle=operation.ellipse_angle
+    )
+
+def process_warp_preview(request: WarpRequest) -> Tuple[str, bytes]:
+    """프록시 해상도 워핑 (워커 스레드)
+    
+    request.image_id가 원본이면 새 프리뷰 세션을 시작하고, 프리뷰 결과면 그 세션에 연산을 이어 붙인다.
+    """
+    session = preview_store.get(request.image_id)
+    
+    if session is None:
+        proxy = preview_proxy(request.image_id)
         
-        # 새로운 UUID로 결과 이미지 저장 (원본 보존)
-        import uuid
-        new_image_id = str(uuid.uuid4())
-        new_temp_path = os.path.join(TEMP_DIR, f"{new_image_id}.jpg")
-        cv2.imwrite(new_temp_path, cv2.cvtColor(warped_image, cv2.COLOR_RGB2BGR))
+        if proxy is None:
+            raise HTTPException(status_code=404, detail="이미지를 찾을 수 없습니다")
         
-        # Base64로 인코딩하여 반환
-        pil_image = Image.fromarray(warped_image)
-        buffer = io.BytesIO()
-        pil_image.save(buffer, format='JPEG', quality=95)
-        img_base64 = base64.b64encode(buffer.getvalue()).decode()
+        source, scale = proxy
+        session = PreviewSession(request.image_id, (), scale)
+    else:
+        # 캐시에서 밀려난 프리뷰 결과는 reconstruct_preview로 복원됨
+        source = image_cache.get(request.image_id)
         
-        return ImageResponse(
-            image_id=new_image_id,
-            image_data=img_base64
-        )
+        if source is None:
+            raise HTTPException(status_code=404, detail="이미지를 찾을 수 없습니다")
+    
+    operation = WarpOperation(
+        start_x=request.start_x,
+        start_y=request.start_y,
+        end_x=request.end_x,
+        end_y=request.end_y,
+        influence_radius=request.influence_radius,
+        strength=request.strength,
+        mode=request.mode,
+        ellipse_ratio=request.ellipse_ratio,
+        ellipse_angle=request.ellipse_angle
+    )
+    scale = session.scale
+    warped_image = warp_preview(source, operation, scale)
+    if warped_image is source:
+        warped_image = source.copy()
+    
+    # 프리뷰 결과는 드래그 중에만 쓰이므로 축출되면 기록하지 않고 버림 (다운로드 시에만 기록)
+    new_image_id = str(uuid.uuid4())
+    jpeg_bytes = encode_jpeg(warped_image)
+    image_cache.put(new_image_id, warped_image, encoded=jpeg_bytes, volatile=True)
+    preview_store.put(new_image_id, PreviewSession(
+        session.base_image_id, session.operations + (operation,), scale
+    ))
+    
+    return new_image_id, jpeg_bytes
+
+@app.post("/warp-image/commit")
+async def commit_warp_preview(request: PreviewCommitRequest, http_request: Request,
+                              response_format: str = Query("json", alias="format")):
+    """프리뷰 워핑 연산들을 원본 해상도에서 다시 적용해서 최종 이미지 생성"""
+    try:
+        new_image_id, jpeg_bytes = await worker_pool.run(process_preview_commit, request)
+        return image_result_response(new_image_id, jpeg_bytes, wants_binary_image(http_request, response_format))
         
+    except WorkerPoolFull:
+        raise
     except Exception as e:
-        if "이미지를 찾을 수 없습니다" in str(e):
+        if "찾을 수 없습니다" in str(e):
             raise e
         raise HTTPException(status_code=500, detail=f"이미지 워핑 실패: {str(e)}")
 
-@app.get("/download-image/{image_id}")
-async def download_image(image_id: str):
-    """이미지 다운로드"""
+def process_preview_commit(request: PreviewCommitRequest) -> Tuple[str, bytes]:
+    """프리뷰 세션의 연산 목록을 원본 이미지에 일괄 적용 (워커 스레드)"""
+    session = preview_store.get(request.image_id)
+    
+    if session is None:
+        raise HTTPException(status_code=404, detail="프리뷰 세션을 찾을 수 없습니다")
+    
+    result = process_warp_batch(BatchWarpRequest(
+        image_id=session.base_image_id,
+        operations=list(session.operations)
+    ))
+    preview_store.record_commit()
+    return result
+
+@app.post("/warp-image/batch")
+async def warp_image_batch(request: BatchWarpRequest, http_request: Request,
+                           response_format: str = Query("json", alias="format")):
+    """여러 워핑 연산을 순서대로 적용하고 최종 이미지만 반환 (되돌리기/다시하기 재생용)"""
+    if not request.operations:
+        raise HTTPException(status_code=400, detail="적용할 워핑 연산이 없습니다")
+    if len(request.operations) > WARP_BATCH_MAX_OPERATIONS:
+        raise HTTPException(status_code=400,
+                            detail=f"워핑 연산은 최대 {WARP_BATCH_MAX_OPERATIONS}개까지 가능합니다")
+    
     try:
-        temp_path = os.path.join(TEMP_DIR, f"{image_id}.jpg")
-        
-        if not os.path.exists(temp_path):
-            raise HTTPException(status_code=404, detail="이미지를 찾을 수 없습니다")
-        
-        # 파일 스트리밍 응답
-        def iterfile(file_path: str):
-            with open(file_path, mode="rb") as file_like:
-                yield from file_like
-        
-        return StreamingResponse(
-            iterfile(temp_path),
-            media_type="image/jpeg",
-            headers={"Content-Disposition": f"attachment; filename=face_simulator_result_{image_id[:8]}.jpg"}
-        )
+        new_image_id, jpeg_bytes = await worker_pool.run(process_warp_batch, request)
+        return image_result_response(new_image_id, jpeg_bytes, wants_binary_image(http_request, response_format))
         
+    except WorkerPoolFull:
+        raise
     except Exception as e:
         if "이미지를 찾을 수 없습니다" in str(e):
             raise e
-        raise HTTPException(status_code=500, detail=f"이미지 다운로드 실패: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"이미지 워핑 실패: {str(e)}")
 
-@app.post("/apply-preset")
-async def apply_preset(request: PresetRequest):
-    """프리셋 적용"""
+def process_warp_batch(request: BatchWarpRequest) -> Tuple[str, bytes]:
+    """워핑 연산 목록 적용 및 결과 JPEG 인코딩 (워커 스레드)
+    
+    디코딩된 이미지 하나에 연산을 이어서 적용하고, 중간 결과는 캐시/인코딩하지 않는다.
+    """
+    image_rgb = image_cache.get(request.image_id)
+    
+    if image_rgb is None:
+        raise HTTPException(status_code=404, detail="이미지를 찾을 수 없습니다")
+    
+    operation = {"kind": "warp", "operations": [warp_operation_dict(op) for op in request.operations]}
+    warped_image = apply_lineage_operation(image_rgb, operation)
+    
+    # 최종 결과만 한 번 인코딩해서 응답과 디스크 사본에 함께 사용 (lineage에는 배치 전체가 한 단계)
+    new_image_id = str(uuid.uuid4())
+    jpeg_bytes = encode_jpeg(warped_image)
+    store_derived_image(request.image_id, new_image_id, warped_image, jpeg_bytes, operation)
+    
+    # 부모 랜드마크를 연산 순서대로 이동시켜 상속
+    height, width = image_rgb.shape[:2]
+    
+    def move_landmarks(points: np.ndarray) -> np.ndarray:
+        for operation in request.operations:
+            points = warp_points(
+                points, width, height,
+                operation.start_x, operation.start_y,
+                operation.end_x, operation.end_y,
+                operation.influence_radius, operation.strength,
+                operation.mode, operation.ellipse_ratio, operation.ellipse_angle
+            )
+        return points
+    
+    landmark_store.derive(request.image_id, new_image_id, move_landmarks)
+    
+    return new_image_id, jpeg_bytes
+
+def image_etag(image_id: str) -> str:
+    """이미지 ETag (image_id 내용은 바뀌지 않으므로 ID 자체가 검증자)"""
+    return f'"{image_id}"'
+
+def parse_byte_range(range_header: str, size: int) -> Optional[Tuple[int, int]]:
+    """단일 Range 헤더(bytes=a-b, a-, -n)를 [start, end] 바이트 구간으로 변환
+    
+    여러 구간이나 해석할 수 없는 형식이면 None (전체 응답), 범위를 벗어나면 416
+    """
+    unit, _, spec = range_header.partition("=")
+    if unit.strip() != "bytes" or "," in spec:
+        return None
+    start_text, _, end_text = spec.strip().partition("-")
     try:
-        temp_path = os.path.join(TEMP_DIR, f"{request.image_id}.jpg")
-        
-        if not os.path.exists(temp_path):
+        if start_text:
+            start = int(start_text)
+            end = int(end_text) if end_text else size - 1
+        else:
+            start = size - int(end_text)
+            end = size - 1
+    except ValueError:
+        return None
+    start = max(0, start)
+    end = min(end, size - 1)
+    if start > end:
+        raise HTTPException(status_code=416, detail="요청한 범위가 올바르지 않습니다",
+                            headers={"Content-Range": f"bytes */{size}"})
+    return start, end
+
+@app.get("/download-image/{image_id}")
+async def download_image(image_id: str, http_request: Request):
+    """이미지 다운로드
+    
+    image_id의 내용은 바뀌지 않으므로 ETag + 장기 Cache-Control로 브라우저/CDN이 캐시하게 하고,
+    If-None-Match가 맞으면 이미지를 읽지 않고 304를 보낸다. 로컬 파일은 FileResponse(sendfile)로 보내며 Range를 지원한다.
+    """
+    etag = image_etag(image_id)
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={int(IMAGE_TTL_SECONDS)}, immutable",
+        "Accept-Ranges": "bytes"
+    }
+    
+    if_none_match = http_request.headers.get("if-none-match", "")
+    if etag in [tag.strip() for tag in if_none_match.split(",")] or if_none_match.strip() == "*":
+        return Response(status_code=304, headers=headers)
+    
+    try:
+        # 캐시에만 있는 이미지는 먼저 디스크에 기록
+        if not await worker_pool.run(image_cache.flush, image_id):
             raise HTTPException(status_code=404, detail="이미지를 찾을 수 없습니다")
         
-        # 이미지 로드
-        image = cv2.imread(temp_path)
-        image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-        
-        # 얼굴 랜드마크 검출
-        results = face_mesh.process(image_rgb)
-        
-        if not results.multi_face_landmarks:
-            raise HTTPException(status_code=404, detail="얼굴을 찾을 수 없습니다")
-        
-        # 가장 큰 얼굴 선택
-        face_landmarks, has_multiple_faces = select_largest_face(results.multi_face_landmarks)
+        headers["Content-Disposition"] = f"attachment; filename=face_simulator_result_{image_id[:8]}.jpg"
+        temp_path = image_store.local_path(image_id)
         
-        if face_landmarks is None:
-            raise HTTPException(status_code=404, detail="얼굴을 찾을 수 없습니다")
+        if temp_path is not None:
+            # sendfile 기반 파일 응답 (Content-Length, Range/If-Range는 Starlette가 처리)
+            return FileResponse(temp_path, media_type="image/jpeg", headers=headers)
         
-        # 랜드마크 좌표 추출
-        height, width = image_rgb.shape[:2]
-        landmarks = []
-        
-        for landmark in face_landmarks.landmark:
-            x = landmark.x * width
-            y = landmark.y * height
-            landmarks.append((x, y))
-        
-        # 프리셋 적용
-        result_image = apply_preset_transformation(image_rgb, landmarks, request.preset_type)
-        
-        # 새로운 UUID로 결과 이미지 저장
-        new_image_id = str(uuid.uuid4())
-        new_temp_path = os.path.join(TEMP_DIR, f"{new_image_id}.jpg")
-        cv2.imwrite(new_temp_path, cv2.cvtColor(result_image, cv2.COLOR_RGB2BGR))
+        # 원격/메모리 저장소는 바이트를 받아서 응답 (Range는 직접 잘라서 처리)
+        data = await worker_pool.run(image_store.read, image_id)
+        if data is None:
+            raise HTTPException(status_code=404, detail="이미지를 찾을 수 없습니다")
         
-        # Base64로 인코딩하여 반환
-        pil_image = Image.fromarray(result_image)
-        buffer = io.BytesIO()
-        pil_image.save(buffer, format='JPEG', quality=95)
-        img_base64 = base64.b64encode(buffer.getvalue()).decode()
+        byte_range = None
+        range_header = http_request.headers.get("range")
+        if range_header and http_request.headers.get("if-range", etag) == etag:
+            byte_range = parse_byte_range(range_header, len(data))
+        if byte_range is None:
+            return Response(content=data, media_type="image/jpeg", headers=headers)
         
-        return ImageResponse(
-            image_id=new_image_id,
-            image_data=img_base64
-        )
+        start, end = byte_range
+        headers["Content-Range"] = f"bytes {start}-{end}/{len(data)}"
+        return Response(content=data[start:end + 1], status_code=206, media_type="image/jpeg", headers=headers)
         
+    except WorkerPoolFull:
+        raise
+    except Exception as e:
+        if "이미지를 찾을 수 없습니다" in str(e) or "범위" in str(e):
+            raise e
+        raise HTTPException(status_code=500, detail=f"이미지 다운로드 실패: {str(e)}")
+
+@app.post("/apply-preset")
+async def apply_preset(request: PresetRequest, http_request: Request,
+                       response_format: str = Query("json", alias="format")):
+    """프리셋 적용 (format=binary 또는 Accept: image/jpeg면 JPEG 바이트 응답)
+    
+    compose_mode=sum이면 변위 합산 근사의 좌표 오차 상한(픽셀)을 X-Displacement-Error-Bound 헤더로 보낸다.
+    """
+    if request.compose_mode not in COMPOSE_MODES:
+        raise HTTPException(status_code=400, detail=f"지원하지 않는 합성 방식입니다: {request.compose_mode}")
+    
+    try:
+        new_image_id, jpeg_bytes, error_bound = await worker_pool.run(process_preset, request)
+        headers = None
+        if error_bound is not None:
+            headers = {"X-Displacement-Error-Bound": f"{error_bound:.4f}"}
+        return image_result_response(new_image_id, jpeg_bytes, wants_binary_image(http_request, response_format), headers)
+        
+    except WorkerPoolFull:
+        raise
     except Exception as e:
         if "이미지를 찾을 수 없습니다" in str(e) or "얼굴을 찾을 수 없습니다" in str(e):
             raise e
         raise HTTPException(status_code=500, detail=f"프리셋 적용 실패: {str(e)}")
 
+def process_preset(request: PresetRequest) -> Tuple[str, bytes, Optional[float]]:
+    """프리셋 적용 및 결과 JPEG 인코딩 (워커 스레드)
+    
+    반환값의 마지막 항목은 compose_mode=sum일 때의 좌표 오차 상한 (그 외에는 None)
+    """
+    # 이미지 로드
+    image_rgb = image_cache.get(request.image_id)
+    
+    if image_rgb is None:
+        raise HTTPException(status_code=404, detail="이미지를 찾을 수 없습니다")
+    
+    # 얼굴 랜드마크 (캐시에 없으면 검출)
+    entry = get_or_detect_landmarks(request.image_id, image_rgb, redetect=request.redetect)
+    
+    if entry is None:
+        raise HTTPException(status_code=404, detail="얼굴을 찾을 수 없습니다")
+    
+    height, width = image_rgb.shape[:2]
+    
+    if request.all_faces and entry.faces is not None and len(entry.faces) > 1:
+        # 얼굴마다 연산을 만들고 얼굴 ROI별로 합성 (겹치는 얼굴은 하나의 맵으로 합침)
+        groups = [build_preset_operations(face, request.preset_type) for face in entry.faces]
+        operations = [op for group in groups for op in group]
+        operation = {
+            "kind": "pull",
+            "compose_mode": request.compose_mode,
+            "groups": [[pull_operation_list(op) for op in group] for group in groups]
+        }
+        clusters = [cluster_operations for _, cluster_operations in pull_operation_clusters(groups, width, height)]
+    else:
+        # 프리셋 적용 (기본: 모든 변위를 하나의 좌표 맵으로 합성해서 remap 한 번)
+        operations = build_preset_operations(entry.landmarks, request.preset_type)
+        operation = {
+            "kind": "pull",
+            "compose_mode": request.compose_mode,
+            "operations": [pull_operation_list(op) for op in operations]
+        }
+        clusters = [operations]
+    result_image = apply_lineage_operation(image_rgb, operation)
+    
+    error_bound = None
+    if request.compose_mode == COMPOSE_SUM:
+        # 클러스터끼리는 서로 영향이 없으므로 클러스터별 상한의 최대값
+        error_bound = max((sum_composition_error_bound(ops) for ops in clusters), default=0.0)
+    
+    # 새로운 UUID로 결과 이미지 캐시 등록 (디스크 기록은 지연, JPEG는 응답과 공유)
+    new_image_id = str(uuid.uuid4())
+    jpeg_bytes = encode_jpeg(result_image)
+    store_derived_image(request.image_id, new_image_id, result_image, jpeg_bytes, operation)
+    
+    # 같은 당기기 연산으로 랜드마크(모든 얼굴)를 이동시켜 결과 이미지에 상속
+    def move_landmarks(points: np.ndarray) -> np.ndarray:
+        for operation in operations:
+            points = pull_points(points, width, height, *operation)
+        return points
+    
+    landmark_store.derive(request.image_id, new_image_id, move_landmarks)
+    
+    return new_image_id, jpeg_bytes, error_bound
+
 @app.delete("/image/{image_id}")
 async def delete_image(image_id: str):
-    """임시 이미지 삭제"""
+    """임시 이미지 삭제
+    
+    이 이미지에서 바로 파생된 이미지들은 복원할 부모가 없어지므로 먼저 저장소에 기록한다.
+    """
     try:
-        temp_path = os.path.join(TEMP_DIR, f"{image_id}.jpg")
+        for child_id in lineage_store.children(image_id):
+            await worker_pool.run(image_cache.flush, child_id)
+        
+        in_cache = image_cache.discard(image_id)
+        image_cache.discard(preview_proxy_id(image_id))
+        landmark_store.discard(image_id)
+        preview_store.discard(image_id)
+        lineage_store.discard(image_id)
         
-        if os.path.exists(temp_path):
-            os.remove(temp_path)
+        if await asyncio.to_thread(image_store.delete, image_id):
+            return {"message": "이미지 삭제 성공"}
+        elif in_cache:
             return {"message": "이미지 삭제 성공"}
         else:
             return {"message": "이미지가 이미 삭제되었거나 존재하지 않습니다"}
             
+    except WorkerPoolFull:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"이미지 삭제 실패: {str(e)}")
 
+@app.get("/lineage/{image_id}")
+async def get_image_lineage(image_id: str):
+    """파생 이미지의 조상 이력 조회 (가까운 순, 업로드 원본은 root_image_id)
+
+    되돌리기는 이력의 parent_id로 이미지를 요청하면 되고, 저장되지 않은 버전은 서버가 복원한다.
+    """
+    chain = await asyncio.to_thread(lineage_store.chain, image_id)
+
+    if not chain and not await asyncio.to_thread(image_cache.exists, image_id):
+        raise HTTPException(status_code=404, detail="이미지를 찾을 수 없습니다")
+
+    return {
+        "image_id": image_id,
+        "root_image_id": chain[-1].parent_id if chain else image_id,
+        "history": [
+            {
+                "image_id": node.image_id,
+                "parent_id": node.parent_id,
+                "operation": node.operation,
+                "checkpoint": node.checkpoint
+            }
+            for node in chain
+        ]
+    }
+
+@app.post("/beauty-score/batch")
+async def beauty_score_batch(request: BeautyScoreBatchRequest):
+    """여러 이미지의 뷰티 점수를 서버에서 한 번에 계산
+    
+    각 결과의 analysis는 프론트엔드 calculateBeautyAnalysis와 같은 구조라 GPT 분석 요청에 그대로 쓸 수 있다.
+    이미지나 얼굴을 찾지 못한 항목은 error로 표시하고 나머지는 계속 계산한다.
+    """
+    if not request.image_ids:
+        raise HTTPException(status_code=400, detail="점수를 계산할 이미지가 없습니다")
+    if len(request.image_ids) > BEAUTY_BATCH_MAX_IMAGES:
+        raise HTTPException(status_code=400,
+                            detail=f"이미지는 최대 {BEAUTY_BATCH_MAX_IMAGES}개까지 가능합니다")
+    
+    try:
+        # 랜드마크 검출은 워커 수만큼 나눠서 병렬 처리
+        image_ids = list(dict.fromkeys(request.image_ids))
+        chunk_count = min(WORKER_POOL_SIZE, len(image_ids))
+        chunks = [image_ids[i::chunk_count] for i in range(chunk_count)]
+        found: Dict[str, Any] = {}
+        for chunk_result in await asyncio.gather(
+            *(worker_pool.run(process_beauty_landmarks, chunk, request.redetect) for chunk in chunks)
+        ):
+            found.update(chunk_result)
+        
+        scored_ids = [image_id for image_id in image_ids if isinstance(found[image_id], LandmarkEntry)]
+        analyses = {}
+        if scored_ids:
+            # 홍채 검출(iris) 여부에 따라 468/478점이 섞일 수 있으므로 점수에 쓰는 기본 468점만 사용
+            landmarks = np.stack([found[image_id].landmarks[:MIN_LANDMARKS] for image_id in scored_ids])
+            analyses = dict(zip(scored_ids, await worker_pool.run(score_landmarks, landmarks)))
+        
+        results = []
+        for image_id in request.image_ids:
+            if image_id in analyses:
+                results.append({
+                    "image_id": image_id,
+                    "analysis": analyses[image_id],
+                    "estimated": found[image_id].estimated
+                })
+            else:
+                results.append({"image_id": image_id, "error": found[image_id]})
+        
+        return {"results": results, "scored": len(scored_ids)}
+        
+    except WorkerPoolFull:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"뷰티 점수 계산 실패: {str(e)}")
+
+def process_beauty_landmarks(image_ids: List[str], redetect: bool) -> Dict[str, Any]:
+    """이미지별 랜드마크 조회/검출 (워커 스레드, 실패하면 오류 메시지 문자열)"""
+    found: Dict[str, Any] = {}
+    for image_id in image_ids:
+        entry = None if redetect else landmark_store.get(image_id)
+        if entry is None:
+            image_rgb = image_cache.get(image_id)
+            if image_rgb is None:
+                found[image_id] = "이미지를 찾을 수 없습니다"
+                continue
+            entry = get_or_detect_landmarks(image_id, image_rgb, redetect=True)
+        found[image_id] = entry if entry is not None else "얼굴을 찾을 수 없습니다"
+    return found
+
 @app.post("/analyze-beauty-comparison")
 async def analyze_beauty_comparison(request: BeautyComparisonRequest):
     """뷰티 점수 변화 분석 및 GPT 추천"""
@@ -416,8 +1091,12 @@ async def analyze_beauty_comparison(request: BeautyComparisonRequest):
         elif score_changes.get('overall', 0) < -2:
             overall_change = "declined"
         
-        # GPT-4o mini를 사용한 분석
-        analysis_result = await get_gpt_beauty_analysis(before, after, score_changes)
+        # GPT-4o mini를 사용한 분석 (같은 프롬프트면 캐시된 응답 사용)
+        system_prompt, user_prompt = build_comparison_prompt(before, after, score_changes)
+        analysis_result = await get_cached_gpt_analysis(
+            analysis_cache.prompt_fingerprint("comparison", system_prompt, user_prompt),
+            lambda: get_gpt_beauty_analysis(before, after, score_changes)
+        )
         
         return BeautyComparisonResponse(
             overall_change=overall_change,
@@ -432,14 +1111,32 @@ async def analyze_beauty_comparison(request: BeautyComparisonRequest):
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"뷰티 분석 비교 실패: {str(e)}")
 
+@app.post("/analyze-initial-beauty-score/stream")
+async def analyze_initial_beauty_score_stream(request: InitialBeautyAnalysisRequest):
+    """기초 뷰티스코어 GPT 분석 (Server-Sent Events 스트리밍)
+    
+    analysis / recommendations 이벤트로 텍스트 조각을 보내고,
+    마지막 done 이벤트로 InitialBeautyAnalysisResponse와 같은 필드를 보낸다.
+    """
+    return StreamingResponse(
+        stream_initial_beauty_analysis(request.beauty_analysis),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @app.post("/analyze-initial-beauty-score")
 async def analyze_initial_beauty_score(request: InitialBeautyAnalysisRequest):
     """기초 뷰티스코어 GPT 분석"""
     try:
         beauty_analysis = request.beauty_analysis
         
-        # GPT-4o mini를 사용한 기초 뷰티스코어 분석
-        analysis_result = await get_gpt_initial_beauty_analysis(beauty_analysis)
+        # GPT-4o mini를 사용한 기초 뷰티스코어 분석 (같은 프롬프트면 캐시된 응답 사용)
+        # 프롬프트는 점수를 잘라서 넣으므로 소수점 아래만 다른 점수는 같은 키가 됨
+        system_prompt, user_prompt, _ = build_initial_beauty_prompt(beauty_analysis)
+        analysis_result = await get_cached_gpt_analysis(
+            analysis_cache.prompt_fingerprint("initial", system_prompt, user_prompt),
+            lambda: get_gpt_initial_beauty_analysis(beauty_analysis)
+        )
         
         return InitialBeautyAnalysisResponse(
             analysis_text=analysis_result["analysis"],
@@ -453,210 +1150,59 @@ async def analyze_initial_beauty_score(request: InitialBeautyAnalysisRequest):
         raise HTTPException(status_code=500, detail=f"기초 뷰티스코어 GPT 분석 실패: {str(e)}")
 
 
-def apply_warp(image: np.ndarray, start_x: float, start_y: float, 
-               end_x: float, end_y: float, influence_radius: float, 
-               strength: float, mode: str) -> np.ndarray:
-    """워핑 변형 적용 함수"""
-    img_height, img_width = image.shape[:2]
-    
-    # 좌표 경계 검사
-    start_x = max(0, min(start_x, img_width - 1))
-    start_y = max(0, min(start_y, img_height - 1))
-    end_x = max(0, min(end_x, img_width - 1))
-    end_y = max(0, min(end_y, img_height - 1))
-    
-    print(f"워핑 모드: {mode}")
-    if mode == "pull":
-        return apply_pull_warp(image, start_x, start_y, end_x, end_y, influence_radius, strength)
-    elif mode == "push":
-        return apply_push_warp(image, start_x, start_y, end_x, end_y, influence_radius, strength)
-    elif mode == "expand":
-        print("확대 모드 실행 - expand=True")
-        return apply_radial_warp(image, start_x, start_y, influence_radius, strength, expand=True)
-    elif mode == "shrink":
-        print("축소 모드 실행 - expand=False")
-        return apply_radial_warp(image, start_x, start_y, influence_radius, strength, expand=False)
-    else:
-        print(f"알 수 없는 모드: {mode}")
-        return image
-
-def apply_pull_warp(image: np.ndarray, start_x: float, start_y: float,
-                   end_x: float, end_y: float, influence_radius: float, strength: float, ellipse_ratio: float = None) -> np.ndarray:
-    """당기기 워핑"""
-    img_height, img_width = image.shape[:2]
-    
-    # 드래그 벡터 (예전 방식: 반대 방향)
-    dx = start_x - end_x
-    dy = start_y - end_y
-    
-    # 변형 맵 생성
-    map_x = np.arange(img_width, dtype=np.float32).reshape(1, -1)
-    map_y = np.arange(img_height, dtype=np.float32).reshape(-1, 1)
-    map_x = np.repeat(map_x, img_height, axis=0)
-    map_y = np.repeat(map_y, img_width, axis=1)
-    
-    # 각 픽셀에서 시작점까지의 거리 계산
-    pixel_dx = map_x - start_x
-    pixel_dy = map_y - start_y
-    pixel_dist = np.sqrt(pixel_dx*pixel_dx + pixel_dy*pixel_dy)
-    
-    # 영향받는 영역 마스크
-    mask = pixel_dist < influence_radius
-    
-    # 변형 강도 계산
-    strength_map = np.zeros_like(pixel_dist)
-    valid_dist = pixel_dist[mask]
-    
-    if len(valid_dist) > 0:
-        strength_map[mask] = (1 - valid_dist / influence_radius) ** 2
-        strength_map[mask] *= strength
-        
-        # 변형 적용
-        map_x[mask] += dx * strength_map[mask]
-        map_y[mask] += dy * strength_map[mask]
-    
-    # 경계 클리핑
-    map_x = np.clip(map_x, 0, img_width - 1)
-    map_y = np.clip(map_y, 0, img_height - 1)
-    
-    # 리맵핑 적용
-    return cv2.remap(image, map_x, map_y, cv2.INTER_LINEAR, borderMode=cv2.BORDER_REFLECT)
-
-def apply_push_warp(image: np.ndarray, start_x: float, start_y: float,
-                   end_x: float, end_y: float, influence_radius: float, strength: float) -> np.ndarray:
-    """밀어내기 워핑"""
-    img_height, img_width = image.shape[:2]
-    
-    # 드래그 벡터
-    dx = end_x - start_x
-    dy = end_y - start_y
-    
-    # 변형 맵 생성
-    map_x = np.arange(img_width, dtype=np.float32).reshape(1, -1)
-    map_y = np.arange(img_height, dtype=np.float32).reshape(-1, 1)
-    map_x = np.repeat(map_x, img_height, axis=0)
-    map_y = np.repeat(map_y, img_width, axis=1)
-    
-    # 각 픽셀에서 시작점까지의 거리 계산
-    pixel_dx = map_x - start_x
-    pixel_dy = map_y - start_y
-    pixel_dist = np.sqrt(pixel_dx*pixel_dx + pixel_dy*pixel_dy)
-    
-    # 영향받는 영역 마스크
-    mask = pixel_dist < influence_radius
-    
-    # 변형 강도 계산
-    strength_map = np.zeros_like(pixel_dist)
-    valid_dist = pixel_dist[mask]
-    
-    if len(valid_dist) > 0:
-        strength_map[mask] = (1 - valid_dist / influence_radius) ** 2
-        strength_map[mask] *= strength
-        
-        # 변형 적용
-        map_x[mask] += dx * strength_map[mask]
-        map_y[mask] += dy * strength_map[mask]
-    
-    # 경계 클리핑
-    map_x = np.clip(map_x, 0, img_width - 1)
-    map_y = np.clip(map_y, 0, img_height - 1)
-    
-    # 리맵핑 적용
-    return cv2.remap(image, map_x, map_y, cv2.INTER_LINEAR, borderMode=cv2.BORDER_REFLECT)
-
-
-def apply_radial_warp(image: np.ndarray, center_x: float, center_y: float,
-                     influence_radius: float, strength: float, expand: bool = True) -> np.ndarray:
-    """방사형 워핑 (확대/축소)"""
-    img_height, img_width = image.shape[:2]
-    
-    # 변형 맵 생성
-    map_x = np.arange(img_width, dtype=np.float32).reshape(1, -1)
-    map_y = np.arange(img_height, dtype=np.float32).reshape(-1, 1)
-    map_x = np.repeat(map_x, img_height, axis=0)
-    map_y = np.repeat(map_y, img_width, axis=1)
-    
-    # 중심점으로부터의 거리와 각도
-    dx = map_x - center_x
-    dy = map_y - center_y
-    distance = np.sqrt(dx*dx + dy*dy)
-    
-    # 영향받는 영역
-    mask = distance < influence_radius
-    
-    # 변형 계수 계산
-    strength_factor = strength * 0.3
-    
-    if expand:
-        # 확대: 중심으로 가까워지게 (팽창 효과)
-        scale_factor = 1 - strength_factor * (1 - distance / influence_radius)
-    else:
-        # 축소: 중심에서 멀어지게 (수축 효과)
-        scale_factor = 1 + strength_factor * (1 - distance / influence_radius)
-    
-    scale_factor = np.maximum(scale_factor, 0.1)  # 최소 스케일 제한
-    
-    # 새로운 좌표 계산
-    new_x = center_x + dx * scale_factor
-    new_y = center_y + dy * scale_factor
-    
-    # 영향받는 영역만 업데이트
-    map_x = np.where(mask, new_x, map_x)
-    map_y = np.where(mask, new_y, map_y)
-    
-    # 경계 클리핑
-    map_x = np.clip(map_x, 0, img_width - 1)
-    map_y = np.clip(map_y, 0, img_height - 1)
-    
-    # 리맵핑 적용
-    return cv2.remap(image, map_x, map_y, cv2.INTER_LINEAR, borderMode=cv2.BORDER_REFLECT)
+# 프리셋 상수들 (face_simulator.py에서 가져옴)
+PRESET_CONFIGS = {
+    'lower_jaw': {
+        'strength': 0.05,
+        'influence_ratio': 0.4,
+        'pull_ratio': 0.1,
+        'face_size_landmarks': (234, 447),
+        'target_landmarks': (150, 379, 4)
+    },
+    'middle_jaw': {
+        'strength': 0.05,
+        'influence_ratio': 0.65,
+        'pull_ratio': 0.1,
+        'face_size_landmarks': (234, 447),
+        'target_landmarks': (172, 397, 4)
+    },
+    'cheek': {
+        'strength': 0.05,
+        'influence_ratio': 0.65,
+        'pull_ratio': 0.1,
+        'face_size_landmarks': (234, 447),
+        'target_landmarks': (215, 435, 4)
+    },
+    'front_protusion': {
+        'strength': 0.3,
+        'influence_ratio': 0.1,
+        'pull_ratio': 0.1,
+        'face_size_landmarks': (234, 447),
+        'target_landmarks': (243, 463, (56, 190), (414, 286), 168, 6),
+        'ellipse_ratio': 1.3
+    },
+    'back_slit': {
+        'strength': 0.5,
+        'influence_ratio': 0.1,
+        'pull_ratio': 0.1,
+        'face_size_landmarks': (234, 447),
+        'target_landmarks': (33, 359, (34, 162), (368, 264))
+    }
+}
 
 
-def apply_preset_transformation(image: np.ndarray, landmarks: List[Tuple[float, float]], preset_type: str) -> np.ndarray:
+def apply_preset_transformation(image: np.ndarray, landmarks: np.ndarray, preset_type: str,
+                                compose_mode: str = COMPOSE_EXACT) -> np.ndarray:
     """프리셋 변형 적용"""
     print(f"\n=== PRESET DEBUG: {preset_type} ===")
     print(f"Image shape: {image.shape}")
-    print(f"Total landmarks: {len(landmarks)}")
     
-    # 프리셋 상수들 (face_simulator.py에서 가져옴)
-    PRESET_CONFIGS = {
-        'lower_jaw': {
-            'strength': 0.05,
-            'influence_ratio': 0.4,
-            'pull_ratio': 0.1,
-            'face_size_landmarks': (234, 447),
-            'target_landmarks': (150, 379, 4)
-        },
-        'middle_jaw': {
-            'strength': 0.05,
-            'influence_ratio': 0.65,
-            'pull_ratio': 0.1,
-            'face_size_landmarks': (234, 447),
-            'target_landmarks': (172, 397, 4)
-        },
-        'cheek': {
-            'strength': 0.05,
-            'influence_ratio': 0.65,
-            'pull_ratio': 0.1,
-            'face_size_landmarks': (234, 447),
-            'target_landmarks': (215, 435, 4)
-        },
-        'front_protusion': {
-            'strength': 0.3,
-            'influence_ratio': 0.1,
-            'pull_ratio': 0.1,
-            'face_size_landmarks': (234, 447),
-            'target_landmarks': (243, 463, (56, 190), (414, 286), 168, 6),
-            'ellipse_ratio': 1.3
-        },
-        'back_slit': {
-            'strength': 0.5,
-            'influence_ratio': 0.1,
-            'pull_ratio': 0.1,
-            'face_size_landmarks': (234, 447),
-            'target_landmarks': (33, 359, (34, 162), (368, 264))
-        }
-    }
+    return apply_pull_operations(image, build_preset_operations(landmarks, preset_type), compose_mode)
+
+
+def build_preset_operations(landmarks: np.ndarray, preset_type: str) -> List[PullOperation]:
+    """프리셋을 순서대로 적용할 당기기 연산 목록으로 변환"""
+    print(f"Total landmarks: {len(landmarks)}")
     
     if preset_type not in PRESET_CONFIGS:
         raise ValueError(f"Unknown preset type: {preset_type}")
@@ -676,7 +1222,7 @@ def apply_preset_transformation(image: np.ndarray, landmarks: List[Tuple[float,
     print(f"Influence radius: {influence_radius}px (ratio: {config['influence_ratio']})")
     print(f"Config: {config}")
     
-    result_image = image.copy()
+    operations: List[PullOperation] = []
     
     if preset_type in ['lower_jaw', 'middle_jaw', 'cheek']:
         # 기본 턱선 프리셋 (좌우 대칭)
@@ -700,12 +1246,12 @@ def apply_preset_transformation(image: np.ndarray, landmarks: List[Tuple[float,
             target_x_left = left_landmark[0] + dx_left
             target_y_left = left_landmark[1] + dy_left
             
-            result_image = apply_pull_warp(
-                result_image,
+            operations.append((
                 left_landmark[0], left_landmark[1],
                 target_x_left, target_y_left,
-                influence_radius, config['strength']
-            )
+                influence_radius, config['strength'],
+                None
+            ))
         
         # 우측 변형
         distance_right = math.sqrt((right_landmark[0] - target_landmark[0])**2 + 
@@ -723,12 +1269,12 @@ def apply_preset_transformation(image: np.ndarray, landmarks: List[Tuple[float,
             target_x_right = right_landmark[0] + dx_right
             target_y_right = right_landmark[1] + dy_right
             
-            result_image = apply_pull_warp(
-                result_image,
+            operations.append((
                 right_landmark[0], right_landmark[1],
                 target_x_right, target_y_right,
-                influence_radius, config['strength']
-            )
+                influence_radius, config['strength'],
+                None
+            ))
     
     elif preset_type == 'front_protusion':
         # 앞트임 프리셋 (4개 포인트)
@@ -790,13 +1336,12 @@ def apply_preset_transformation(image: np.ndarray, landmarks: List[Tuple[float,
                 print(f"Influence radius: {influence_radius:.2f}px")
                 print(f"Ellipse ratio: {config.get('ellipse_ratio')}")
                 
-                result_image = apply_pull_warp(
-                    result_image,
+                operations.append((
                     source_landmark[0], source_landmark[1],
                     target_x, target_y,
                     influence_radius, config['strength'],
                     config.get('ellipse_ratio')
-                )
+                ))
     
     elif preset_type == 'back_slit':
         # 뒷트임 프리셋
@@ -829,22 +1374,33 @@ def apply_preset_transformation(image: np.ndarray, landmarks: List[Tuple[float,
                 target_x = source_landmark[0] + dx
                 target_y = source_landmark[1] + dy
                 
-                result_image = apply_pull_warp(
-                    result_image,
+                operations.append((
                     source_landmark[0], source_landmark[1],
                     target_x, target_y,
                     influence_radius, config['strength'],
                     config.get('ellipse_ratio')
-                )
+                ))
     
-    return result_image
+    return operations
 
 
-async def get_gpt_beauty_analysis(before_analysis: Dict[str, Any], after_analysis: Dict[str, Any], score_changes: Dict[str, float]) -> Dict[str, Any]:
-    """GPT-4o mini를 사용한 뷰티 분석 비교"""
-    try:
-        # 시스템 프롬프트 정의
-        system_prompt = """
+async def get_cached_gpt_analysis(cache_key: str, compute: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+    """캐시된 GPT 분석 결과 반환, 없으면 compute()로 생성 후 저장"""
+    cached = await asyncio.to_thread(analysis_cache.get, cache_key)
+    if cached is not None:
+        return cached
+    
+    analysis_result = await compute()
+    if not analysis_result.get("fallback"):
+        await asyncio.to_thread(analysis_cache.put, cache_key, analysis_result)
+    return analysis_result
+
+
+def build_comparison_prompt(before_analysis: Dict[str, Any], after_analysis: Dict[str, Any],
+                            score_changes: Dict[str, float]) -> Tuple[str, str]:
+    """뷰티 분석 비교용 (system, user) 프롬프트"""
+    # 시스템 프롬프트 정의
+    system_prompt = """
 당신은 전문적인 뷰티 컨설턴트이자 성형외과 상담 전문가입니다. 
 얼굴 변형 전후의 뷰티 점수를 분석하고, 개선사항과 추천사항을 제공해주세요.
 
@@ -864,21 +1420,21 @@ async def get_gpt_beauty_analysis(before_analysis: Dict[str, Any], after_analysi
 응답은 반드시 한국어로, 친근하면서도 전문적인 톤으로 작성해주세요.
 """
 
-        # 점수 변화 요약
-        changes_summary = []
-        for key, change in score_changes.items():
-            if abs(change) > 0.5:  # 0.5점 이상 변화만 포함
-                direction = "상승" if change > 0 else "하락"
-                changes_summary.append(f"{key}: {int(change)}점 {direction}")
-
-        # 안전한 점수 추출 함수
-        def get_score(analysis, key, default=0):
-            value = analysis.get(key, default)
-            if isinstance(value, dict):
-                return value.get('score', default)
-            return value if isinstance(value, (int, float)) else default
-
-        user_prompt = f"""
+    # 점수 변화 요약
+    changes_summary = []
+    for key, change in score_changes.items():
+        if abs(change) > 0.5:  # 0.5점 이상 변화만 포함
+            direction = "상승" if change > 0 else "하락"
+            changes_summary.append(f"{key}: {int(change)}점 {direction}")
+
+    # 안전한 점수 추출 함수
+    def get_score(analysis, key, default=0):
+        value = analysis.get(key, default)
+        if isinstance(value, dict):
+            return value.get('score', default)
+        return value if isinstance(value, (int, float)) else default
+
+    user_prompt = f"""
 뷰티 시술 전후 분석 결과:
 
 【시술 전 점수】
@@ -930,9 +1486,16 @@ async def get_gpt_beauty_analysis(before_analysis: Dict[str, Any], after_analysi
 친근하고 전문적인 톤으로 작성해주세요.
 """
 
+    return system_prompt, user_prompt
+
+
+async def get_gpt_beauty_analysis(before_analysis: Dict[str, Any], after_analysis: Dict[str, Any], score_changes: Dict[str, float]) -> Dict[str, Any]:
+    """GPT-4o mini를 사용한 뷰티 분석 비교"""
+    try:
+        system_prompt, user_prompt = build_comparison_prompt(before_analysis, after_analysis, score_changes)
+
         # GPT-4o mini 호출
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
+        analysis_text = await gpt_client.complete(
             messages=[
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": user_prompt}
@@ -940,8 +1503,8 @@ async def get_gpt_beauty_analysis(before_analysis: Dict[str, Any], after_analysi
             max_tokens=1000,
             temperature=0.7
         )
-
-        analysis_text = response.choices[0].message.content or "분석 중 오류가 발생했습니다."
+        if not analysis_text:
+            raise ValueError("GPT 응답이 비어 있습니다")
 
         # 분석 텍스트와 실천 방법 분리
         recommendations = []
@@ -971,8 +1534,9 @@ async def get_gpt_beauty_analysis(before_analysis: Dict[str, Any], after_analysi
 
     except Exception as e:
         print(f"GPT 분석 오류: {e}")
-        # 폴백 응답
+        # 폴백 응답 (캐시에 저장하지 않음)
         return {
+            "fallback": True,
             "analysis": "시술 전후 분석이 완료되었습니다. 전문적인 분석을 위해 잠시 후 다시 시도해주세요.",
             "recommendations": [
                 "변화된 부분을 꼼꼼히 관찰해보세요.",
@@ -986,8 +1550,136 @@ async def get_gpt_initial_beauty_analysis(beauty_analysis: Dict[str, Any]) -> Di
     """GPT-4o mini를 사용한 기초 뷰티스코어 분석"""
     print(f"🔍 GPT 분석 함수 호출됨")
     try:
-        # 시스템 프롬프트 정의 - 분석과 구체적 실천 방법 연결
-        system_prompt = """
+        system_prompt, user_prompt, overall_score = build_initial_beauty_prompt(beauty_analysis)
+
+        # GPT-4o mini 호출
+        analysis_text = await gpt_client.complete(
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt}
+            ],
+            max_tokens=1200,
+            temperature=0.7
+        )
+        if not analysis_text:
+            raise ValueError("GPT 응답이 비어 있습니다")
+
+        return parse_initial_beauty_analysis(analysis_text, overall_score)
+
+    except Exception as e:
+        print(f"기초 뷰티스코어 GPT 분석 오류: {e}")
+        return initial_beauty_fallback()
+
+
+def sse_event(event: str, data: Dict[str, Any]) -> str:
+    """Server-Sent Events 메시지 포맷"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+class AnalysisStreamSplitter:
+    """스트리밍 GPT 텍스트를 첫 번째 --- 기준으로 분석/실천 방법 구간으로 나누기"""
+    SEPARATOR = '---'
+
+    def __init__(self):
+        self.text = ""
+        self._emitted = 0  # 이미 이벤트로 보낸 위치
+        self._in_recommendations = False
+
+    def feed(self, delta: str) -> List[Tuple[str, str]]:
+        """새 조각을 받아 (구간, 텍스트) 이벤트 목록 반환"""
+        self.text += delta
+        events = []
+        
+        if not self._in_recommendations:
+            separator_index = self.text.find(self.SEPARATOR, self._emitted)
+            if separator_index == -1:
+                # 끝부분은 구분자의 앞부분일 수 있으므로 보류
+                safe_end = len(self.text) - (len(self.SEPARATOR) - 1)
+                if safe_end > self._emitted:
+                    events.append(("analysis", self.text[self._emitted:safe_end]))
+                    self._emitted = safe_end
+                return events
+            
+            if separator_index > self._emitted:
+                events.append(("analysis", self.text[self._emitted:separator_index]))
+            self._emitted = separator_index + len(self.SEPARATOR)
+            self._in_recommendations = True
+        
+        if len(self.text) > self._emitted:
+            events.append(("recommendations", self.text[self._emitted:]))
+            self._emitted = len(self.text)
+        return events
+
+    def flush(self) -> List[Tuple[str, str]]:
+        """스트림 종료 시 보류했던 나머지 텍스트 반환"""
+        if len(self.text) <= self._emitted:
+            return []
+        section = "recommendations" if self._in_recommendations else "analysis"
+        events = [(section, self.text[self._emitted:])]
+        self._emitted = len(self.text)
+        return events
+
+
+async def stream_initial_beauty_analysis(beauty_analysis: Dict[str, Any]) -> AsyncIterator[str]:
+    """기초 뷰티스코어 분석 SSE 이벤트 생성 (캐시 적중 시 done 이벤트만 전송)"""
+    try:
+        system_prompt, user_prompt, overall_score = build_initial_beauty_prompt(beauty_analysis)
+        cache_key = analysis_cache.prompt_fingerprint("initial", system_prompt, user_prompt)
+        result = await asyncio.to_thread(analysis_cache.get, cache_key)
+        
+        if result is None:
+            splitter = AnalysisStreamSplitter()
+            
+            # GPT-4o mini 스트리밍 호출
+            async for delta in gpt_client.stream(
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_prompt}
+                ],
+                max_tokens=1200,
+                temperature=0.7
+            ):
+                for section, text in splitter.feed(delta):
+                    yield sse_event(section, {"text": text})
+            
+            for section, text in splitter.flush():
+                yield sse_event(section, {"text": text})
+            
+            if not splitter.text:
+                raise ValueError("GPT 응답이 비어 있습니다")
+            
+            result = parse_initial_beauty_analysis(splitter.text, overall_score)
+            await asyncio.to_thread(analysis_cache.put, cache_key, result)
+            
+    except Exception as e:
+        print(f"기초 뷰티스코어 GPT 스트리밍 오류: {e}")
+        yield sse_event("error", {"detail": str(e)})
+        result = initial_beauty_fallback()
+    
+    yield sse_event("done", {
+        "analysis_text": result["analysis"],
+        "recommendations": result["recommendations"]
+    })
+
+
+def initial_beauty_fallback() -> Dict[str, Any]:
+    """기초 뷰티스코어 분석 실패 시 폴백 응답"""
+    # 폴백 응답 (캐시에 저장하지 않음)
+    return {
+        "fallback": True,
+        "analysis": "뷰티 분석이 완료되었습니다. 여러분만의 고유한 매력을 발견하고 자신감을 가지세요!",
+        "recommendations": [
+            "자신만의 매력을 찾아 표현해보세요.",
+            "건강한 라이프스타일을 유지하시면 자연스러운 아름다움이 빛날 것입니다.",
+            "정기적인 관리로 꾸준한 개선을 추구해보세요."
+        ],
+    }
+
+
+def build_initial_beauty_prompt(beauty_analysis: Dict[str, Any]) -> Tuple[str, str, float]:
+    """기초 뷰티스코어 분석용 (system, user) 프롬프트와 종합 점수"""
+    # 시스템 프롬프트 정의 - 분석과 구체적 실천 방법 연결
+    system_prompt = """
 당신은 뷰티 분석과 구체적 실천 방법 전문가입니다. 
 
 **목표**: 분석한 수치적 결과를 바탕으로 구체적이고 실천 가능한 개선 방법을 제시
@@ -1021,136 +1713,136 @@ async def get_gpt_initial_beauty_analysis(beauty_analysis: Dict[str, Any]) -> Di
 - 전문관리에서 필러는 절대 추천하지 말고, 레이저/보톡스/실리프팅/고주파 등 권장
 """
 
-        # 안전한 점수 추출 함수
-        def get_score(analysis, key, default=0):
-            value = analysis.get(key, default)
-            if isinstance(value, dict):
-                return value.get('score', default)
-            return value if isinstance(value, (int, float)) else default
-
-        # 실제 측정된 주요 얼굴 비율 분석만 포함 (눈/코/입술 제외)
-        main_scores = {
-            'overall': get_score(beauty_analysis, 'overallScore'),
-            'vertical': get_score(beauty_analysis, 'verticalScore'),
-            'horizontal': get_score(beauty_analysis, 'horizontalScore'),
-            'lowerFace': get_score(beauty_analysis, 'lowerFaceScore'),
-            'symmetry': get_score(beauty_analysis, 'symmetry'),
-            'jaw': get_score(beauty_analysis, 'jawScore'),
-        }
+    # 안전한 점수 추출 함수
+    def get_score(analysis, key, default=0):
+        value = analysis.get(key, default)
+        if isinstance(value, dict):
+            return value.get('score', default)
+        return value if isinstance(value, (int, float)) else default
+
+    # 실제 측정된 주요 얼굴 비율 분석만 포함 (눈/코/입술 제외)
+    main_scores = {
+        'overall': get_score(beauty_analysis, 'overallScore'),
+        'vertical': get_score(beauty_analysis, 'verticalScore'),
+        'horizontal': get_score(beauty_analysis, 'horizontalScore'),
+        'lowerFace': get_score(beauty_analysis, 'lowerFaceScore'),
+        'symmetry': get_score(beauty_analysis, 'symmetry'),
+        'jaw': get_score(beauty_analysis, 'jawScore'),
+    }
 
-        # 강점 항목 (80점 이상)
-        strengths = []
-        # 개선 영역 (70점 미만)
-        improvement_areas = []
-        
-        score_names = {
-            'vertical': '가로 황금비율',
-            'horizontal': '세로 대칭성', 
-            'lowerFace': '하관 조화',
-            'symmetry': '전체 대칭성',
-            'jaw': '턱 곡률'
-        }
-        
-        for key, score in main_scores.items():
-            if key == 'overall':
-                continue
-            name = score_names.get(key, key)
-            if score >= 80:
-                strengths.append(f"{name} ({int(score)}점)")
-            elif score < 70:
-                improvement_areas.append(f"{name} ({int(score)}점)")
-
-        # 상세 분석 정보 추출
-        def get_detailed_info(key):
-            value = beauty_analysis.get(key, {})
-            if isinstance(value, dict):
-                return value
-            return {}
-
-        vertical_info = get_detailed_info('verticalScore')
-        horizontal_info = get_detailed_info('horizontalScore') 
-        lowerface_info = get_detailed_info('lowerFaceScore')
-        jaw_info = get_detailed_info('jawScore')
-
-        # 상세 점수와 비율 정보 구성
-        detailed_analysis = []
-        
-        # 가로 황금비율 (5구간 퍼센트)
-        if main_scores['vertical'] >= 10:
-            analysis_text = f"가로 황금비율: {int(main_scores['vertical'])}점"
-            if 'percentages' in vertical_info and vertical_info['percentages']:
-                percentages = vertical_info['percentages']
-                sections = ['왼쪽바깥', '왼쪽눈', '미간', '오른쪽눈', '오른쪽바깥']
-                percent_details = []
-                for i, pct in enumerate(percentages[:5]):
-                    percent_details.append(f"{sections[i]} {int(pct)}%")
-                analysis_text += f" (구간별: {', '.join(percent_details)})"
-            detailed_analysis.append(analysis_text)
-        
-        # 세로 대칭성 (2구간 퍼센트)
-        if main_scores['horizontal'] >= 10:
-            analysis_text = f"세로 대칭성: {int(main_scores['horizontal'])}점"
-            if 'upperPercentage' in horizontal_info and 'lowerPercentage' in horizontal_info:
-                upper = horizontal_info['upperPercentage']
-                lower = horizontal_info['lowerPercentage']
-                analysis_text += f" (눈~코 {int(upper)}%, 코~턱 {int(lower)}%)"
-            detailed_analysis.append(analysis_text)
-        
-        # 하관 조화 (2구간 퍼센트)
-        if main_scores['lowerFace'] >= 10:
-            analysis_text = f"하관 조화: {int(main_scores['lowerFace'])}점"
-            if 'upperPercentage' in lowerface_info and 'lowerPercentage' in lowerface_info:
-                upper = lowerface_info['upperPercentage']
-                lower = lowerface_info['lowerPercentage']
-                analysis_text += f" (인중 {int(upper)}%, 입~턱 {int(lower)}%)"
-            detailed_analysis.append(analysis_text)
-        
-        # 전체 대칭성
-        if main_scores['symmetry'] >= 10:
-            detailed_analysis.append(f"전체 대칭성: {int(main_scores['symmetry'])}점")
-        
-        # 턱 곡률 (각도 정보)
-        if main_scores['jaw'] >= 10:
-            analysis_text = f"턱 곡률: {int(main_scores['jaw'])}점"
-            if 'gonialAngle' in jaw_info and 'cervicoMentalAngle' in jaw_info:
-                gonial = jaw_info['gonialAngle']
-                cervico = jaw_info['cervicoMentalAngle']
-                analysis_text += f" (하악각 {int(gonial)}°, 턱목각 {int(cervico)}°)"
-            detailed_analysis.append(analysis_text)
-        
-        # 개선 포인트만 추출 (이상적 범위에서 벗어난 특징적인 부분)
-        improvement_points = []
-        
-        # 가로 황금비율 체크 (20%에서 3% 이상 벗어난 경우)
+    # 강점 항목 (80점 이상)
+    strengths = []
+    # 개선 영역 (70점 미만)
+    improvement_areas = []
+    
+    score_names = {
+        'vertical': '가로 황금비율',
+        'horizontal': '세로 대칭성', 
+        'lowerFace': '하관 조화',
+        'symmetry': '전체 대칭성',
+        'jaw': '턱 곡률'
+    }
+    
+    for key, score in main_scores.items():
+        if key == 'overall':
+            continue
+        name = score_names.get(key, key)
+        if score >= 80:
+            strengths.append(f"{name} ({int(score)}점)")
+        elif score < 70:
+            improvement_areas.append(f"{name} ({int(score)}점)")
+
+    # 상세 분석 정보 추출
+    def get_detailed_info(key):
+        value = beauty_analysis.get(key, {})
+        if isinstance(value, dict):
+            return value
+        return {}
+
+    vertical_info = get_detailed_info('verticalScore')
+    horizontal_info = get_detailed_info('horizontalScore') 
+    lowerface_info = get_detailed_info('lowerFaceScore')
+    jaw_info = get_detailed_info('jawScore')
+
+    # 상세 점수와 비율 정보 구성
+    detailed_analysis = []
+    
+    # 가로 황금비율 (5구간 퍼센트)
+    if main_scores['vertical'] >= 10:
+        analysis_text = f"가로 황금비율: {int(main_scores['vertical'])}점"
         if 'percentages' in vertical_info and vertical_info['percentages']:
             percentages = vertical_info['percentages']
             sections = ['왼쪽바깥', '왼쪽눈', '미간', '오른쪽눈', '오른쪽바깥']
+            percent_details = []
             for i, pct in enumerate(percentages[:5]):
-                diff = abs(pct - 20.0)
-                if diff > 3.0:
-                    improvement_points.append(f"{sections[i]} {int(pct)}% (이상적 20%)")
-        
-        # 세로 대칭성 체크 (50:50에서 3% 이상 벗어난 경우)
+                percent_details.append(f"{sections[i]} {int(pct)}%")
+            analysis_text += f" (구간별: {', '.join(percent_details)})"
+        detailed_analysis.append(analysis_text)
+    
+    # 세로 대칭성 (2구간 퍼센트)
+    if main_scores['horizontal'] >= 10:
+        analysis_text = f"세로 대칭성: {int(main_scores['horizontal'])}점"
         if 'upperPercentage' in horizontal_info and 'lowerPercentage' in horizontal_info:
             upper = horizontal_info['upperPercentage']
             lower = horizontal_info['lowerPercentage']
-            if abs(upper - 50.0) > 3.0:
-                improvement_points.append(f"상안면 {int(upper)}% (이상적 50%)")
-        
-        # 하관 조화 체크 (33:67에서 벗어난 경우)
+            analysis_text += f" (눈~코 {int(upper)}%, 코~턱 {int(lower)}%)"
+        detailed_analysis.append(analysis_text)
+    
+    # 하관 조화 (2구간 퍼센트)
+    if main_scores['lowerFace'] >= 10:
+        analysis_text = f"하관 조화: {int(main_scores['lowerFace'])}점"
         if 'upperPercentage' in lowerface_info and 'lowerPercentage' in lowerface_info:
             upper = lowerface_info['upperPercentage']
             lower = lowerface_info['lowerPercentage']
-            if abs(upper - 33.0) > 3.0:
-                improvement_points.append(f"인중 {int(upper)}% (이상적 33%)")
-        
-        # 턱 곡률 체크 (90-120도 범위 벗어난 경우)
-        if 'gonialAngle' in jaw_info:
+            analysis_text += f" (인중 {int(upper)}%, 입~턱 {int(lower)}%)"
+        detailed_analysis.append(analysis_text)
+    
+    # 전체 대칭성
+    if main_scores['symmetry'] >= 10:
+        detailed_analysis.append(f"전체 대칭성: {int(main_scores['symmetry'])}점")
+    
+    # 턱 곡률 (각도 정보)
+    if main_scores['jaw'] >= 10:
+        analysis_text = f"턱 곡률: {int(main_scores['jaw'])}점"
+        if 'gonialAngle' in jaw_info and 'cervicoMentalAngle' in jaw_info:
             gonial = jaw_info['gonialAngle']
-            if gonial < 90 or gonial > 120:
-                improvement_points.append(f"하악각 {int(gonial)}° (이상적 90-120°)")
+            cervico = jaw_info['cervicoMentalAngle']
+            analysis_text += f" (하악각 {int(gonial)}°, 턱목각 {int(cervico)}°)"
+        detailed_analysis.append(analysis_text)
+    
+    # 개선 포인트만 추출 (이상적 범위에서 벗어난 특징적인 부분)
+    improvement_points = []
+    
+    # 가로 황금비율 체크 (20%에서 3% 이상 벗어난 경우)
+    if 'percentages' in vertical_info and vertical_info['percentages']:
+        percentages = vertical_info['percentages']
+        sections = ['왼쪽바깥', '왼쪽눈', '미간', '오른쪽눈', '오른쪽바깥']
+        for i, pct in enumerate(percentages[:5]):
+            diff = abs(pct - 20.0)
+            if diff > 3.0:
+                improvement_points.append(f"{sections[i]} {int(pct)}% (이상적 20%)")
+    
+    # 세로 대칭성 체크 (50:50에서 3% 이상 벗어난 경우)
+    if 'upperPercentage' in horizontal_info and 'lowerPercentage' in horizontal_info:
+        upper = horizontal_info['upperPercentage']
+        lower = horizontal_info['lowerPercentage']
+        if abs(upper - 50.0) > 3.0:
+            improvement_points.append(f"상안면 {int(upper)}% (이상적 50%)")
+    
+    # 하관 조화 체크 (33:67에서 벗어난 경우)
+    if 'upperPercentage' in lowerface_info and 'lowerPercentage' in lowerface_info:
+        upper = lowerface_info['upperPercentage']
+        lower = lowerface_info['lowerPercentage']
+        if abs(upper - 33.0) > 3.0:
+            improvement_points.append(f"인중 {int(upper)}% (이상적 33%)")
+    
+    # 턱 곡률 체크 (90-120도 범위 벗어난 경우)
+    if 'gonialAngle' in jaw_info:
+        gonial = jaw_info['gonialAngle']
+        if gonial < 90 or gonial > 120:
+            improvement_points.append(f"하악각 {int(gonial)}° (이상적 90-120°)")
 
-        user_prompt = f"""
+    user_prompt = f"""
 측정 결과: 종합 {int(main_scores['overall'])}점
 
 강점 항목: {', '.join(strengths) if strengths else '균형 잡힌 전체적 비율'}
@@ -1183,140 +1875,78 @@ async def get_gpt_initial_beauty_analysis(beauty_analysis: Dict[str, Any]) -> Di
 반드시 2번 분석의 구체적 수치와 문제점을 참조해서 연결해주세요.
 """
 
-        # GPT-4o mini 호출
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ],
-            max_tokens=1200,
-            temperature=0.7
-        )
+    return system_prompt, user_prompt, main_scores['overall']
 
-        analysis_text = response.choices[0].message.content or "분석 중 오류가 발생했습니다."
 
-        # 추천사항, 강점, 개선영역 추출
-        recommendations = []
-        strengths_list = []
-        improvement_list = []
+def parse_initial_beauty_analysis(analysis_text: str, overall_score: float) -> Dict[str, Any]:
+    """GPT 응답을 분석 텍스트와 실천 방법(--- 이후)으로 정리"""
+    # 추천사항 추출
+    recommendations = []
 
-        # GPT 텍스트에서 실천 방법 부분만 추출 (첫 번째 --- 이후 모든 내용)
-        first_separator_index = analysis_text.find('---')
-        
-        if first_separator_index != -1:
-            # 첫 번째 --- 이후의 모든 내용을 실천 방법으로 사용 (모든 --- 포함)
-            practice_section = analysis_text[first_separator_index + 3:].strip()
-            
-            # "### 구체적 실천 방법" 제거하고 실제 내용만 추출
-            practice_lines = practice_section.split('\n')
-            cleaned_lines = []
-            
-            for line in practice_lines:
-                line = line.strip()
-                if not line:
-                    cleaned_lines.append('')  # 빈 줄도 유지
-                    continue
-                    
-                # 안내 문구나 형식 설명 건너뛰기 (### 제목은 제거)
-                if any(skip_text in line for skip_text in [
-                    "위 2번에서 언급한", "각 개선점마다", "다음 형식으로", 
-                    "반드시 2번 분석", "정확히 참조"
-                ]) or line.startswith('### 구체적 실천 방법'):
-                    continue
-                
-                # 실제 내용만 포함 (모든 🎯, 💪, 🏥 내용과 일반 텍스트)
-                cleaned_lines.append(line)
-            
-            # 실천 방법 전체를 하나의 문자열로 합치기 (Frontend에서 그대로 표시)
-            if cleaned_lines:
-                full_practice_content = '\n'.join(cleaned_lines).strip()
-                recommendations = [full_practice_content]  # 전체 내용을 하나의 요소로
-                
-            print(f"🔍 Backend recommendations 길이: {len(recommendations[0]) if recommendations else 0}자")
-            print(f"🔍 Backend recommendations 샘플: {recommendations[0][:100] if recommendations else 'None'}...")
-        else:
-            print(f"🔍 Backend GPT 응답에 --- 구분자 없음: {analysis_text[:200]}...")
+    # GPT 텍스트에서 실천 방법 부분만 추출 (첫 번째 --- 이후 모든 내용)
+    first_separator_index = analysis_text.find('---')
+    
+    if first_separator_index != -1:
+        # 첫 번째 --- 이후의 모든 내용을 실천 방법으로 사용 (모든 --- 포함)
+        practice_section = analysis_text[first_separator_index + 3:].strip()
         
-        # 기존 분석 내용 추출 (1, 2, 3번 섹션에서)
-        lines = analysis_text.split('\n')
-        current_section = None
+        # "### 구체적 실천 방법" 제거하고 실제 내용만 추출
+        practice_lines = practice_section.split('\n')
+        cleaned_lines = []
         
-        for line in lines:
+        for line in practice_lines:
             line = line.strip()
-            
-            # 섹션 구분
-            if any(keyword in line for keyword in ["🌟", "좋은 점", "강점"]):
-                current_section = "strengths"
-                continue
-            elif any(keyword in line for keyword in ["📊", "개선이 필요한", "개선 필요"]):
-                current_section = "improvements"
+            if not line:
+                cleaned_lines.append('')  # 빈 줄도 유지
                 continue
-            elif "💡" in line or "기대효과" in line:
-                current_section = "effects"
+                
+            # 안내 문구나 형식 설명 건너뛰기 (### 제목은 제거)
+            if any(skip_text in line for skip_text in [
+                "위 2번에서 언급한", "각 개선점마다", "다음 형식으로", 
+                "반드시 2번 분석", "정확히 참조"
+            ]) or line.startswith('### 구체적 실천 방법'):
                 continue
-            elif "---" in line:
-                # 실천 방법 섹션 시작하면 분석 파싱 종료
-                break
             
-            # 각 섹션 내용 추출
-            if line and (line.startswith('-') or line.startswith('•') or line.startswith('*') or 
-                        any(char.isdigit() for char in line[:3])):
-                clean_line = line.lstrip('-').lstrip('*').lstrip('•').strip()
-                # 번호 제거 (1., 2., 3. 등)
-                if clean_line and clean_line[0].isdigit() and '.' in clean_line[:5]:
-                    clean_line = clean_line.split('.', 1)[1].strip()
-                
-                if current_section == "strengths" and len(clean_line) > 10:
-                    strengths_list.append(clean_line)
-                elif current_section == "improvements" and len(clean_line) > 10:
-                    improvement_list.append(clean_line)
-
-        # 기본값 설정
-        if not recommendations:
-            if main_scores['overall'] >= 80:
-                recommendations = [
-                    "현재 매우 균형잡힌 아름다운 얼굴을 가지고 계시네요.",
-                    "자연스러운 메이크업으로 본인의 매력을 더욱 부각시켜보세요.",
-                    "건강한 라이프스타일을 유지하시면 자연스러운 아름다움이 지속될 것입니다."
-                ]
-            elif main_scores['overall'] >= 70:
-                recommendations = [
-                    "이미 좋은 기본기를 가지고 계시니 자신감을 가지세요.",
-                    "포인트 메이크업으로 개성을 표현해보시는 것을 추천합니다.",
-                    "규칙적인 스킨케어로 피부 상태를 개선해보세요."
-                ]
-            else:
-                recommendations = [
-                    "모든 사람은 고유한 아름다움을 가지고 있습니다.",
-                    "자신만의 매력적인 스타일을 찾아보세요.",
-                    "단계적인 관리를 통해 점진적인 개선을 추구하시면 좋을 것 같습니다."
-                ]
-
-        if not strengths_list:
-            strengths_list = [item for item in strengths] if strengths else ["고유한 개성과 매력"]
-
-        if not improvement_list:
-            improvement_list = [item for item in improvement_areas] if improvement_areas else []
-
-        result = {
-            "analysis": analysis_text,
-            "recommendations": recommendations[:4]
-        }
-        print(f"🔍 Backend GPT 응답: {result}")
-        return result
+            # 실제 내용만 포함 (모든 🎯, 💪, 🏥 내용과 일반 텍스트)
+            cleaned_lines.append(line)
+        
+        # 실천 방법 전체를 하나의 문자열로 합치기 (Frontend에서 그대로 표시)
+        if cleaned_lines:
+            full_practice_content = '\n'.join(cleaned_lines).strip()
+            recommendations = [full_practice_content]  # 전체 내용을 하나의 요소로
+            
+        print(f"🔍 Backend recommendations 길이: {len(recommendations[0]) if recommendations else 0}자")
+        print(f"🔍 Backend recommendations 샘플: {recommendations[0][:100] if recommendations else 'None'}...")
+    else:
+        print(f"🔍 Backend GPT 응답에 --- 구분자 없음: {analysis_text[:200]}...")
+    
+    # 기본값 설정
+    if not recommendations:
+        if overall_score >= 80:
+            recommendations = [
+                "현재 매우 균형잡힌 아름다운 얼굴을 가지고 계시네요.",
+                "자연스러운 메이크업으로 본인의 매력을 더욱 부각시켜보세요.",
+                "건강한 라이프스타일을 유지하시면 자연스러운 아름다움이 지속될 것입니다."
+            ]
+        elif overall_score >= 70:
+            recommendations = [
+                "이미 좋은 기본기를 가지고 계시니 자신감을 가지세요.",
+                "포인트 메이크업으로 개성을 표현해보시는 것을 추천합니다.",
+                "규칙적인 스킨케어로 피부 상태를 개선해보세요."
+            ]
+        else:
+            recommendations = [
+                "모든 사람은 고유한 아름다움을 가지고 있습니다.",
+                "자신만의 매력적인 스타일을 찾아보세요.",
+                "단계적인 관리를 통해 점진적인 개선을 추구하시면 좋을 것 같습니다."
+            ]
 
-    except Exception as e:
-        print(f"기초 뷰티스코어 GPT 분석 오류: {e}")
-        # 폴백 응답
-        return {
-            "analysis": "뷰티 분석이 완료되었습니다. 여러분만의 고유한 매력을 발견하고 자신감을 가지세요!",
-            "recommendations": [
-                "자신만의 매력을 찾아 표현해보세요.",
-                "건강한 라이프스타일을 유지하시면 자연스러운 아름다움이 빛날 것입니다.",
-                "정기적인 관리로 꾸준한 개선을 추구해보세요."
-            ],
-        }
+    result = {
+        "analysis": analysis_text,
+        "recommendations": recommendations[:4]
+    }
+    print(f"🔍 Backend GPT 응답: {result}")
+    return result
 
 
 if __name__ == "__main__":
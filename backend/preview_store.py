@@ -0,0 +1,85 @@
+"""
+프리뷰(축소 해상도) 워핑 세션
+
+드래그 중에는 화면 크기 미리보기만 필요하므로 원본을 긴 변 기준으로 줄인 프록시 이미지에 워핑한다.
+프리뷰 image_id마다 원본 image_id와 지금까지의 워핑 연산(원본 좌표)을 기록해 두고,
+커밋할 때 그 연산들을 원본 해상도에서 한 번에 다시 적용한다.
+"""
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+import cv2
+import numpy as np
+
+
+@dataclass(frozen=True)
+class PreviewSession:
+    base_image_id: str            # 원본 해상도 이미지
+    operations: Tuple[Any, ...]   # 원본 좌표계 WarpOperation (적용 순서)
+    scale: float                  # 프리뷰 / 원본 크기 비율
+
+
+def preview_scale(img_width: int, img_height: int, max_side: int) -> float:
+    """긴 변이 max_side가 되는 축소 비율 (이미 작으면 1)"""
+    return min(1.0, max_side / max(img_width, img_height))
+
+
+def downscale(image: np.ndarray, scale: float) -> np.ndarray:
+    """프리뷰용 축소 이미지"""
+    if scale >= 1.0:
+        return image.copy()
+    img_height, img_width = image.shape[:2]
+    size = (max(1, round(img_width * scale)), max(1, round(img_height * scale)))
+    return cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+
+
+class PreviewStore:
+    """개수 한도 기반 LRU 프리뷰 세션 저장소"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._sessions: "OrderedDict[str, PreviewSession]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.previews = 0
+        self.commits = 0
+
+    def get(self, preview_id: str) -> Optional[PreviewSession]:
+        """프리뷰 세션 조회"""
+        with self._lock:
+            session = self._sessions.get(preview_id)
+            if session is not None:
+                self._sessions.move_to_end(preview_id)
+            return session
+
+    def put(self, preview_id: str, session: PreviewSession) -> PreviewSession:
+        """프리뷰 세션 등록"""
+        with self._lock:
+            self._sessions[preview_id] = session
+            self._sessions.move_to_end(preview_id)
+            self.previews += 1
+            while len(self._sessions) > self.max_entries:
+                self._sessions.popitem(last=False)
+        return session
+
+    def record_commit(self):
+        """커밋 횟수 기록"""
+        with self._lock:
+            self.commits += 1
+
+    def discard(self, preview_id: str):
+        """프리뷰 세션 제거"""
+        with self._lock:
+            self._sessions.pop(preview_id, None)
+
+    def stats(self) -> Dict[str, int]:
+        """저장소 상태 및 카운터"""
+        with self._lock:
+            return {
+                "entries": len(self._sessions),
+                "max_entries": self.max_entries,
+                "previews": self.previews,
+                "commits": self.commits,
+            }
@@ -0,0 +1,15 @@
+"""
+테스트 공통 설정
+
+backend 모듈을 바로 import할 수 있게 경로를 추가하고, main을 import하기 전에
+저장소/DB를 메모리로 바꿔서 테스트가 파일을 남기지 않게 한다.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("IMAGE_STORE_BACKEND", "memory")
+os.environ.setdefault("LINEAGE_DB_PATH", ":memory:")
+os.environ.setdefault("GPT_CACHE_PATH", ":memory:")
+os.environ.setdefault("OPENAI_API_KEY", "test")
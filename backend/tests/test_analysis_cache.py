@@ -0,0 +1,59 @@
+"""GPT 분석 응답 캐시 테스트"""
+import asyncio
+
+from fastapi.testclient import TestClient
+
+import main
+from analysis_cache import AnalysisCache
+
+
+def test_comparison_key_follows_score_changes():
+    # 잘라서 넣으면 같은 점수지만 변화량이 달라 프롬프트의 【주요 변화】가 다른 경우
+    cache = AnalysisCache(":memory:", ttl_seconds=60, max_entries=10)
+    before = {"overallScore": 70.9}
+    after_small, after_large = {"overallScore": 71.2}, {"overallScore": 71.8}
+
+    keys = []
+    for after in (after_small, after_large):
+        changes = {"overall": after["overallScore"] - before["overallScore"]}
+        keys.append(cache.prompt_fingerprint("comparison", *main.build_comparison_prompt(before, after, changes)))
+
+    assert keys[0] != keys[1]
+
+
+def test_initial_key_follows_the_rendered_prompt(monkeypatch):
+    calls = []
+
+    async def completion(messages, **kwargs):
+        calls.append(messages[-1]["content"])
+        return "분석\n---\n- 실천"
+
+    monkeypatch.setattr(main.gpt_client, "complete", completion)
+    client = TestClient(main.app)
+
+    def analyze(overall, upper):
+        beauty_analysis = {"overallScore": overall, "horizontalScore": {"score": 75, "upperPercentage": upper,
+                                                                         "lowerPercentage": 100 - upper}}
+        response = client.post("/analyze-initial-beauty-score", json={"beauty_analysis": beauty_analysis})
+        assert response.status_code == 200
+
+    # 종합 점수는 int()로 잘라서 들어가므로 같은 프롬프트 -> 한 번만 호출
+    analyze(66.2, 53.0)
+    analyze(66.8, 53.0)
+    assert len(calls) == 1
+    # 내림하면 같은 53이지만 53.5는 3% 기준을 넘어 개선 항목이 추가되는 다른 프롬프트
+    analyze(66.2, 53.5)
+    assert len(calls) == 2 and "상안면 53%" in calls[1] and "상안면" not in calls[0]
+
+
+def test_empty_completion_is_not_cached(monkeypatch):
+    async def empty_completion(**kwargs):
+        return ""
+
+    monkeypatch.setattr(main.gpt_client, "complete", empty_completion)
+    before = main.analysis_cache.stats()["entries"]
+
+    result = asyncio.run(main.get_cached_gpt_analysis("empty-completion", lambda: main.get_gpt_initial_beauty_analysis({})))
+
+    assert result["fallback"]
+    assert main.analysis_cache.stats()["entries"] == before
@@ -0,0 +1,48 @@
+"""기초 분석 SSE 스트리밍 테스트 (gpt_client.stream 스텁)"""
+import json
+
+from fastapi.testclient import TestClient
+
+import main
+
+CHUNKS = ["얼굴형이 균형 잡혀 있습니다.\n눈매", "", "가 또렷합니다.\n-", "", "--\n- 수분 관리\n- 자세 교정"]
+
+
+def parse_events(body: str):
+    """SSE 본문을 (이벤트, 데이터) 목록으로 (데이터는 한 줄 JSON이어야 함)"""
+    events = []
+    for message in body.split("\n\n"):
+        if not message:
+            continue
+        lines = message.split("\n")
+        assert len(lines) == 2 and lines[0].startswith("event: ") and lines[1].startswith("data: ")
+        events.append((lines[0][len("event: "):], json.loads(lines[1][len("data: "):])))
+    return events
+
+
+def test_stream_splits_sections_and_ends_with_done(monkeypatch):
+    async def stub_stream(**kwargs):
+        for chunk in CHUNKS:
+            yield chunk
+
+    monkeypatch.setattr(main.gpt_client, "stream", stub_stream)
+    beauty_analysis = {"overallScore": 77.7, "stream-test": True}
+
+    response = TestClient(main.app).post("/analyze-initial-beauty-score/stream",
+                                         json={"beauty_analysis": beauty_analysis})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = parse_events(response.text)
+
+    # 줄바꿈이 든 조각도 data 한 줄로 보내고, 빈 조각은 이벤트를 만들지 않음
+    assert all(data["text"] for event, data in events if event != "done")
+    assert "".join(data["text"] for event, data in events if event == "analysis") == \
+        "얼굴형이 균형 잡혀 있습니다.\n눈매가 또렷합니다.\n"
+    assert "".join(data["text"] for event, data in events if event == "recommendations") == \
+        "\n- 수분 관리\n- 자세 교정"
+
+    event, done = events[-1]
+    expected = main.parse_initial_beauty_analysis("".join(CHUNKS), 77.7)
+    assert event == "done"
+    assert [event for event, _ in events].count("done") == 1
+    assert done == {"analysis_text": expected["analysis"], "recommendations": expected["recommendations"]}
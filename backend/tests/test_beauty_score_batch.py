@@ -0,0 +1,32 @@
+"""/beauty-score/batch 엔드포인트 테스트"""
+import numpy as np
+from fastapi.testclient import TestClient
+
+import main
+from benchmark import synthetic_image, synthetic_landmarks
+from landmark_store import LandmarkEntry, landmark_array
+
+WIDTH, HEIGHT = 640, 480
+
+
+def register(image_id: str, landmarks: np.ndarray):
+    main.image_cache.put(image_id, synthetic_image(WIDTH, HEIGHT), persisted=True)
+    main.landmark_store.put(image_id, LandmarkEntry(landmark_array(landmarks), WIDTH, HEIGHT))
+
+
+def test_mixed_iris_and_plain_landmarks_are_scored_together():
+    # 홍채 검출을 요청한 이미지(478점)와 기본 검출 이미지(468점)가 한 요청에 섞인 경우
+    face = synthetic_landmarks(WIDTH, HEIGHT)
+    iris = face[468 - 10:468] + 1.0
+    register("plain-face", face)
+    register("iris-face", np.concatenate([face, iris]))
+
+    response = TestClient(main.app).post("/beauty-score/batch", json={"image_ids": ["plain-face", "iris-face"]})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["scored"] == 2
+    plain, with_iris = (result["analysis"] for result in body["results"])
+    # 점수는 기본 468점만 사용하므로 홍채 점이 있어도 결과가 같아야 함
+    assert plain["overallScore"] == with_iris["overallScore"]
+    assert plain["verticalScore"] == with_iris["verticalScore"]
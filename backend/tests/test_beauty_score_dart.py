@@ -0,0 +1,121 @@
+"""beauty_score와 프론트엔드 Dart calculateBeautyAnalysis의 결과 비교
+
+기대값은 frontend/lib/services/beauty_analysis_service.dart의 calculateBeautyAnalysis를
+Dart double 규칙(0으로 나누면 inf/nan, num.clamp는 nan을 상한으로)대로 한 줄씩 옮겨 계산한 값이다.
+JSON으로 보낼 수 없는 inf/nan 세부 값은 None으로 적었다.
+"""
+import math
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from beauty_score import score_landmarks
+from landmark_store import LandmarkEntry, landmark_array
+
+# 지표 계산에 쓰이는 랜드마크만 지정 (나머지 점은 (0, 0))
+BALANCED = {234: (100, 300), 33: (180, 280), 133: (250, 282), 362: (330, 282), 359: (400, 280), 447: (480, 300), 8: (290, 250), 2: (290, 380), 152: (290, 520), 37: (280, 425), 61: (240, 440), 291: (340, 440), 263: (400, 281), 31: (265, 370), 35: (315, 370), 9: (290, 230), 13: (290, 430), 18: (290, 460), 172: (140, 430), 150: (190, 500), 397: (440, 430), 379: (390, 500)}
+ASYMMETRIC = {234: (100, 300), 33: (170, 280), 133: (250, 282), 362: (345, 284), 359: (420, 280), 447: (480, 300), 8: (290, 250), 2: (290, 380), 152: (290, 520), 37: (280, 425), 61: (240, 440), 291: (352, 441), 263: (400, 281), 31: (265, 370), 35: (315, 370), 9: (290, 230), 13: (290, 430), 18: (350, 470), 172: (140, 430), 150: (240, 445), 397: (440, 428), 379: (342, 447)}
+ZERO_WIDTH = {234: (100, 300), 33: (180, 280), 133: (180, 282), 362: (330, 282), 359: (400, 280), 447: (480, 300), 8: (290, 250), 2: (290, 380), 152: (290, 520), 37: (280, 425), 61: (240, 440), 291: (340, 440), 263: (330, 281), 31: (265, 370), 35: (265, 372), 9: (290, 230), 13: (290, 430), 18: (290, 430), 172: (140, 430), 150: (140, 430), 397: (440, 430), 379: (390, 500)}
+COLLAPSED = {234: (290, 400), 33: (290, 400), 133: (290, 400), 362: (290, 400), 359: (290, 400), 447: (290, 400), 8: (290, 400), 2: (290, 400), 152: (290, 400), 37: (290, 400), 61: (290, 400), 291: (290, 400), 263: (290, 400), 31: (290, 400), 35: (290, 400), 9: (290, 400), 13: (290, 400), 18: (290, 400), 172: (290, 400), 150: (290, 400), 397: (290, 400), 379: (290, 400)}
+
+# 각도는 acos 구현에 따라 마지막 자리가 다를 수 있음
+REL_TOLERANCE = 1e-12
+
+BALANCED_EXPECTED = {
+    "overallScore": 83.28793549430767,
+    "verticalScore": {"score": 87.36842105263159, "percentages": [21.052631578947366, 18.421052631578945, 21.052631578947366, 18.421052631578945, 21.052631578947366], "totalDeviation": 6.315789473684209, "sections": 5},
+    "horizontalScore": {"score": 94.44444444444444, "upperPercentage": 48.148148148148145, "lowerPercentage": 51.85185185185185, "deviation": 3.7037037037037024},
+    "lowerFaceScore": {"score": 97.94285714285714, "upperPercentage": 32.142857142857146, "lowerPercentage": 67.85714285714286, "deviation": 1.7142857142857153},
+    "symmetry": 76.66666666666666,
+    "eyeScore": {"score": 65.71428571428572, "leftWidth": 70.0, "rightWidth": 70.0, "distance": 150.0, "symmetry": 1.0},
+    "noseScore": {"score": 50.0, "width": 50.0, "height": 150.0, "ratio": 3.0},
+    "lipScore": {"score": 93.33333333333333, "width": 100.0, "height": 30.0, "ratio": 3.3333333333333335},
+    "jawScore": {"score": 56.37087663685378, "gonialAngle": 125.53767779197439, "cervicoMentalAngle": 180.0, "liftingScore": 56.37087663685378},
+}
+ASYMMETRIC_EXPECTED = {
+    "overallScore": 79.24990810359232,
+    "verticalScore": {"score": 75.78947368421052, "percentages": [18.421052631578945, 21.052631578947366, 25.0, 19.736842105263158, 15.789473684210526], "totalDeviation": 12.105263157894738, "sections": 5},
+    "horizontalScore": {"score": 94.44444444444444, "upperPercentage": 48.148148148148145, "lowerPercentage": 51.85185185185185, "deviation": 3.7037037037037024},
+    "lowerFaceScore": {"score": 97.94285714285714, "upperPercentage": 32.142857142857146, "lowerPercentage": 67.85714285714286, "deviation": 1.7142857142857153},
+    "symmetry": 78.0,
+    "eyeScore": {"score": 52.22222222222222, "leftWidth": 80.0, "rightWidth": 55.0, "distance": 175.0, "symmetry": 0.6296296296296297},
+    "noseScore": {"score": 50.0, "width": 50.0, "height": 150.0, "ratio": 3.0},
+    "lipScore": {"score": 96.0, "width": 112.0, "height": 40.0, "ratio": 2.8},
+    "jawScore": {"score": 50.0, "gonialAngle": 170.24849707612012, "cervicoMentalAngle": 129.8055710922652, "liftingScore": 12.087493008480655},
+}
+ZERO_WIDTH_EXPECTED = {
+    "overallScore": 70.58031746031746,
+    "verticalScore": {"score": 50.0, "percentages": [21.052631578947366, 0.0, 39.473684210526315, 18.421052631578945, 21.052631578947366], "totalDeviation": 43.15789473684211, "sections": 5},
+    "horizontalScore": {"score": 94.44444444444444, "upperPercentage": 48.148148148148145, "lowerPercentage": 51.85185185185185, "deviation": 3.7037037037037024},
+    "lowerFaceScore": {"score": 97.94285714285714, "upperPercentage": 32.142857142857146, "lowerPercentage": 67.85714285714286, "deviation": 1.7142857142857153},
+    "symmetry": 76.66666666666666,
+    "eyeScore": {"score": 50.0, "leftWidth": 0.0, "rightWidth": 0.0, "distance": 150.0, "symmetry": None},
+    "noseScore": {"score": 50.0, "width": 0.0, "height": 150.0, "ratio": None},
+    "lipScore": {"score": 50.0, "width": 100.0, "height": 0.0, "ratio": None},
+    "jawScore": {"score": 75.0},
+}
+COLLAPSED_EXPECTED = {
+    "overallScore": 99.5,
+    "verticalScore": {"score": 100.0, "percentages": [None, None, None, None, None], "totalDeviation": None, "sections": 5},
+    "horizontalScore": {"score": 100.0, "upperPercentage": None, "lowerPercentage": None, "deviation": None},
+    "lowerFaceScore": {"score": 100.0, "upperPercentage": None, "lowerPercentage": None, "deviation": None},
+    "symmetry": 100.0,
+    "eyeScore": {"score": 100.0, "leftWidth": 0.0, "rightWidth": 0.0, "distance": 0.0, "symmetry": None},
+    "noseScore": {"score": 100.0, "width": 0.0, "height": 0.0, "ratio": None},
+    "lipScore": {"score": 100.0, "width": 0.0, "height": 0.0, "ratio": None},
+    "jawScore": {"score": 75.0},
+}
+
+FIXTURES = [
+    ("balanced", BALANCED, BALANCED_EXPECTED),
+    ("asymmetric", ASYMMETRIC, ASYMMETRIC_EXPECTED),
+    ("zero_width", ZERO_WIDTH, ZERO_WIDTH_EXPECTED),
+    ("collapsed", COLLAPSED, COLLAPSED_EXPECTED),
+]
+
+
+def build_landmarks(points) -> np.ndarray:
+    landmarks = np.zeros((468, 2))
+    for index, point in points.items():
+        landmarks[index] = point
+    return landmarks
+
+
+def assert_matches(actual, expected, path="analysis"):
+    if isinstance(expected, dict):
+        assert set(actual) == set(expected), path
+        for key in expected:
+            assert_matches(actual[key], expected[key], f"{path}.{key}")
+    elif isinstance(expected, list):
+        assert len(actual) == len(expected), path
+        for i, (a, e) in enumerate(zip(actual, expected)):
+            assert_matches(a, e, f"{path}[{i}]")
+    elif expected is None or isinstance(expected, int):
+        assert actual == expected, path
+    else:
+        assert actual == pytest.approx(expected, rel=REL_TOLERANCE), path
+
+
+@pytest.mark.parametrize("name, points, expected", FIXTURES, ids=[fixture[0] for fixture in FIXTURES])
+def test_scores_match_dart(name, points, expected):
+    result = score_landmarks(build_landmarks(points))[0]
+    result.pop("analysisTimestamp")
+    assert_matches(result, expected)
+
+
+def test_degenerate_faces_serialize_to_json():
+    # 폭이 0인 구간의 inf/nan 세부 값이 500 대신 null로 응답되어야 함
+    for name, points, _ in FIXTURES[2:]:
+        image_id = f"dart-{name}"
+        main.landmark_store.put(image_id, LandmarkEntry(landmark_array(build_landmarks(points)), 640, 480))
+        main.image_cache.put(image_id, np.zeros((480, 640, 3), dtype=np.uint8), persisted=True)
+
+    response = TestClient(main.app).post("/beauty-score/batch", json={"image_ids": ["dart-zero_width", "dart-collapsed"]})
+
+    assert response.status_code == 200
+    zero_width, collapsed = (result["analysis"] for result in response.json()["results"])
+    assert zero_width["noseScore"]["ratio"] is None
+    assert collapsed["verticalScore"]["percentages"] == [None] * 5
+    assert math.isclose(collapsed["overallScore"], COLLAPSED_EXPECTED["overallScore"])
@@ -0,0 +1,57 @@
+"""이미지 다운로드 ETag/Range 테스트 (로컬 파일 응답과 직접 자르는 응답 모두)"""
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from image_store import LocalImageStore
+
+DATA = bytes(range(256)) * 4
+
+
+@pytest.fixture(params=["memory", "local"])
+def client(request, tmp_path, monkeypatch):
+    if request.param == "local":
+        # FileResponse 경로 (메모리 저장소는 바이트를 직접 잘라서 응답)
+        store = LocalImageStore(str(tmp_path), ttl_seconds=60, max_bytes=1 << 20)
+        monkeypatch.setattr(main, "image_store", store)
+        monkeypatch.setattr(main.image_cache, "store", store)
+    main.image_store.write("download-test", DATA)
+    yield TestClient(main.app)
+    main.image_store.delete("download-test")
+
+
+def test_matching_etag_returns_304_without_body(client):
+    etag = client.get("/download-image/download-test").headers["etag"]
+
+    response = client.get("/download-image/download-test", headers={"If-None-Match": etag})
+
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+
+
+def test_byte_range(client):
+    response = client.get("/download-image/download-test", headers={"Range": "bytes=0-99"})
+
+    assert response.status_code == 206
+    assert response.headers["content-range"] == f"bytes 0-99/{len(DATA)}"
+    assert response.content == DATA[:100]
+
+
+def test_suffix_range(client):
+    response = client.get("/download-image/download-test", headers={"Range": "bytes=-100"})
+
+    assert response.status_code == 206
+    assert response.headers["content-range"] == f"bytes {len(DATA) - 100}-{len(DATA) - 1}/{len(DATA)}"
+    assert response.content == DATA[-100:]
+
+
+def test_unsatisfiable_range_returns_416(client):
+    response = client.get("/download-image/download-test", headers={"Range": f"bytes={len(DATA)}-"})
+
+    assert response.status_code == 416
+    assert response.headers["content-range"] == f"bytes */{len(DATA)}"
+
+
+def test_missing_image_returns_404(client):
+    assert client.get("/download-image/no-such-image").status_code == 404
@@ -0,0 +1,52 @@
+"""단계별 얼굴 검출 단계 전환 테스트 (MediaPipe 호출은 가짜 결과로 대체)"""
+import numpy as np
+
+from face_detector import TIER_CROP, TIER_FULL, TieredFaceDetector
+
+
+def make_detector(fast_faces: int, confirmed: int, full_faces: int) -> TieredFaceDetector:
+    detector = TieredFaceDetector(tiered=True, fast_max_side=960, fast_min_score=0.8,
+                                  crop_scale=2.0, crop_max_side=1024)
+    boxes = np.array([[0.1, 0.1, 0.3, 0.3], [0.6, 0.1, 0.8, 0.3], [0.3, 0.6, 0.5, 0.8]])
+    face = np.zeros((468, 3))
+
+    detector._detect_fast = lambda image, refine: (np.zeros((fast_faces, 468, 3)), False, 0.0)
+    detector._detect_boxes = lambda image: boxes
+    detector._crop_mesh = lambda image, box, refine: face if int(box[0] * 10) in (1, 6)[:confirmed] else None
+    detector._detect_full = lambda image, refine: (np.zeros((full_faces, 468, 3)), 0.0)
+    return detector
+
+
+def test_crop_tier_result_is_used_when_all_fast_faces_are_confirmed():
+    detection = make_detector(fast_faces=2, confirmed=2, full_faces=3).detect(np.zeros((1200, 1600, 3), np.uint8))
+    assert detection.tier == TIER_CROP
+    assert len(detection.faces) == 2
+
+
+def test_falls_through_to_full_tier_when_crops_confirm_fewer_faces_than_fast_tier():
+    detector = make_detector(fast_faces=2, confirmed=1, full_faces=2)
+    detection = detector.detect(np.zeros((1200, 1600, 3), np.uint8))
+    assert detection.tier == TIER_FULL
+    assert len(detection.faces) == 2
+    assert detector.stats()["escalations"]["crop_fewer_faces"] == 1
+
+
+def test_scored_face_mesh_private_mediapipe_names_still_exist():
+    # ScoredFaceMesh는 mediapipe 내부 이름에 의존하므로 버전을 올렸을 때 여기서 바로 실패해야 함
+    # (requirements.txt의 mediapipe 고정 버전 참고)
+    from mediapipe.python import solution_base
+    from mediapipe.python.solutions import face_mesh
+
+    from face_detector import ScoredFaceMesh
+
+    assert hasattr(solution_base, "SolutionBase"), "mediapipe.python.solution_base.SolutionBase가 없습니다"
+    assert hasattr(face_mesh, "_BINARYPB_FILE_PATH"), "face_mesh._BINARYPB_FILE_PATH가 없습니다"
+
+    # 계산기 옵션 이름이 그래프에 없으면 SolutionBase가 "Not all calculator params are valid."로 실패
+    mesh = ScoredFaceMesh(max_num_faces=1, refine_landmarks=False, min_detection_confidence=0.5)
+    try:
+        results = mesh.process(np.zeros((64, 64, 3), np.uint8))
+        assert results.multi_face_landmarks is None
+        assert results.face_detections is None
+    finally:
+        mesh.close()
@@ -0,0 +1,88 @@
+"""GPT 클라이언트 테스트 (httpx MockTransport 스텁 서버)"""
+import asyncio
+import json
+
+import httpx
+import openai
+
+from gpt_client import GPTClient
+
+
+class StubServer:
+    """요청 수와 동시 처리 수를 세는 채팅 완성 스텁"""
+
+    def __init__(self, status_code: int = 200):
+        self.status_code = status_code
+        self.requests = 0
+        self.active = 0
+        self.max_active = 0
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        self.requests += 1
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(0.05)
+        finally:
+            self.active -= 1
+        if self.status_code != 200:
+            return httpx.Response(self.status_code, json={"error": {"message": "stub failure"}})
+        prompt = json.loads(request.content)["messages"][-1]["content"]
+        return httpx.Response(200, json={
+            "id": "stub", "object": "chat.completion", "created": 0, "model": "gpt-4o-mini",
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": f"답: {prompt}"}}],
+        })
+
+    def client(self, max_concurrency: int = 8) -> GPTClient:
+        return GPTClient(api_key="test", base_url="http://stub/v1", max_concurrency=max_concurrency,
+                         max_retries=0, transport=httpx.MockTransport(self.handle))
+
+
+def messages(prompt: str):
+    return [{"role": "user", "content": prompt}]
+
+
+def test_identical_concurrent_prompts_reach_the_server_once():
+    server = StubServer()
+    client = server.client()
+
+    async def scenario():
+        results = await asyncio.gather(*[client.complete(messages("같은 질문"), 50) for _ in range(5)])
+        await client.aclose()
+        return results
+
+    assert asyncio.run(scenario()) == ["답: 같은 질문"] * 5
+    assert server.requests == 1
+    assert client.stats()["deduplicated"] == 4
+
+
+def test_concurrency_never_exceeds_the_limit():
+    server = StubServer()
+    client = server.client(max_concurrency=3)
+
+    async def scenario():
+        results = await asyncio.gather(*[client.complete(messages(f"질문 {i}"), 50) for i in range(10)])
+        await client.aclose()
+        return results
+
+    assert asyncio.run(scenario()) == [f"답: 질문 {i}" for i in range(10)]
+    assert server.requests == 10
+    assert server.max_active == 3
+
+
+def test_upstream_error_reaches_every_waiter_and_clears_inflight():
+    server = StubServer(status_code=500)
+    client = server.client()
+
+    async def scenario():
+        results = await asyncio.gather(*[client.complete(messages("실패"), 50) for _ in range(4)],
+                                       return_exceptions=True)
+        await client.aclose()
+        return results
+
+    results = asyncio.run(scenario())
+    assert all(isinstance(result, openai.InternalServerError) for result in results)
+    assert server.requests == 1
+    assert client.stats()["inflight"] == 0
+    assert client.stats()["failures"] == 1
@@ -0,0 +1,40 @@
+"""이미지 캐시 축출 기록 실패 테스트"""
+import numpy as np
+
+from image_cache import ImageCache
+from image_store import MemoryImageStore
+
+
+class FlakyStore(MemoryImageStore):
+    """failing이 True인 동안 기록이 실패하는 저장소"""
+
+    def __init__(self):
+        super().__init__(ttl_seconds=60, max_bytes=1 << 30)
+        self.failing = True
+
+    def _write_object(self, image_id: str, data: bytes):
+        if self.failing:
+            raise OSError("저장소 연결 실패")
+        super()._write_object(image_id, data)
+
+
+def image(value: int) -> np.ndarray:
+    return np.full((32, 32, 3), value, dtype=np.uint8)
+
+
+def test_failed_eviction_write_keeps_image_readable_and_retries():
+    store = FlakyStore()
+    cache = ImageCache(store, max_bytes=image(0).nbytes)
+
+    cache.put("edited", image(10))
+    # 두 번째 등록이 첫 이미지를 축출하고, 저장소 기록은 실패 (예외는 put으로 올라오지 않음)
+    cache.put("other", image(20))
+
+    assert cache.stats()["write_failures"] == 1
+    assert np.array_equal(cache.get("edited"), image(10))
+
+    # 저장소가 복구되면 다음 조회/등록 때 다시 기록
+    store.failing = False
+    cache.put("third", image(30))
+    assert store.read("edited") is not None
+    assert cache.stats()["retry_writes"] == 0
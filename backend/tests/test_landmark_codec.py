@@ -0,0 +1,80 @@
+"""랜드마크 압축 형식 왕복 테스트 (X-Landmark-* 헤더로 디코딩해서 JSON과 비교)"""
+from urllib.parse import unquote
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+import landmark_codec
+import main
+from benchmark import synthetic_landmarks
+from landmark_store import LandmarkEntry, landmark_array
+
+WIDTH, HEIGHT = 1280, 960
+
+
+@pytest.fixture(scope="module")
+def client():
+    faces = np.stack([synthetic_landmarks(WIDTH, HEIGHT, seed) for seed in (1, 2)])
+    main.landmark_store.put("codec-test", LandmarkEntry(
+        landmarks=landmark_array(faces[0]), image_width=WIDTH, image_height=HEIGHT,
+        warning_message="얼굴이 기울어져 있습니다", estimated=True, faces=faces
+    ))
+    return TestClient(main.app)
+
+
+def fetch(client: TestClient, accept: str):
+    return client.get("/landmarks/codec-test", params={"all_faces": True}, headers={"Accept": accept})
+
+
+def json_faces(client: TestClient) -> np.ndarray:
+    response = fetch(client, landmark_codec.JSON_MEDIA_TYPE)
+    assert response.headers["content-type"].startswith(landmark_codec.JSON_MEDIA_TYPE)
+    return np.array(response.json()["faces"])
+
+
+def header_shape(response):
+    assert response.headers["x-image-width"] == str(WIDTH)
+    assert response.headers["x-image-height"] == str(HEIGHT)
+    assert response.headers["x-landmarks-estimated"] == "true"
+    assert unquote(response.headers["x-warning-message"]) == "얼굴이 기울어져 있습니다"
+    return int(response.headers["x-face-count"]), int(response.headers["x-landmark-count"]), 2
+
+
+def test_float32_round_trip_matches_json_exactly(client):
+    response = fetch(client, landmark_codec.FLOAT32_MEDIA_TYPE)
+
+    faces = np.frombuffer(response.content, dtype="<f4").reshape(header_shape(response))
+    np.testing.assert_array_equal(faces, json_faces(client).astype(np.float32))
+
+
+def test_int16_round_trip_is_within_one_step(client):
+    response = fetch(client, landmark_codec.INT16_MEDIA_TYPE)
+
+    scale = int(response.headers["x-landmark-scale"])
+    fixed = np.frombuffer(response.content, dtype="<i2").reshape(header_shape(response))
+    faces = fixed * np.array([WIDTH, HEIGHT]) / scale
+    error = np.abs(faces - json_faces(client))
+    assert np.all(error <= np.array([WIDTH, HEIGHT]) / scale)
+
+
+def test_msgpack_round_trip_matches_json_exactly(client):
+    msgpack = pytest.importorskip("msgpack")
+    response = fetch(client, landmark_codec.MSGPACK_MEDIA_TYPE)
+
+    content = msgpack.unpackb(response.content)
+    assert (content["image_width"], content["image_height"]) == (WIDTH, HEIGHT)
+    assert content["estimated"] and content["warning_message"] == "얼굴이 기울어져 있습니다"
+    faces = np.frombuffer(content["landmarks"], dtype="<f4").reshape(content["face_count"], content["count"], 2)
+    np.testing.assert_array_equal(faces, json_faces(client).astype(np.float32))
+
+
+def test_msgpack_falls_back_to_json_when_not_installed(client, monkeypatch):
+    monkeypatch.setattr(landmark_codec, "msgpack", None)
+
+    assert landmark_codec.negotiate_landmark_format("application/msgpack") == landmark_codec.JSON_MEDIA_TYPE
+    response = fetch(client, "application/msgpack, application/x-landmarks-i16")
+    assert response.headers["content-type"].startswith(landmark_codec.INT16_MEDIA_TYPE)
+    response = fetch(client, "application/msgpack")
+    assert response.headers["content-type"].startswith(landmark_codec.JSON_MEDIA_TYPE)
+    assert len(response.json()["faces"]) == 2
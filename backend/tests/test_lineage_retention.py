@@ -0,0 +1,46 @@
+"""lineage 체크포인트 기록과 저장소 정리 제외 테스트"""
+import main
+from benchmark import synthetic_image
+from image_cache import encode_jpeg
+from image_store import MemoryImageStore
+from lineage import LineageStore
+
+
+def test_parent_with_live_children_survives_ttl_and_quota():
+    lineage = LineageStore(":memory:", checkpoint_interval=10, ttl_seconds=3600)
+    lineage.record("child", "original", {"kind": "warp"})
+
+    # 용량 초과: 고정되지 않은 항목만 축출
+    store = MemoryImageStore(ttl_seconds=3600, max_bytes=4)
+    store.is_pinned = lineage.has_children
+    store.write("original", b"1234")
+    store.write("other", b"5678")
+    store.sweep()
+    assert store.read("original") == b"1234"
+    assert store.read("other") is None
+
+    # TTL 만료: 자식이 있는 동안은 유지
+    expiring = MemoryImageStore(ttl_seconds=0, max_bytes=1 << 20)
+    expiring.is_pinned = lineage.has_children
+    expiring.write("original", b"1234")
+    expiring.write("other", b"5678")
+    expiring.sweep()
+    assert expiring.read("original") == b"1234"
+    assert expiring.read("other") is None
+
+
+def test_checkpoint_is_written_when_recorded():
+    image = synthetic_image(64, 48)
+    jpeg_bytes = encode_jpeg(image)
+    parent_id = "checkpoint-parent"
+    interval = main.lineage_store.checkpoint_interval
+
+    for step in range(interval):
+        image_id = f"checkpoint-step-{step}"
+        main.store_derived_image(parent_id, image_id, image, jpeg_bytes, {"kind": "warp", "operations": []})
+        parent_id = image_id
+
+    # 마지막 단계가 체크포인트: 캐시 축출이나 재시작을 기다리지 않고 저장소에 있어야 함
+    assert main.lineage_store.get(parent_id).checkpoint
+    assert main.image_store.read(parent_id) == jpeg_bytes
+    assert main.image_store.read("checkpoint-step-0") is None
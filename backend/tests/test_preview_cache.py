@@ -0,0 +1,47 @@
+"""프리뷰 프록시/결과의 캐시 정리 테스트"""
+from fastapi.testclient import TestClient
+
+import main
+from benchmark import synthetic_image
+
+WIDTH, HEIGHT = 2048, 1536
+
+
+def test_preview_images_are_volatile_and_proxy_goes_with_source():
+    client = TestClient(main.app)
+    main.image_cache.put("preview-source", synthetic_image(WIDTH, HEIGHT), persisted=True)
+    proxy_id = main.preview_proxy_id("preview-source")
+
+    response = client.post("/warp-image", json={
+        "image_id": "preview-source", "start_x": 1000, "start_y": 700, "end_x": 1040, "end_y": 720,
+        "preview": True
+    })
+    assert response.status_code == 200
+    preview_id = response.json()["image_id"]
+
+    # 프록시와 프리뷰 결과는 축출될 때 저장소에 기록하지 않음
+    assert {proxy_id, preview_id} <= main.image_cache._volatile
+
+    client.delete("/image/preview-source")
+    assert main.image_cache.get(proxy_id) is None
+
+
+def test_evicted_preview_is_rebuilt_when_the_drag_continues():
+    client = TestClient(main.app)
+    main.image_cache.put("drag-source", synthetic_image(WIDTH, HEIGHT), persisted=True)
+    drag = {"start_x": 1000, "start_y": 700, "end_x": 1040, "end_y": 720, "preview": True}
+
+    first = client.post("/warp-image", json={"image_id": "drag-source", **drag}).json()["image_id"]
+    expected = client.post("/warp-image", json={"image_id": first, **drag}).json()
+
+    # 프리뷰 결과와 프록시가 모두 캐시에서 밀려나도 세션 연산으로 다시 만들어서 이어 감
+    main.image_cache.discard(first)
+    main.image_cache.discard(main.preview_proxy_id("drag-source"))
+    reconstructions = main.image_cache.stats()["reconstructions"]
+    response = client.post("/warp-image", json={"image_id": first, **drag})
+
+    assert response.status_code == 200
+    assert main.image_cache.stats()["reconstructions"] == reconstructions + 1
+    assert response.json()["image_id"] != expected["image_id"]
+    assert {k: v for k, v in response.json().items() if k != "image_id"} == \
+        {k: v for k, v in expected.items() if k != "image_id"}
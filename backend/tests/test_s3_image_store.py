@@ -0,0 +1,43 @@
+"""S3 이미지 저장소 테스트 (moto 가상 S3)"""
+import pytest
+
+boto3 = pytest.importorskip("boto3")
+moto = pytest.importorskip("moto")
+
+from image_store import S3ImageStore, blob_id, content_digest
+
+
+@pytest.fixture
+def bucket(monkeypatch):
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "test")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "test")
+    with moto.mock_aws():
+        boto3.client("s3", region_name="us-east-1").create_bucket(Bucket="images")
+        yield "images"
+
+
+def test_delete_reports_objects_written_by_another_node(bucket):
+    # other는 writer가 기록하기 전에 시작해서 인덱스에 이 이미지가 없음
+    other = S3ImageStore(bucket, ttl_seconds=60, max_bytes=1 << 20, region_name="us-east-1")
+    writer = S3ImageStore(bucket, ttl_seconds=60, max_bytes=1 << 20, region_name="us-east-1")
+    writer.write("shared", b"jpeg")
+
+    assert other.delete("shared")
+    assert not other.delete("shared")
+    assert writer.read("shared") is None
+
+
+def test_uploads_share_one_blob_across_nodes(bucket):
+    first = S3ImageStore(bucket, ttl_seconds=60, max_bytes=1 << 20, region_name="us-east-1")
+    second = S3ImageStore(bucket, ttl_seconds=60, max_bytes=1 << 20, region_name="us-east-1")
+    digest = content_digest(b"jpeg")
+
+    assert not first.write_upload("a", digest, lambda: b"jpeg")
+    assert second.write_upload("b", digest, lambda: pytest.fail("blob을 다시 올리면 안 됨"))
+    assert second.read("a") == first.read("b") == b"jpeg"
+
+    # 참조 기록이 버킷에 있으므로 다른 노드의 링크가 남아 있으면 blob도 남음
+    assert first.delete("a")
+    assert first.read("b") == b"jpeg"
+    assert first.delete("b")
+    assert first._stat_object(blob_id(digest)) is None
@@ -0,0 +1,66 @@
+"""중복 업로드 테스트 (ID는 업로드마다 다르고, 삭제는 서로 영향을 주지 않음)"""
+import os
+
+import cv2
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from benchmark import synthetic_image
+from image_store import LocalImageStore, blob_id, content_digest
+
+
+def jpeg_bytes() -> bytes:
+    ok, encoded = cv2.imencode(".jpg", cv2.cvtColor(synthetic_image(320, 240), cv2.COLOR_RGB2BGR))
+    assert ok
+    return encoded.tobytes()
+
+
+def upload(client: TestClient, data: bytes) -> str:
+    response = client.post("/upload-image", files={"file": ("face.jpg", data, "image/jpeg")})
+    assert response.status_code == 200
+    return response.json()["image_id"]
+
+
+def test_same_photo_gets_separate_ids_and_delete_keeps_the_other():
+    client = TestClient(main.app)
+    data = jpeg_bytes()
+    deduplicated = main.image_store.stats()["deduplicated"]
+
+    first = upload(client, data)
+    second = upload(client, data)
+
+    assert first != second
+    assert main.image_store.stats()["deduplicated"] == deduplicated + 1
+
+    assert client.delete(f"/image/{first}").status_code == 200
+    assert client.get(f"/download-image/{first}").status_code == 404
+    assert client.get(f"/download-image/{second}").content == data
+
+
+def test_local_store_shares_blob_across_restarts_until_last_link_is_deleted(tmp_path):
+    data = b"jpeg-bytes"
+    digest = content_digest(data)
+    first_run = LocalImageStore(str(tmp_path), ttl_seconds=60, max_bytes=1 << 20)
+    assert not first_run.write_upload("first", digest, lambda: data)
+
+    # 재시작한 프로세스(또는 같은 디스크를 쓰는 다른 워커)도 저장된 blob을 찾음
+    restarted = LocalImageStore(str(tmp_path), ttl_seconds=60, max_bytes=1 << 20)
+    assert restarted.write_upload("second", digest, lambda: pytest.fail("blob을 다시 만들면 안 됨"))
+    assert restarted.read("first") == restarted.read("second") == data
+
+    assert restarted.delete("first")
+    assert restarted.read("second") == data
+    assert restarted.delete("second")
+    assert not os.path.exists(restarted.path_for(blob_id(digest)))
+    assert not restarted.write_upload("third", digest, lambda: data)
+
+
+def test_blob_ids_are_not_image_ids(tmp_path):
+    store = LocalImageStore(str(tmp_path), ttl_seconds=60, max_bytes=1 << 20)
+    digest = content_digest(b"jpeg-bytes")
+    store.write_upload("first", digest, lambda: b"jpeg-bytes")
+
+    assert store.read(blob_id(digest)) is None
+    assert not store.delete(blob_id(digest))
+    assert store.read("first") == b"jpeg-bytes"
@@ -0,0 +1,156 @@
+"""워핑 엔진 동등성 테스트 (시드 고정 무작위 연산)"""
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+import pytest
+
+import warp_engine
+from benchmark import synthetic_image
+
+WIDTH, HEIGHT = 640, 480
+SEEDS = range(8)
+
+
+def random_brush(rng: np.random.Generator):
+    """가장자리에 걸치는 경우를 포함한 무작위 브러시 (시작점, 끝점, 반경, 강도, 타원 비율, 각도)"""
+    limit = [WIDTH - 1, HEIGHT - 1]
+    start = rng.uniform([0, 0], limit)
+    end = np.clip(start + rng.uniform(-60, 60, 2), 0, limit)
+    ellipse_ratio = None if rng.random() < 0.5 else float(rng.uniform(0.5, 2.5))
+    return (float(start[0]), float(start[1]), float(end[0]), float(end[1]),
+            float(rng.uniform(10, 200)), float(rng.uniform(0.1, 1.0)), ellipse_ratio,
+            float(rng.uniform(0, 180)))
+
+
+def full_frame_remap(image: np.ndarray, map_x: np.ndarray, map_y: np.ndarray) -> np.ndarray:
+    """ROI로 자르지 않고 전체 이미지 맵으로 remap (예전 방식)"""
+    warp_engine.clip_coords(map_x, map_y, WIDTH, HEIGHT)
+    return cv2.remap(image, map_x, map_y, cv2.INTER_LINEAR, borderMode=cv2.BORDER_REFLECT)
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+@pytest.mark.parametrize("mode", ["pull", "push", "expand", "shrink"])
+def test_roi_remap_matches_full_frame_remap(seed, mode):
+    image = synthetic_image(WIDTH, HEIGHT)
+    start_x, start_y, end_x, end_y, radius, strength, ellipse_ratio, angle = random_brush(
+        np.random.default_rng(seed))
+    frame = (0, 0, WIDTH, HEIGHT)
+
+    if mode in ("pull", "push"):
+        sign = 1 if mode == "pull" else -1
+        maps = warp_engine.directional_maps(frame, start_x, start_y, sign * (start_x - end_x),
+                                            sign * (start_y - end_y), radius, strength, ellipse_ratio, angle)
+    else:
+        maps = warp_engine.radial_maps(frame, start_x, start_y, radius, strength, mode == "expand",
+                                       ellipse_ratio, angle)
+    expected = full_frame_remap(image, maps[0].copy(), maps[1].copy())
+
+    result = warp_engine.apply_warp(image, start_x, start_y, end_x, end_y, radius, strength, mode,
+                                    ellipse_ratio, angle)
+    np.testing.assert_array_equal(result, expected)
+
+
+def random_pull_cluster(rng: np.random.Generator):
+    """서로 겹쳐서 영향을 주고받는 당기기 연산 2~4개 (가장자리 클리핑이 없도록 이미지 안쪽)"""
+    center = rng.uniform([150, 150], [WIDTH - 150, HEIGHT - 150])
+    operations = []
+    for _ in range(rng.integers(2, 5)):
+        start = center + rng.uniform(-40, 40, 2)
+        end = start + rng.uniform(-40, 40, 2)
+        ellipse_ratio = None if rng.random() < 0.5 else float(rng.uniform(0.6, 2.0))
+        operations.append((float(start[0]), float(start[1]), float(end[0]), float(end[1]),
+                           float(rng.uniform(60, 140)), float(rng.uniform(0.2, 1.0)), ellipse_ratio))
+    return operations
+
+
+def reference_composition(operations):
+    """출력 픽셀마다 마지막 연산부터 좌표를 통과시킨 float64 기준 맵 M1(M2(...Mn(p)))"""
+    map_y, map_x = np.mgrid[0:HEIGHT, 0:WIDTH].astype(np.float64)
+    for start_x, start_y, end_x, end_y, radius, strength, ellipse_ratio in reversed(operations):
+        ratio = 1.0 if ellipse_ratio is None else ellipse_ratio
+        distance = np.hypot(map_x - start_x, ratio * (map_y - start_y))
+        weight = strength * np.maximum(1 - distance / radius, 0) ** 2
+        map_x = np.clip(map_x + weight * (start_x - end_x), 0, WIDTH - 1)
+        map_y = np.clip(map_y + weight * (start_y - end_y), 0, HEIGHT - 1)
+    return map_x, map_y
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_exact_composition_matches_pointwise_reference(seed):
+    operations = random_pull_cluster(np.random.default_rng(seed))
+
+    map_x, map_y = warp_engine.composed_pull_maps((0, 0, WIDTH, HEIGHT), operations, WIDTH, HEIGHT)
+    expected_x, expected_y = reference_composition(operations)
+    np.testing.assert_allclose(map_x, expected_x, atol=1e-2)
+    np.testing.assert_allclose(map_y, expected_y, atol=1e-2)
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_windowed_clusters_match_full_frame_composition(seed):
+    # 떨어진 두 묶음: 클러스터와 연산별 창으로 나눠 합성해도 전체 프레임 합성과 같아야 함
+    rng = np.random.default_rng(seed)
+    operations = random_pull_cluster(rng) + random_pull_cluster(rng)
+    image = synthetic_image(WIDTH, HEIGHT)
+
+    map_x, map_y = warp_engine.composed_pull_maps((0, 0, WIDTH, HEIGHT), operations, WIDTH, HEIGHT)
+    expected = full_frame_remap(image, map_x.copy(), map_y.copy())
+    np.testing.assert_array_equal(warp_engine.apply_pull_operations(image, operations), expected)
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_exact_composition_matches_sequential_warps(seed):
+    # 순차 적용은 매번 재샘플링하므로 부드러운 이미지에서 보간 오차만큼만 다름
+    operations = random_pull_cluster(np.random.default_rng(seed))
+    image = cv2.GaussianBlur(synthetic_image(WIDTH, HEIGHT), (0, 0), 3)
+
+    exact = warp_engine.apply_pull_operations(image, operations, warp_engine.COMPOSE_EXACT)
+    sequential = warp_engine.apply_pull_operations(image, operations, warp_engine.COMPOSE_SEQUENTIAL)
+    assert np.abs(exact.astype(int) - sequential.astype(int)).mean() < 0.1
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_sum_composition_error_stays_within_reported_bound(seed):
+    operations = random_pull_cluster(np.random.default_rng(seed))
+    frame = (0, 0, WIDTH, HEIGHT)
+
+    exact_x, exact_y = (m.copy() for m in warp_engine.composed_pull_maps(frame, operations, WIDTH, HEIGHT))
+    sum_x, sum_y = warp_engine.composed_pull_maps(frame, operations, WIDTH, HEIGHT, warp_engine.COMPOSE_SUM)
+    error = np.hypot(sum_x - exact_x, sum_y - exact_y).max()
+    assert error <= warp_engine.sum_composition_error_bound(operations) + 1e-3
+
+
+@pytest.mark.parametrize("mode", ["pull", "expand"])
+@pytest.mark.parametrize("ellipse_ratio", [None, 1.6])
+def test_steady_state_warp_allocates_only_the_result(mode, ellipse_ratio):
+    image = synthetic_image(WIDTH, HEIGHT)
+    brush = (320, 240, 350, 260, 120, 0.8, mode, ellipse_ratio, 30)
+    warp_engine.apply_warp(image, *brush)
+
+    tracemalloc.start()
+    try:
+        baseline = tracemalloc.get_traced_memory()[0]
+        result = warp_engine.apply_warp(image, *brush)
+        peak = tracemalloc.get_traced_memory()[1] - baseline
+    finally:
+        tracemalloc.stop()
+    # 결과 이미지 복사본 외에는 ROI 맵(240x240 float32 = 230KB) 하나 크기도 새로 할당하지 않음
+    assert peak - result.nbytes < 16 * 1024
+
+
+def test_scratch_reuse_across_shapes_and_threads_gives_identical_results():
+    image = synthetic_image(WIDTH, HEIGHT)
+    brushes = [random_brush(np.random.default_rng(seed)) for seed in SEEDS]
+
+    def warp_all(order):
+        return {index: warp_engine.apply_warp(image, *brushes[index][:6], "pull", *brushes[index][6:])
+                for index in order}
+
+    # 크기가 다른 ROI를 번갈아 써서 스크래치 버퍼가 재할당/재사용되는 순서를 바꿔도 결과가 같아야 함
+    expected = warp_all(range(len(brushes)))
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        runs = list(executor.map(warp_all, [list(reversed(range(len(brushes))))] * 4 + [range(len(brushes))] * 4))
+    for run in runs:
+        for index, result in run.items():
+            np.testing.assert_array_equal(result, expected[index])
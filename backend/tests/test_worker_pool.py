@@ -0,0 +1,28 @@
+"""워커 풀 대기 수 테스트"""
+import asyncio
+import threading
+
+from worker_pool import WorkerPool
+
+
+def test_cancelled_request_keeps_its_slot_until_the_thread_finishes():
+    pool = WorkerPool(max_workers=1, max_pending=4)
+    started, release = threading.Event(), threading.Event()
+
+    def blocking():
+        started.set()
+        release.wait(5)
+
+    async def scenario():
+        task = asyncio.create_task(pool.run(blocking))
+        await asyncio.to_thread(started.wait, 5)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        # 요청은 취소됐지만 스레드는 아직 실행 중
+        assert pool.stats()["pending"] == 1
+        release.set()
+        await pool.run(lambda: None)
+
+    asyncio.run(scenario())
+    pool.shutdown()
+    assert pool.stats()["pending"] == 0
@@ -0,0 +1,722 @@
+"""
+ROI 기반 워핑 엔진
+
+브러시 영향 반경의 경계 박스에서만 변형 맵을 만들고, 샘플링에 필요한 원본 영역만
+잘라서 cv2.remap을 수행한 뒤 결과를 원래 위치에 붙여넣는다.
+영향 반경 밖의 픽셀은 항등 맵(정수 좌표)이므로 전체 이미지를 remap한 결과와
+픽셀 단위로 동일하다.
+
+좌표축(arange)은 길이별로 캐시하고, 변형 맵과 중간 배열은 스레드별 스크래치 버퍼를
+재사용하며 in-place 연산(out=)으로 계산해서 반복되는 워핑에서 큰 배열을 새로 할당하지 않는다.
+"""
+import math
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+# (x0, y0, x1, y1) - x1, y1은 포함하지 않음
+Roi = Tuple[int, int, int, int]
+
+# 당기기 연산: (start_x, start_y, end_x, end_y, influence_radius, strength, ellipse_ratio)
+PullOperation = Tuple[float, float, float, float, float, float, Optional[float]]
+
+# 당기기 연산 목록 합성 방식
+COMPOSE_SEQUENTIAL = "sequential"  # 연산마다 remap (기존 방식)
+COMPOSE_EXACT = "exact"            # 좌표 맵을 정확히 합성해서 remap 한 번
+COMPOSE_SUM = "sum"                # 변위를 단순 합산해서 remap 한 번 (근사)
+COMPOSE_MODES = (COMPOSE_SEQUENTIAL, COMPOSE_EXACT, COMPOSE_SUM)
+
+# float32 거리 계산 오차를 덮기 위한 대상 영역 여유분
+ROI_MARGIN = 1
+# 선형 보간이 참조하는 이웃 픽셀 여유분
+INTERP_MARGIN = 2
+# 좌표 맵 합성 시 연산 변위를 한 번에 계산하는 행 수 (중간 배열을 캐시에 들어가는 크기로 유지)
+BAND_ROWS = 64
+
+# 스레드별로 유지하는 스크래치 버퍼 최대 크기 (넘는 요청은 임시 할당 후 버림)
+SCRATCH_MAX_BYTES = 64 * 1024 * 1024
+
+_axis_cache: Dict[int, np.ndarray] = {}
+_axis_lock = threading.Lock()
+_scratch = threading.local()
+
+
+def axis_coords(length: int) -> np.ndarray:
+    """0..length-1 float32 좌표축 (길이별 캐시, 읽기 전용)"""
+    coords = _axis_cache.get(length)
+    if coords is None:
+        coords = np.arange(length, dtype=np.float32)
+        coords.setflags(write=False)
+        with _axis_lock:
+            coords = _axis_cache.setdefault(length, coords)
+    return coords
+
+
+def scratch(name: str, shape: Tuple[int, ...], dtype=np.float32) -> np.ndarray:
+    """현재 스레드의 재사용 버퍼 (내용은 초기화되지 않음)
+
+    같은 스레드에서 같은 name을 다시 요청하면 덮어쓰므로, 반환 배열은 다음 워핑 전까지만 유효하다.
+    """
+    dtype = np.dtype(dtype)
+    size = int(np.prod(shape))
+    nbytes = size * dtype.itemsize
+
+    buffers = getattr(_scratch, "buffers", None)
+    if buffers is None:
+        buffers = _scratch.buffers = {}
+
+    buffer = buffers.get((name, dtype))
+    if buffer is None or buffer.size < size:
+        buffer = np.empty(size, dtype=dtype)
+        retained = sum(b.nbytes for key, b in buffers.items() if key != (name, dtype))
+        if retained + nbytes <= SCRATCH_MAX_BYTES:
+            buffers[(name, dtype)] = buffer
+    return buffer[:size].reshape(shape)
+
+
+def is_circular(ellipse_ratio: Optional[float]) -> bool:
+    """타원 비율이 없거나 1이면 원형 브러시"""
+    if ellipse_ratio is None or ellipse_ratio == 1:
+        return True
+    if not ellipse_ratio > 0:
+        raise ValueError(f"ellipse_ratio must be positive: {ellipse_ratio}")
+    return False
+
+
+def ellipse_extents(radius: float, ellipse_ratio: Optional[float],
+                    ellipse_angle: float = 0.0) -> Tuple[float, float]:
+    """영향 타원 경계 박스의 반폭/반높이
+
+    타원의 장축 반지름은 radius(ellipse_angle 방향, 도 단위), 단축 반지름은 radius / ellipse_ratio.
+    """
+    if is_circular(ellipse_ratio):
+        return radius, radius
+    major = radius
+    minor = radius / ellipse_ratio
+    cos_a = math.cos(math.radians(ellipse_angle))
+    sin_a = math.sin(math.radians(ellipse_angle))
+    return (math.hypot(major * cos_a, minor * sin_a),
+            math.hypot(major * sin_a, minor * cos_a))
+
+
+def box_roi(img_width: int, img_height: int, center_x: float, center_y: float,
+            half_width: float, half_height: float) -> Optional[Roi]:
+    """중심과 반폭/반높이로 경계 박스 계산 (이미지 밖이면 None)"""
+    x0 = max(0, int(math.floor(center_x - half_width)) - ROI_MARGIN)
+    y0 = max(0, int(math.floor(center_y - half_height)) - ROI_MARGIN)
+    x1 = min(img_width, int(math.ceil(center_x + half_width)) + ROI_MARGIN + 1)
+    y1 = min(img_height, int(math.ceil(center_y + half_height)) + ROI_MARGIN + 1)
+
+    if x0 >= x1 or y0 >= y1:
+        return None
+    return x0, y0, x1, y1
+
+
+def circle_roi(img_width: int, img_height: int, center_x: float, center_y: float,
+               radius: float) -> Optional[Roi]:
+    """영향 원의 경계 박스 계산 (영향 영역이 없으면 None)"""
+    if not radius > 0:
+        return None
+    return box_roi(img_width, img_height, center_x, center_y, radius, radius)
+
+
+def influence_roi(img_width: int, img_height: int, center_x: float, center_y: float,
+                  radius: float, ellipse_ratio: Optional[float] = None,
+                  ellipse_angle: float = 0.0) -> Optional[Roi]:
+    """영향 영역(원 또는 회전 타원)의 꼭 맞는 경계 박스"""
+    if is_circular(ellipse_ratio):
+        return circle_roi(img_width, img_height, center_x, center_y, radius)
+    if not radius > 0:
+        return None
+    half_width, half_height = ellipse_extents(radius, ellipse_ratio, ellipse_angle)
+    return box_roi(img_width, img_height, center_x, center_y, half_width, half_height)
+
+
+def identity_grid(roi: Roi, out: Optional[Tuple[np.ndarray, np.ndarray]] = None
+                  ) -> Tuple[np.ndarray, np.ndarray]:
+    """ROI 영역의 항등 좌표 맵 (전체 이미지 좌표계, out이 있으면 그 배열에 채움)"""
+    x0, y0, x1, y1 = roi
+    if out is None:
+        out = (np.empty((y1 - y0, x1 - x0), dtype=np.float32),
+               np.empty((y1 - y0, x1 - x0), dtype=np.float32))
+    map_x, map_y = out
+    map_x[...] = axis_coords(x1)[x0:x1]
+    map_y[...] = axis_coords(y1)[y0:y1, None]
+    return map_x, map_y
+
+
+def scratch_grid(roi: Roi) -> Tuple[np.ndarray, np.ndarray]:
+    """스크래치 버퍼에 채운 항등 좌표 맵 (다음 워핑 전까지만 유효)"""
+    x0, y0, x1, y1 = roi
+    shape = (y1 - y0, x1 - x0)
+    return identity_grid(roi, out=(scratch("map_x", shape), scratch("map_y", shape)))
+
+
+def clip_coords(map_x: np.ndarray, map_y: np.ndarray, img_width: int, img_height: int):
+    """좌표 맵을 이미지 범위로 in-place 클리핑 (np.clip보다 빠르고 비연속 뷰에서도 느려지지 않음)"""
+    np.maximum(map_x, 0, out=map_x)
+    np.minimum(map_x, img_width - 1, out=map_x)
+    np.maximum(map_y, 0, out=map_y)
+    np.minimum(map_y, img_height - 1, out=map_y)
+
+
+def remap_roi(image: np.ndarray, roi: Roi, map_x: np.ndarray, map_y: np.ndarray,
+              out: Optional[np.ndarray] = None) -> np.ndarray:
+    """ROI 맵으로 remap 후 결과를 이미지 복사본(또는 out)에 붙여넣기
+
+    map_x, map_y는 전체 이미지 좌표계이며 함수 안에서 변경된다.
+    """
+    img_height, img_width = image.shape[:2]
+    x0, y0, x1, y1 = roi
+
+    # 경계 클리핑 (전체 이미지 기준)
+    clip_coords(map_x, map_y, img_width, img_height)
+
+    # 샘플링에 필요한 원본 영역만 잘라내기
+    src_x0 = max(0, int(math.floor(map_x.min())) - INTERP_MARGIN)
+    src_y0 = max(0, int(math.floor(map_y.min())) - INTERP_MARGIN)
+    src_x1 = min(img_width, int(math.ceil(map_x.max())) + INTERP_MARGIN + 1)
+    src_y1 = min(img_height, int(math.ceil(map_y.max())) + INTERP_MARGIN + 1)
+
+    # 정수 오프셋 빼기는 float32에서 오차가 없으므로 보간 결과가 동일하다
+    map_x -= src_x0
+    map_y -= src_y0
+
+    patch = scratch("patch", map_x.shape + image.shape[2:], image.dtype)
+    cv2.remap(image[src_y0:src_y1, src_x0:src_x1], map_x, map_y,
+              cv2.INTER_LINEAR, dst=patch, borderMode=cv2.BORDER_REFLECT)
+
+    result = image.copy() if out is None else out
+    result[y0:y1, x0:x1] = patch
+    return result
+
+
+def elliptical_distance(dx: np.ndarray, dy: np.ndarray, ellipse_ratio: float,
+                        ellipse_angle: float, out: np.ndarray) -> np.ndarray:
+    """회전 타원 좌표계의 거리 (장축 방향 거리 단위, out에 계산)
+
+    장축 방향 성분 u와 단축 방향 성분 v에 대해 sqrt(u^2 + (ratio * v)^2)이므로
+    타원 경계에서 influence_radius가 된다.
+    """
+    shape = dx.shape
+    cos_a = math.cos(math.radians(ellipse_angle))
+    sin_a = math.sin(math.radians(ellipse_angle))
+
+    u = np.multiply(dx, cos_a, out=scratch("ellipse_u", shape, dx.dtype))
+    u += np.multiply(dy, sin_a, out=out)
+    v = np.multiply(dy, cos_a, out=scratch("ellipse_v", shape, dx.dtype))
+    v -= np.multiply(dx, sin_a, out=out)
+    v *= ellipse_ratio
+
+    np.multiply(u, u, out=out)
+    out += np.square(v, out=v)
+    return np.sqrt(out, out=out)
+
+
+def directional_maps(roi: Roi, start_x: float, start_y: float, dx: float, dy: float,
+                     influence_radius: float, strength: float,
+                     ellipse_ratio: Optional[float] = None,
+                     ellipse_angle: float = 0.0) -> Tuple[np.ndarray, np.ndarray]:
+    """당기기/밀어내기 공통 변형 맵 (ROI 영역, 스크래치 버퍼)"""
+    map_x, map_y = scratch_grid(roi)
+    shape = map_x.shape
+
+    # 각 픽셀에서 시작점까지의 거리 계산 (타원이면 타원 좌표계 거리)
+    pixel_dx = np.subtract(map_x, start_x, out=scratch("pixel_dx", shape))
+    pixel_dy = np.subtract(map_y, start_y, out=scratch("pixel_dy", shape))
+    pixel_dist = scratch("pixel_dist", shape)
+    if is_circular(ellipse_ratio):
+        np.multiply(pixel_dx, pixel_dx, out=pixel_dist)
+        np.multiply(pixel_dy, pixel_dy, out=pixel_dy)
+        pixel_dist += pixel_dy
+        np.sqrt(pixel_dist, out=pixel_dist)
+    else:
+        elliptical_distance(pixel_dx, pixel_dy, ellipse_ratio, ellipse_angle, out=pixel_dist)
+
+    # 변형 강도 계산 (영향 반경 밖은 1 - d/R <= 0 이므로 0으로 잘라내면 마스크와 같다)
+    strength_map = np.divide(pixel_dist, influence_radius, out=pixel_dist)
+    np.subtract(1, strength_map, out=strength_map)
+    np.maximum(strength_map, 0, out=strength_map)
+    np.square(strength_map, out=strength_map)
+    strength_map *= strength
+
+    # 변형 적용
+    map_x += np.multiply(strength_map, dx, out=pixel_dx)
+    map_y += np.multiply(strength_map, dy, out=pixel_dy)
+
+    return map_x, map_y
+
+
+def radial_maps(roi: Roi, center_x: float, center_y: float, influence_radius: float,
+                strength: float, expand: bool = True, ellipse_ratio: Optional[float] = None,
+                ellipse_angle: float = 0.0) -> Tuple[np.ndarray, np.ndarray]:
+    """확대/축소 변형 맵 (ROI 영역, 스크래치 버퍼)"""
+    map_x, map_y = scratch_grid(roi)
+    shape = map_x.shape
+
+    # 중심점으로부터의 거리와 각도 (타원이면 타원 좌표계 거리)
+    dx = np.subtract(map_x, center_x, out=scratch("pixel_dx", shape))
+    dy = np.subtract(map_y, center_y, out=scratch("pixel_dy", shape))
+    distance = scratch("pixel_dist", shape)
+    if is_circular(ellipse_ratio):
+        np.multiply(dx, dx, out=distance)
+        distance += np.multiply(dy, dy, out=scratch("scale_factor", shape))
+        np.sqrt(distance, out=distance)
+    else:
+        elliptical_distance(dx, dy, ellipse_ratio, ellipse_angle, out=distance)
+
+    # 영향받는 영역
+    mask = np.less(distance, influence_radius, out=scratch("mask", shape, np.bool_))
+
+    # 변형 계수 계산
+    strength_factor = strength * 0.3
+
+    scale_factor = np.divide(distance, influence_radius, out=scratch("scale_factor", shape))
+    np.subtract(1, scale_factor, out=scale_factor)
+    scale_factor *= strength_factor
+    if expand:
+        # 확대: 중심으로 가까워지게 (팽창 효과)
+        np.subtract(1, scale_factor, out=scale_factor)
+    else:
+        # 축소: 중심에서 멀어지게 (수축 효과)
+        np.add(1, scale_factor, out=scale_factor)
+
+    np.maximum(scale_factor, 0.1, out=scale_factor)  # 최소 스케일 제한
+
+    # 영향받는 영역만 업데이트
+    dx *= scale_factor
+    dx += center_x
+    dy *= scale_factor
+    dy += center_y
+    np.copyto(map_x, dx, where=mask)
+    np.copyto(map_y, dy, where=mask)
+
+    return map_x, map_y
+
+
+def point_distance(offset: np.ndarray, ellipse_ratio: Optional[float] = None,
+                   ellipse_angle: float = 0.0) -> np.ndarray:
+    """중심 기준 오프셋 (N, 2)의 영향 거리 (타원이면 elliptical_distance와 같은 식)"""
+    if is_circular(ellipse_ratio):
+        return np.hypot(offset[:, 0], offset[:, 1])
+    cos_a = math.cos(math.radians(ellipse_angle))
+    sin_a = math.sin(math.radians(ellipse_angle))
+    u = offset[:, 0] * cos_a + offset[:, 1] * sin_a
+    v = offset[:, 1] * cos_a - offset[:, 0] * sin_a
+    return np.hypot(u, v * ellipse_ratio)
+
+
+def directional_displacement(points: np.ndarray, start_x: float, start_y: float, dx: float, dy: float,
+                             influence_radius: float, strength: float,
+                             ellipse_ratio: Optional[float] = None,
+                             ellipse_angle: float = 0.0) -> np.ndarray:
+    """당기기/밀어내기 변위 (임의 좌표, directional_maps와 같은 식)"""
+    offset = points - (start_x, start_y)
+    distance = point_distance(offset, ellipse_ratio, ellipse_angle)
+    weight = np.where(distance < influence_radius,
+                      (1 - distance / max(influence_radius, 1e-6)) ** 2 * strength, 0.0)
+    return weight[:, None] * (dx, dy)
+
+
+def radial_displacement(points: np.ndarray, center_x: float, center_y: float,
+                        influence_radius: float, strength: float, expand: bool = True,
+                        ellipse_ratio: Optional[float] = None, ellipse_angle: float = 0.0) -> np.ndarray:
+    """확대/축소 변위 (임의 좌표, radial_maps와 같은 식)"""
+    offset = points - (center_x, center_y)
+    distance = point_distance(offset, ellipse_ratio, ellipse_angle)
+    falloff = 1 - distance / max(influence_radius, 1e-6)
+    strength_factor = strength * 0.3
+
+    if expand:
+        scale_factor = 1 - strength_factor * falloff
+    else:
+        scale_factor = 1 + strength_factor * falloff
+    scale_factor = np.maximum(scale_factor, 0.1)
+
+    return np.where((distance < influence_radius)[:, None], offset * (scale_factor - 1)[:, None], 0.0)
+
+
+def forward_points(points: np.ndarray, displacement: Callable[[np.ndarray], np.ndarray],
+                   img_width: int, img_height: int, iterations: int = 8) -> np.ndarray:
+    """원본 좌표의 점이 워핑 후 놓이는 위치 추정
+
+    워핑은 출력 픽셀 p가 원본 p + d(p)를 샘플링하는 역방향 맵이므로,
+    원본 점 q에 대해 p + d(p) = q를 고정점 반복으로 푼다.
+    """
+    target = np.asarray(points, dtype=np.float64)
+    moved = target.copy()
+    for _ in range(iterations):
+        moved = target - displacement(moved)
+        np.clip(moved[:, 0], 0, img_width - 1, out=moved[:, 0])
+        np.clip(moved[:, 1], 0, img_height - 1, out=moved[:, 1])
+    return moved
+
+
+def pull_points(points: np.ndarray, img_width: int, img_height: int, start_x: float, start_y: float,
+                end_x: float, end_y: float, influence_radius: float, strength: float,
+                ellipse_ratio: Optional[float] = None, ellipse_angle: float = 0.0) -> np.ndarray:
+    """apply_pull_warp 적용 후의 점 위치"""
+    dx = start_x - end_x
+    dy = start_y - end_y
+    return forward_points(
+        points,
+        lambda p: directional_displacement(p, start_x, start_y, dx, dy, influence_radius, strength,
+                                           ellipse_ratio, ellipse_angle),
+        img_width, img_height
+    )
+
+
+def warp_points(points: np.ndarray, img_width: int, img_height: int, start_x: float, start_y: float,
+                end_x: float, end_y: float, influence_radius: float, strength: float,
+                mode: str, ellipse_ratio: Optional[float] = None, ellipse_angle: float = 0.0) -> np.ndarray:
+    """apply_warp 적용 후의 점 위치"""
+    # 좌표 경계 검사 (apply_warp와 동일)
+    start_x = max(0, min(start_x, img_width - 1))
+    start_y = max(0, min(start_y, img_height - 1))
+    end_x = max(0, min(end_x, img_width - 1))
+    end_y = max(0, min(end_y, img_height - 1))
+
+    if mode == "pull":
+        return pull_points(points, img_width, img_height, start_x, start_y, end_x, end_y,
+                           influence_radius, strength, ellipse_ratio, ellipse_angle)
+    elif mode == "push":
+        dx = end_x - start_x
+        dy = end_y - start_y
+        displacement = lambda p: directional_displacement(p, start_x, start_y, dx, dy,
+                                                          influence_radius, strength,
+                                                          ellipse_ratio, ellipse_angle)
+    elif mode in ("expand", "shrink"):
+        displacement = lambda p: radial_displacement(p, start_x, start_y, influence_radius,
+                                                     strength, expand=(mode == "expand"),
+                                                     ellipse_ratio=ellipse_ratio,
+                                                     ellipse_angle=ellipse_angle)
+    else:
+        return np.asarray(points, dtype=np.float64)
+
+    return forward_points(points, displacement, img_width, img_height)
+
+
+def union_roi(rois: List[Optional[Roi]]) -> Optional[Roi]:
+    """여러 ROI를 모두 포함하는 경계 박스"""
+    rois = [roi for roi in rois if roi is not None]
+    if not rois:
+        return None
+    return (min(roi[0] for roi in rois), min(roi[1] for roi in rois),
+            max(roi[2] for roi in rois), max(roi[3] for roi in rois))
+
+
+def pull_offsets(map_x: np.ndarray, map_y: np.ndarray,
+                 operation: PullOperation) -> Tuple[np.ndarray, np.ndarray]:
+    """임의 좌표 배열에서 당기기 연산의 변위 (directional_maps와 같은 float32 식, 스크래치 버퍼)"""
+    start_x, start_y, end_x, end_y, influence_radius, strength, ellipse_ratio = operation
+    dx = start_x - end_x
+    dy = start_y - end_y
+    shape = map_x.shape
+
+    pixel_dx = np.subtract(map_x, start_x, out=scratch("pull_dx", shape))
+    pixel_dy = np.subtract(map_y, start_y, out=scratch("pull_dy", shape))
+    pixel_dist = scratch("pull_dist", shape)
+    if is_circular(ellipse_ratio):
+        np.multiply(pixel_dx, pixel_dx, out=pixel_dist)
+        pixel_dist += np.multiply(pixel_dy, pixel_dy, out=pixel_dy)
+        np.sqrt(pixel_dist, out=pixel_dist)
+    else:
+        elliptical_distance(pixel_dx, pixel_dy, ellipse_ratio, 0.0, out=pixel_dist)
+
+    # 영향 반경 밖은 1 - d/R <= 0 이므로 0으로 잘라내면 마스크와 같다
+    strength_map = np.divide(pixel_dist, influence_radius, out=pixel_dist)
+    np.subtract(1, strength_map, out=strength_map)
+    np.maximum(strength_map, 0, out=strength_map)
+    np.square(strength_map, out=strength_map)
+    strength_map *= strength
+
+    return np.multiply(strength_map, dx, out=pixel_dx), np.multiply(strength_map, dy, out=pixel_dy)
+
+
+def operation_window(roi: Roi, operation: PullOperation, reach: float,
+                     img_width: int, img_height: int) -> Optional[Roi]:
+    """연산의 영향 ROI를 reach만큼 넓혀 roi 안으로 자른 창 (겹치지 않으면 None)
+
+    좌표가 reach 이상 움직이지 않았다면 이 창 밖의 좌표는 영향 반경 밖이라 변위가 0이다.
+    """
+    operation_roi = influence_roi(img_width, img_height, operation[0], operation[1], operation[4], operation[6])
+    if operation_roi is None:
+        return None
+    margin = int(math.ceil(reach)) + ROI_MARGIN
+    x0 = max(roi[0], operation_roi[0] - margin)
+    y0 = max(roi[1], operation_roi[1] - margin)
+    x1 = min(roi[2], operation_roi[2] + margin)
+    y1 = min(roi[3], operation_roi[3] + margin)
+    if x0 >= x1 or y0 >= y1:
+        return None
+    return x0, y0, x1, y1
+
+
+def window_bands(roi: Roi, window: Roi) -> List[Tuple[Roi, Tuple[slice, slice]]]:
+    """window를 BAND_ROWS행씩 나눈 (영역, roi 좌표 맵 안의 (행, 열) 슬라이스) 목록"""
+    cols = slice(window[0] - roi[0], window[2] - roi[0])
+    return [
+        ((window[0], y0, window[2], min(y0 + BAND_ROWS, window[3])),
+         (slice(y0 - roi[1], min(y0 + BAND_ROWS, window[3]) - roi[1]), cols))
+        for y0 in range(window[1], window[3], BAND_ROWS)
+    ]
+
+
+def composed_pull_maps(roi: Roi, operations: List[PullOperation], img_width: int, img_height: int,
+                       mode: str = COMPOSE_EXACT) -> Tuple[np.ndarray, np.ndarray]:
+    """당기기 연산 목록을 하나의 좌표 맵으로 합성 (ROI 영역)
+
+    연산을 순서대로 remap하면 출력 픽셀 p는 M1(M2(...Mn(p)))를 샘플링하므로,
+    exact는 마지막 연산부터 좌표를 거꾸로 통과시키고 sum은 각 변위를 p에서 평가해 더한다.
+    각 연산은 변위가 생길 수 있는 창(영향 ROI + 그 전에 통과한 연산들의 도달 거리)에서만 계산하므로
+    좌우 턱선처럼 ROI가 큰 연산 묶음도 연산마다 자기 영역만 처리한다.
+    창은 BAND_ROWS행씩 나눠 계산해서 중간 배열이 ROI 크기만큼 커지지 않는다.
+    반환 맵은 스크래치 버퍼이므로 다음 워핑 전까지만 유효하다.
+    """
+    map_x, map_y = scratch_grid(roi)
+
+    if mode == COMPOSE_SUM:
+        for operation in operations:
+            window = operation_window(roi, operation, 0.0, img_width, img_height)
+            if window is None:
+                continue
+            for band, (rows, cols) in window_bands(roi, window):
+                # 변위는 항상 원래 좌표 p에서 평가하므로 띠의 항등 좌표를 따로 만들어 계산
+                shape = (band[3] - band[1], band[2] - band[0])
+                base_x, base_y = identity_grid(band, out=(scratch("band_x", shape), scratch("band_y", shape)))
+                offset_x, offset_y = pull_offsets(base_x, base_y, operation)
+                map_x[rows, cols] += offset_x
+                map_y[rows, cols] += offset_y
+        return map_x, map_y
+
+    reach = 0.0
+    for operation in reversed(operations):
+        window = operation_window(roi, operation, reach, img_width, img_height)
+        displacement = pull_reach([operation])
+        if window is not None:
+            # 순차 적용 시 매 단계의 경계 클리핑과 동일 (창 밖은 변하지 않았으므로 이미 범위 안)
+            # 창의 좌표가 움직일 수 있는 범위가 이미지 안이면 클리핑할 것이 없으므로 건너뜀
+            spread = reach + displacement
+            needs_clip = (window[0] - spread < 0 or window[1] - spread < 0 or
+                          window[2] - 1 + spread > img_width - 1 or window[3] - 1 + spread > img_height - 1)
+            for _, (rows, cols) in window_bands(roi, window):
+                band_x, band_y = map_x[rows, cols], map_y[rows, cols]
+                offset_x, offset_y = pull_offsets(band_x, band_y, operation)
+                band_x += offset_x
+                band_y += offset_y
+                if needs_clip:
+                    clip_coords(band_x, band_y, img_width, img_height)
+        reach += displacement
+    return map_x, map_y
+
+
+def sum_composition_error_bound(operations: List[PullOperation]) -> float:
+    """변위 합산 근사와 정확한 합성 사이의 좌표 오차 상한 (픽셀)
+
+    연산 i의 변위 크기 최대값을 D_i, 변위장의 립시츠 상수를 L_i라 하면
+    (당기기 변위 |v|·s·(1 - d/R)^2 → D_i = |v|·|s|, L_i = 2·|v|·|s| / R,
+    타원이면 거리 d의 기울기가 최대 max(1, ratio)배가 되므로 L_i도 그만큼 커진다)
+    연산 i가 정확한 합성에서 평가되는 좌표는 p에서 최대 Σ_{j>i} D_j만큼 떨어져 있으므로
+    오차 ≤ Σ_i L_i · Σ_{j>i} D_j 이다.
+    """
+    max_offsets = []
+    lipschitz = []
+    for start_x, start_y, end_x, end_y, influence_radius, strength, ellipse_ratio in operations:
+        if not influence_radius > 0:
+            max_offsets.append(0.0)
+            lipschitz.append(0.0)
+            continue
+        magnitude = math.hypot(start_x - end_x, start_y - end_y) * abs(strength)
+        stretch = 1.0 if is_circular(ellipse_ratio) else max(1.0, ellipse_ratio)
+        max_offsets.append(magnitude)
+        lipschitz.append(2 * magnitude * stretch / influence_radius)
+
+    bound = 0.0
+    inner = 0.0
+    for i in reversed(range(len(operations))):
+        bound += lipschitz[i] * inner
+        inner += max_offsets[i]
+    return bound
+
+
+def apply_pull_operations(image: np.ndarray, operations: List[PullOperation],
+                          mode: str = COMPOSE_EXACT) -> np.ndarray:
+    """당기기 연산 목록 적용
+
+    sequential은 연산마다 remap하고, exact/sum은 좌표 맵을 합성해서 원본을 한 번만 샘플링한다
+    (중간 재샘플링이 없어서 흐려짐이 누적되지 않는다).
+    서로 영향을 주고받지 않는 연산끼리는 따로 합성해서 각자의 ROI만 remap한다
+    (떨어진 연산들을 감싸는 경계 박스 하나로 합성하면 사이의 변형 없는 픽셀까지 모두 계산하게 됨).
+    """
+    if mode not in COMPOSE_MODES:
+        raise ValueError(f"Unknown compose mode: {mode}")
+
+    if mode == COMPOSE_SEQUENTIAL:
+        result_image = image.copy()
+        for start_x, start_y, end_x, end_y, influence_radius, strength, ellipse_ratio in operations:
+            result_image = apply_pull_warp(
+                result_image,
+                start_x, start_y,
+                end_x, end_y,
+                influence_radius, strength,
+                ellipse_ratio
+            )
+        return result_image
+
+    img_height, img_width = image.shape[:2]
+    result_image = image.copy()
+    for roi, cluster in pull_operation_clusters([[operation] for operation in operations], img_width, img_height):
+        map_x, map_y = composed_pull_maps(roi, cluster, img_width, img_height, mode)
+        remap_roi(image, roi, map_x, map_y, out=result_image)
+    return result_image
+
+
+def pull_reach(operations: List[PullOperation]) -> float:
+    """연산 목록이 좌표를 옮길 수 있는 최대 거리 (픽셀, 변위 크기 |v|·|s|의 합)"""
+    return sum(
+        math.hypot(start_x - end_x, start_y - end_y) * abs(strength)
+        for start_x, start_y, end_x, end_y, influence_radius, strength, ellipse_ratio in operations
+        if influence_radius > 0
+    )
+
+
+def pull_operation_clusters(groups: List[List[PullOperation]], img_width: int, img_height: int
+                            ) -> List[Tuple[Roi, List[PullOperation]]]:
+    """얼굴별 연산 묶음을 서로 영향을 주고받는 것끼리 모아 (ROI, 연산 목록) 클러스터로 반환
+
+    묶음의 영향 ROI를 변위 도달 거리만큼 넓혀서 겹치면(간접적으로 겹쳐도) 같은 클러스터로 합친다.
+    겹치지 않는 클러스터는 서로의 좌표 맵에 영향을 주지 않으므로 따로 합성해도
+    모든 연산을 한 번에 합성한 결과와 같다. 클러스터 안의 연산 순서는 묶음 순서를 따른다.
+    """
+    clusters = []  # [묶음 인덱스 목록, 영향 ROI, 넓힌 박스]
+    for index, operations in enumerate(groups):
+        roi = union_roi([
+            influence_roi(img_width, img_height, operation[0], operation[1], operation[4], operation[6])
+            for operation in operations
+        ])
+        if roi is None:
+            continue
+        reach = int(math.ceil(pull_reach(operations))) + INTERP_MARGIN
+        clusters.append([[index], roi, (roi[0] - reach, roi[1] - reach, roi[2] + reach, roi[3] + reach)])
+
+    merged = True
+    while merged:
+        merged = False
+        for i in range(len(clusters)):
+            for j in range(i + 1, len(clusters)):
+                a, b = clusters[i][2], clusters[j][2]
+                if a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]:
+                    clusters[i] = [clusters[i][0] + clusters[j][0],
+                                   union_roi([clusters[i][1], clusters[j][1]]),
+                                   union_roi([a, b])]
+                    del clusters[j]
+                    merged = True
+                    break
+            if merged:
+                break
+
+    return [
+        (roi, [operation for index in sorted(indices) for operation in groups[index]])
+        for indices, roi, _ in clusters
+    ]
+
+
+def apply_pull_operation_groups(image: np.ndarray, groups: List[List[PullOperation]],
+                                mode: str = COMPOSE_EXACT) -> np.ndarray:
+    """얼굴별 당기기 연산 묶음을 한 결과 이미지에 적용
+
+    apply_pull_operations가 서로 영향이 없는 연산끼리 나눠 합성하므로, 모든 연산을 순서대로
+    이어 붙여 넘긴 것과 같다 (떨어진 얼굴은 각자의 ROI만 remap된다).
+    """
+    return apply_pull_operations(image, [operation for operations in groups for operation in operations], mode)
+
+
+def apply_warp(image: np.ndarray, start_x: float, start_y: float,
+               end_x: float, end_y: float, influence_radius: float,
+               strength: float, mode: str, ellipse_ratio: Optional[float] = None,
+               ellipse_angle: float = 0.0) -> np.ndarray:
+    """워핑 변형 적용 함수 (ellipse_ratio가 있으면 회전 타원 영향 영역)"""
+    img_height, img_width = image.shape[:2]
+
+    # 좌표 경계 검사
+    start_x = max(0, min(start_x, img_width - 1))
+    start_y = max(0, min(start_y, img_height - 1))
+    end_x = max(0, min(end_x, img_width - 1))
+    end_y = max(0, min(end_y, img_height - 1))
+
+    print(f"워핑 모드: {mode}")
+    if mode == "pull":
+        return apply_pull_warp(image, start_x, start_y, end_x, end_y, influence_radius, strength,
+                               ellipse_ratio, ellipse_angle)
+    elif mode == "push":
+        return apply_push_warp(image, start_x, start_y, end_x, end_y, influence_radius, strength,
+                               ellipse_ratio, ellipse_angle)
+    elif mode == "expand":
+        print("확대 모드 실행 - expand=True")
+        return apply_radial_warp(image, start_x, start_y, influence_radius, strength, expand=True,
+                                 ellipse_ratio=ellipse_ratio, ellipse_angle=ellipse_angle)
+    elif mode == "shrink":
+        print("축소 모드 실행 - expand=False")
+        return apply_radial_warp(image, start_x, start_y, influence_radius, strength, expand=False,
+                                 ellipse_ratio=ellipse_ratio, ellipse_angle=ellipse_angle)
+    else:
+        print(f"알 수 없는 모드: {mode}")
+        return image
+
+
+def apply_pull_warp(image: np.ndarray, start_x: float, start_y: float,
+                    end_x: float, end_y: float, influence_radius: float, strength: float,
+                    ellipse_ratio: Optional[float] = None, ellipse_angle: float = 0.0) -> np.ndarray:
+    """당기기 워핑 (ellipse_ratio: 장축/단축 비율, ellipse_angle: 장축 각도(도))"""
+    img_height, img_width = image.shape[:2]
+
+    roi = influence_roi(img_width, img_height, start_x, start_y, influence_radius,
+                        ellipse_ratio, ellipse_angle)
+    if roi is None:
+        return image.copy()
+
+    # 드래그 벡터 (예전 방식: 반대 방향)
+    dx = start_x - end_x
+    dy = start_y - end_y
+
+    map_x, map_y = directional_maps(roi, start_x, start_y, dx, dy, influence_radius, strength,
+                                    ellipse_ratio, ellipse_angle)
+    return remap_roi(image, roi, map_x, map_y)
+
+
+def apply_push_warp(image: np.ndarray, start_x: float, start_y: float,
+                    end_x: float, end_y: float, influence_radius: float, strength: float,
+                    ellipse_ratio: Optional[float] = None, ellipse_angle: float = 0.0) -> np.ndarray:
+    """밀어내기 워핑"""
+    img_height, img_width = image.shape[:2]
+
+    roi = influence_roi(img_width, img_height, start_x, start_y, influence_radius,
+                        ellipse_ratio, ellipse_angle)
+    if roi is None:
+        return image.copy()
+
+    # 드래그 벡터
+    dx = end_x - start_x
+    dy = end_y - start_y
+
+    map_x, map_y = directional_maps(roi, start_x, start_y, dx, dy, influence_radius, strength,
+                                    ellipse_ratio, ellipse_angle)
+    return remap_roi(image, roi, map_x, map_y)
+
+
+def apply_radial_warp(image: np.ndarray, center_x: float, center_y: float,
+                      influence_radius: float, strength: float, expand: bool = True,
+                      ellipse_ratio: Optional[float] = None, ellipse_angle: float = 0.0) -> np.ndarray:
+    """방사형 워핑 (확대/축소)"""
+    img_height, img_width = image.shape[:2]
+
+    roi = influence_roi(img_width, img_height, center_x, center_y, influence_radius,
+                        ellipse_ratio, ellipse_angle)
+    if roi is None:
+        return image.copy()
+
+    map_x, map_y = radial_maps(roi, center_x, center_y, influence_radius, strength, expand,
+                               ellipse_ratio, ellipse_angle)
+    return remap_roi(image, roi, map_x, map_y)
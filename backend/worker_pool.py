@@ -0,0 +1,92 @@
+"""
+CPU 작업용 워커 풀
+
+MediaPipe/OpenCV 처리와 파일 I/O를 asyncio 이벤트 루프 밖의 스레드 풀에서 실행한다.
+대기 중인 작업 수에 한도를 두고, 가득 차면 즉시 503 + Retry-After로 거절해서
+부하가 몰려도 지연 시간이 무한히 늘어나지 않게 한다.
+
+OpenCV와 MediaPipe는 연산 중 GIL을 놓기 때문에 스레드 풀로 충분히 병렬화되고,
+이미지/랜드마크 캐시를 프로세스 안에서 그대로 공유할 수 있다.
+"""
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict
+
+from fastapi import HTTPException
+
+
+class WorkerPoolFull(HTTPException):
+    """대기열이 가득 차서 작업을 받을 수 없음 (503)"""
+
+    def __init__(self, retry_after: int):
+        super().__init__(
+            status_code=503,
+            detail="요청이 많아 처리할 수 없습니다. 잠시 후 다시 시도해주세요",
+            headers={"Retry-After": str(retry_after)}
+        )
+
+
+class WorkerPool:
+    """대기열 한도가 있는 스레드 풀"""
+
+    def __init__(self, max_workers: int, max_pending: int, retry_after: int = 1):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.retry_after = retry_after
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="cpu-worker")
+        self._lock = threading.Lock()
+        self._pending = 0
+
+        self.completed = 0
+        self.rejected = 0
+        self.busy_seconds = 0.0
+
+    async def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """워커 스레드에서 fn 실행 (대기열이 가득 차면 WorkerPoolFull)"""
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.rejected += 1
+                raise WorkerPoolFull(self.retry_after)
+            self._pending += 1
+
+        # 대기 수는 스레드 작업이 실제로 끝날 때 줄인다 (요청이 취소돼도 실행 중인 작업은 계속 자리를 차지)
+        try:
+            future = self._executor.submit(partial(self._timed, fn, *args, **kwargs))
+        except BaseException:
+            self._release()
+            raise
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+    def _release(self, future: Any = None):
+        with self._lock:
+            self._pending -= 1
+
+    def _timed(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        started = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self.completed += 1
+                self.busy_seconds += elapsed
+
+    def stats(self) -> Dict[str, Any]:
+        """풀 상태 및 카운터"""
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "max_pending": self.max_pending,
+                "pending": self._pending,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "busy_seconds": round(self.busy_seconds, 3),
+            }
+
+    def shutdown(self):
+        """풀 종료 (실행 중인 작업은 끝까지 처리)"""
+        self._executor.shutdown(wait=True)